@@ -1,15 +1,35 @@
+import importlib, sys
+
 from fire import Fire
 
-from run_each import run_each
-from eval_difficulties import eval_difficulties
-from eval_total import evaluate_total
-from update_readme import update_readme
+
+# Subcommand -> (module, function). Modules are imported only when their command runs, so
+# commands that only read result files never import the inference stack (langchain, datasets, ...).
+COMMANDS = {
+    "diff": ("eval_difficulties", "eval_difficulties"),
+    "per": ("eval_total", "evaluate_total"),
+    "auto": ("__main__", "run_sequentially"),
+    "each": ("run_each", "run_each"),
+    "readme": ("update_readme", "update_readme"),
+    "pack": ("pack", "pack"),
+    "compare": ("compare", "compare")
+}
+
+
+def load_command(name: str):
+    module, function = COMMANDS[name]
+    return getattr(sys.modules[__name__] if module == "__main__" else importlib.import_module(module), function)
 
 
 def run_sequentially(**kwargs):
     """
     Run both the run_each and eval_difficulties functions sequentially.
     """
+    from eval_difficulties import eval_difficulties
+    from eval_total import evaluate_total
+    from run_each import run_each
+    from update_readme import update_readme
+
     run_each(**kwargs)
     eval_difficulties(**kwargs)
     for split in ["dev", "val", "test"]:
@@ -17,11 +37,12 @@ def run_sequentially(**kwargs):
     update_readme()
 
 
+def command_table(argv: list) -> dict:
+    """The requested command alone, or every command (for help and unknown commands)."""
+    if len(argv) > 1 and argv[1] in COMMANDS:
+        return {argv[1]: load_command(argv[1])}
+    return {name: load_command(name) for name in COMMANDS}
+
+
 if __name__ == '__main__':
-    Fire({
-        "diff": eval_difficulties,
-        "per": evaluate_total,
-        "auto": run_sequentially,
-        "each": run_each,
-        "readme": update_readme
-    })
\ No newline at end of file
+    Fire(command_table(sys.argv))
@@ -3,12 +3,16 @@ from llms import llm_models
 from .standalone import GPUFreeAPI
 from .from_langserve import RemoteAPI
 from .from_vllm import VLLMOpenAIAPI
+from .from_transformers import TransformersAPI
 
 
 module = {
     "anthropic": GPUFreeAPI,
     "google": GPUFreeAPI,
+    "langserve": RemoteAPI,
     "openai": GPUFreeAPI,
+    "transformers": TransformersAPI,
+    "vllm": VLLMOpenAIAPI,
 }
 
 for kprovider, vapi in module.items():
@@ -1,25 +1,46 @@
-from models import APIBase
+import os
+from typing import List
+
+from dotenv import load_dotenv
 from langserve import RemoteRunnable
 
+from models import APIBase
+from models.pool import EndpointPool, split_endpoints
+
+
+load_dotenv()
+LANGSERVE_ENDPOINT = os.getenv("LANGSERVE_ENDPOINT")  # comma-separated for several replicas
+
 
 
 class RemoteAPI(APIBase):
     """
     Remote API class for initializing and managing chat models via a remote endpoint.
     Inherits from APIBase and provides additional functionality.
+
+    Several replicas (a list or comma-separated `endpoint`) are balanced by an
+    `EndpointPool` that health-checks `<endpoint>/input_schema`.
     """
-    def __init__(self, 
-            model_id: str, 
-            locale: str, 
-            prompt_type: str, 
-            prompt_version: str, 
-            endpoint: str,
+    def __init__(self,
+            model_id: str,
+            endpoint: str | List[str] = LANGSERVE_ENDPOINT,
+            model_kwargs: dict | None = None,
             **kwargs
         ):
-        super().__init__(locale=locale, prompt_type=prompt_type, prompt_version=prompt_version)
+        super().__init__(**kwargs)
+        endpoints = split_endpoints(endpoint)
+        if not endpoints:
+            raise ValueError("No LangServe endpoint; pass `endpoint` or set LANGSERVE_ENDPOINT.")
         self.model_id = model_id
-        self.model = RemoteRunnable(url=endpoint, **kwargs)
+
+        def build(url: str) -> RemoteRunnable:
+            return RemoteRunnable(url=url, **(model_kwargs or {}))
+
+        if len(endpoints) == 1:
+            self.model = build(endpoints[0])
+        else:
+            self.model = EndpointPool.from_endpoints(endpoints, build, health_url=lambda url: url.rstrip("/") + "/input_schema")
 
 
 
-__all__ = ["RemoteAPI"]
\ No newline at end of file
+__all__ = ["RemoteAPI"]
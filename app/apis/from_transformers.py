@@ -0,0 +1,347 @@
+import asyncio, os, threading, time
+from typing import Dict, List, Literal, Optional, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, SystemMessage
+
+from models import APIBase, SubsetJob
+from utils.cache import ResponseCache
+from utils.logs import set_logger
+
+
+load_dotenv()
+TRANSFORMERS_BATCH_SIZE = int(os.getenv("TRANSFORMERS_BATCH_SIZE", 8))
+TRANSFORMERS_NUM_THREADS = int(os.getenv("TRANSFORMERS_NUM_THREADS", 0))  # 0 keeps torch's default
+TRANSFORMERS_MAX_NEW_TOKENS = int(os.getenv("TRANSFORMERS_MAX_NEW_TOKENS", 256))
+
+logger = set_logger(__name__)
+
+
+
+class TransformersGenerator:
+    """
+    Hugging Face causal LM that answers prompts in padded, length-sorted batches.
+
+    Prompts are rendered with the tokenizer's chat template, sorted by token length and
+    generated `batch_size` at a time with left padding and greedy decoding, so a batch
+    wastes little compute on padding. Called like a `BatchClient` (prompts keyed by sample
+    id -> AIMessage), and like a chat model (`invoke` / `ainvoke`) for single prompts.
+
+    Throughput of the last call is kept in `throughput` (tokens/sec and samples/sec).
+    """
+    def __init__(self,
+        model_name: str,
+        batch_size: int = TRANSFORMERS_BATCH_SIZE,
+        num_threads: int = TRANSFORMERS_NUM_THREADS,
+        max_new_tokens: int = TRANSFORMERS_MAX_NEW_TOKENS,
+        device: str = "cpu",
+        torch_dtype: str = "auto",
+        **model_kwargs
+    ):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.max_new_tokens = max_new_tokens
+        self.device = device
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, padding_side="left")
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch_dtype, **model_kwargs).to(device).eval()
+        self.throughput: Dict[str, float] = {}
+        # One generation at a time: concurrent callers would only compete for the same cores
+        self._lock = threading.Lock()
+        self._warned_images = False
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": self.model_name, "max_new_tokens": self.max_new_tokens, "do_sample": False}
+
+    def render(self, messages: list) -> str:
+        """Prompt text of LangChain messages (images are dropped; the model reads text only)."""
+        chat = []
+        for message in messages:
+            parts = [{"type": "text", "text": message.content}] if isinstance(message.content, str) else message.content
+            if any(part.get("type") != "text" for part in parts) and not self._warned_images:
+                logger.warning(f"{self.model_name} reads text only; images are left out of its prompts.")
+                self._warned_images = True
+            text = "\n".join(part["text"] for part in parts if part.get("type") == "text")
+            chat.append({"role": "system" if isinstance(message, SystemMessage) else "user", "content": text})
+        if self.tokenizer.chat_template:
+            return self.tokenizer.apply_chat_template(chat, tokenize=False, add_generation_prompt=True)
+        return "\n\n".join(turn["content"] for turn in chat) + "\n\n"
+
+    def generate(self, texts: List[str]) -> List[AIMessage]:
+        """Generate one padded batch greedily."""
+        import torch
+
+        # Chat templates already contain the special tokens
+        inputs = self.tokenizer(texts, return_tensors="pt", padding=True, add_special_tokens=not self.tokenizer.chat_template).to(self.device)
+        started = time.perf_counter()
+        with torch.inference_mode():
+            output = self.model.generate(
+                **inputs,
+                max_new_tokens=self.max_new_tokens,
+                do_sample=False,
+                pad_token_id=self.tokenizer.pad_token_id
+            )
+        latency = time.perf_counter() - started
+
+        generated = output[:, inputs["input_ids"].shape[1]:]
+        input_tokens = inputs["attention_mask"].sum(dim=1).tolist()
+        output_tokens = (generated != self.tokenizer.pad_token_id).sum(dim=1).tolist()
+        answers = self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+        return [
+            AIMessage(
+                content=answer.strip(),
+                usage_metadata={"input_tokens": n_in, "output_tokens": n_out, "total_tokens": n_in + n_out},
+                # Every sample of a batch waits for the whole batch
+                response_metadata={"model_name": self.model_name, "latency": latency, "batch_size": len(texts)},
+            )
+            for answer, n_in, n_out in zip(answers, input_tokens, output_tokens)
+        ]
+
+    def __call__(self,
+        job_file: Optional[str],
+        model: str,
+        prompts: Dict[str, list],
+        max_retries: int = 1,
+        max_timeout: int = 0
+    ) -> Dict[str, AIMessage]:
+        """
+        Answer every prompt.
+
+        Args:
+            job_file (str | None): Unused; kept for the `BatchClient` call signature.
+            model (str): Unused; the generator serves its own model.
+            prompts (dict[str, list]): Prompt messages keyed by sample id.
+            max_retries (int): Unused; local generation is not retried.
+            max_timeout (int): Unused; local generation is not timed out.
+
+        Returns:
+            dict[str, AIMessage]: Responses keyed by sample id.
+        """
+        ids = list(prompts)
+        texts = [self.render(prompts[sample_id]) for sample_id in ids]
+        lengths = [len(input_ids) for input_ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+        order = sorted(range(len(ids)), key=lengths.__getitem__)
+
+        responses: Dict[str, AIMessage] = {}
+        started = time.perf_counter()
+        with self._lock:
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                for index, response in zip(batch, self.generate([texts[index] for index in batch])):
+                    responses[ids[index]] = response
+        elapsed = time.perf_counter() - started
+
+        output_tokens = sum(response.usage_metadata["output_tokens"] for response in responses.values())
+        self.throughput = {
+            "samples": len(responses),
+            "output_tokens": output_tokens,
+            "seconds": elapsed,
+            "tokens_per_sec": output_tokens / elapsed if elapsed > 0 else 0.0,
+            "samples_per_sec": len(responses) / elapsed if elapsed > 0 else 0.0,
+        }
+        if responses:
+            logger.info(
+                f"{self.model_name}: {len(responses)} samples in {elapsed:.1f}s "
+                f"({self.throughput['samples_per_sec']:.2f} samples/s, {self.throughput['tokens_per_sec']:.1f} tokens/s, batch size {self.batch_size})."
+            )
+        return responses
+
+    def invoke(self, messages: list) -> AIMessage:
+        return self(None, self.model_name, {"prompt": messages})["prompt"]
+
+    async def ainvoke(self, messages: list) -> AIMessage:
+        return await asyncio.to_thread(self.invoke, messages)
+
+    @staticmethod
+    def _repeat_cache(past, n: int):
+        """Key/value cache of one sequence repeated for `n` continuations."""
+        if hasattr(past, "batch_repeat_interleave"):
+            past.batch_repeat_interleave(n)
+            return past
+        return tuple(tuple(tensor.expand(n, *tensor.shape[1:]) for tensor in layer) for layer in past)
+
+    def score(self, text: str, continuations: List[str], normalize: bool = False) -> Tuple[List[float], int]:
+        """
+        Log-probability of each continuation following `text`.
+
+        The shared prefix runs once; its last logits score the first token of every
+        continuation, and longer continuations are scored together in one padded forward
+        pass over the cached prefix.
+
+        Args:
+            text (str): Rendered prompt.
+            continuations (list[str]): Candidate answers.
+            normalize (bool): Average over the tokens of a continuation instead of summing.
+
+        Returns:
+            tuple[list[float], int]: Score of each continuation and the number of tokens read.
+        """
+        import torch
+
+        prefix = self.tokenizer(text, return_tensors="pt", add_special_tokens=not self.tokenizer.chat_template).to(self.device)
+        tokens = [self.tokenizer(continuation, add_special_tokens=False)["input_ids"] or [self.tokenizer.eos_token_id] for continuation in continuations]
+        width = max(len(ids) for ids in tokens)
+        with torch.inference_mode():
+            output = self.model(**prefix, use_cache=width > 1)
+            first = torch.log_softmax(output.logits[0, -1].float(), dim=-1)
+            scores = torch.stack([first[ids[0]] for ids in tokens])
+            if width > 1:
+                # Token j of a continuation is predicted at position j - 1; padding trails the real tokens
+                n = len(tokens)
+                input_ids = torch.full((n, width), self.tokenizer.pad_token_id, dtype=torch.long)
+                mask = torch.zeros((n, width), dtype=torch.long)
+                for i, ids in enumerate(tokens):
+                    input_ids[i, :len(ids)] = torch.tensor(ids)
+                    mask[i, :len(ids)] = 1
+                input_ids, mask = input_ids.to(self.device), mask.to(self.device)
+                logits = self.model(
+                    input_ids=input_ids[:, :-1],
+                    attention_mask=torch.cat([prefix["attention_mask"].expand(n, -1), mask[:, :-1]], dim=1),
+                    past_key_values=self._repeat_cache(output.past_key_values, n),
+                ).logits
+                rest = torch.log_softmax(logits.float(), dim=-1).gather(-1, input_ids[:, 1:, None])[..., 0]
+                scores = scores.to(rest.device) + (rest * mask[:, 1:]).sum(dim=1)
+        lengths = [len(ids) for ids in tokens]
+        if normalize:
+            scores = scores / torch.tensor(lengths, dtype=scores.dtype, device=scores.device)
+        return scores.tolist(), prefix["input_ids"].shape[1] + (sum(lengths) if width > 1 else 0)
+
+    def score_options(self, questions: Dict[str, Tuple[list, Dict[str, str]]], normalize: bool = False) -> Dict[str, AIMessage]:
+        """
+        Pick the most likely option of every question.
+
+        Args:
+            questions (dict[str, tuple[list, dict[str, str]]]): (prompt messages, option label ->
+                scored continuation) keyed by sample id.
+            normalize (bool): Average log-probabilities over the tokens of a continuation.
+
+        Returns:
+            dict[str, AIMessage]: The best option label keyed by sample id, with the score of
+                every option in `response_metadata['option_logprobs']`.
+        """
+        responses: Dict[str, AIMessage] = {}
+        input_tokens = 0
+        started = time.perf_counter()
+        with self._lock:
+            for sample_id, (messages, candidates) in questions.items():
+                labels = list(candidates)
+                scored_at = time.perf_counter()
+                scores, n_in = self.score(self.render(messages), [candidates[label] for label in labels], normalize=normalize)
+                input_tokens += n_in
+                best = max(range(len(labels)), key=scores.__getitem__) if labels else None
+                responses[sample_id] = AIMessage(
+                    content=labels[best] if best is not None else "",
+                    usage_metadata={"input_tokens": n_in, "output_tokens": 0, "total_tokens": n_in},
+                    response_metadata={
+                        "model_name": self.model_name,
+                        "latency": time.perf_counter() - scored_at,
+                        "option_logprobs": dict(zip(labels, scores)),
+                    },
+                )
+        elapsed = time.perf_counter() - started
+
+        self.throughput = {
+            "samples": len(responses),
+            "input_tokens": input_tokens,
+            "seconds": elapsed,
+            "tokens_per_sec": input_tokens / elapsed if elapsed > 0 else 0.0,
+            "samples_per_sec": len(responses) / elapsed if elapsed > 0 else 0.0,
+        }
+        if responses:
+            logger.info(
+                f"{self.model_name}: scored {len(responses)} questions in {elapsed:.1f}s "
+                f"({self.throughput['samples_per_sec']:.2f} samples/s, {self.throughput['tokens_per_sec']:.1f} tokens/s)."
+            )
+        return responses
+
+
+
+class TransformersAPI(APIBase):
+    """
+    Local Hugging Face causal LM, run on this machine without any service.
+
+    Every job is generated in padded, length-sorted batches through `run_batch` (see
+    `TransformersGenerator`); cached responses are reused as for any other backend.
+    `model_id` is `transformers/<Hugging Face repo id>`, e.g.,
+    `transformers/Qwen/Qwen2.5-0.5B-Instruct`.
+
+    With `task="mcqa-loglik"` nothing is generated: each option's label (`score_by="label"`)
+    or text (`score_by="text"`, averaged per token) is scored by its log-probability after
+    the prompt, and the best option is the prediction.
+    """
+    batched = True
+    scores_options = True
+
+    def __init__(self,
+        model_id: str,
+        batch_size: int = TRANSFORMERS_BATCH_SIZE,
+        num_threads: int = TRANSFORMERS_NUM_THREADS,
+        max_new_tokens: int = TRANSFORMERS_MAX_NEW_TOKENS,
+        device: str = "cpu",
+        score_by: Literal["label", "text"] = "label",
+        model_kwargs: dict | None = None,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        if score_by not in ("label", "text"):
+            raise ValueError(f"Unknown score_by '{score_by}'; expected 'label' or 'text'.")
+        self.score_by = score_by
+        self.model_id = model_id
+        self.model = TransformersGenerator(
+            model_id.partition('/')[2],
+            batch_size=batch_size,
+            num_threads=num_threads,
+            max_new_tokens=max_new_tokens,
+            device=device,
+            **(model_kwargs or {})
+        )
+
+    def batch_client(self) -> TransformersGenerator:
+        return self.model
+
+    def run_batch(self, job: SubsetJob, max_retries: int = 5, max_timeout: int = 60, concurrency: int = 1) -> dict[str, str]:
+        """Generate the job in batches or, for "mcqa-loglik", score the options of every question."""
+        if self.task != "mcqa-loglik":
+            return super().run_batch(job, max_retries, max_timeout, concurrency)
+
+        prepared = [self._prepare_sample(job.dataset[index], job.subset) for index in job.pending]
+        responses, questions = {}, {}
+        for handler, prompt_msgs in prepared:
+            cached = self.cache.get(self._cache_key(prompt_msgs)) if self.cache and not job.refresh_cache else None
+            if cached is not None:
+                responses[handler['id']] = cached
+            else:
+                options = handler['options']
+                questions[handler['id']] = (prompt_msgs, dict(zip(options, options if self.score_by == "label" else options.values())))
+
+        scored = self.model.score_options(questions, normalize=self.score_by == "text")
+        if self.cache:
+            for sample_id, response in scored.items():
+                self.cache.set(self._cache_key(questions[sample_id][0]), response)
+        responses.update(scored)
+
+        for handler, _ in prepared:
+            job.checkpoint.append(self._complete_sample(handler, responses[handler['id']]))
+        return self.finalize_job(job)
+
+    def _cache_key(self, prompt_msgs) -> str:
+        if self.task != "mcqa-loglik":
+            return super()._cache_key(prompt_msgs)
+        params = {"model": self.model.model_name, "task": self.task, "score_by": self.score_by}
+        return ResponseCache.make_key(self.model_id, self.prompt.version, prompt_msgs, params)
+
+    @property
+    def throughput(self) -> Dict[str, float]:
+        """tokens/sec and samples/sec of the last generated or scored job."""
+        return self.model.throughput
+
+
+
+__all__ = ["TransformersAPI", "TransformersGenerator"]
@@ -1,36 +1,264 @@
-import os
+import asyncio, os, re, time
+from dataclasses import asdict
+from typing import Dict, List, Optional, Sequence
 
+import httpx
 from dotenv import load_dotenv
+from langchain_core.messages import AIMessage
 from langchain_openai import ChatOpenAI
 
 from models import APIBase
+from models.invoker import get_invoker
+from models.pool import EndpointPool, split_endpoints
+from utils.logs import per_sample, set_logger
 
 
 load_dotenv()
-VLLM_ENDPOINT = os.getenv("VLLM_ENDPOINT")
+VLLM_ENDPOINT = os.getenv("VLLM_ENDPOINT")  # comma-separated for several replicas
+VLLM_API_KEY = os.getenv("VLLM_API_KEY", "EMPTY")  # vLLM accepts any key unless started with --api-key
+# Requests kept in flight per job and replica; 0 sends samples through the shared scheduler instead
+VLLM_MAX_IN_FLIGHT = int(os.getenv("VLLM_MAX_IN_FLIGHT", 0))
+
+logger = set_logger(__name__)
+
+# Counters of the vLLM Prometheus endpoint, read before and after every job
+SERVER_COUNTERS = {
+    "prompt_tokens": "vllm:prompt_tokens_total",
+    "generation_tokens": "vllm:generation_tokens_total",
+    "prefix_cache_queries": "vllm:prefix_cache_queries_total",
+    "prefix_cache_hits": "vllm:prefix_cache_hits_total",
+}
+_SAMPLE_LINE = re.compile(r"^([^\s{]+)(\{[^}]*\})?\s+(\S+)")
+
+
+def server_url(base_url: str) -> str:
+    """Root of a vLLM server from its OpenAI-compatible base URL."""
+    return re.sub(r"/v1/?$", "", base_url.rstrip("/"))
+
+
+def prefix_key(messages: list) -> tuple:
+    """
+    Content parts of a prompt, message by message, with each message's images ahead of
+    its text, so prompts about the same image sort together whatever their part order.
+    """
+    parts = []
+    for message in messages:
+        content = message.content
+        images, texts = [], []
+        for part in [{"type": "text", "text": content}] if isinstance(content, str) else content:
+            if part.get("type") == "text":
+                texts.append(part["text"])
+            else:
+                image_url = part.get("image_url")
+                images.append(image_url["url"] if isinstance(image_url, dict) else str(image_url))
+        parts.extend(images + texts)
+    return tuple(parts)
+
+
+def prefix_order(prompts: Dict[str, list]) -> List[str]:
+    """
+    Sample ids sorted by `prefix_key`: by system prompt, then image, then question text, so
+    prompts that can share a prefix on the server are sent back to back.
+    """
+    keys = {sample_id: prefix_key(messages) for sample_id, messages in prompts.items()}
+    return sorted(prompts, key=keys.__getitem__)
+
+
+
+class ServerMetrics:
+    """Token and prefix-cache counters of vLLM servers, read from `<server>/metrics` and summed over replicas."""
+    def __init__(self, base_urls: Sequence[str], model: Optional[str] = None):
+        self.urls = [server_url(base_url) + "/metrics" for base_url in base_urls]
+        self.model = model
+
+    def read(self) -> Optional[Dict[str, float]]:
+        """Current counters of the served model, or None when a server exposes no metrics."""
+        texts = []
+        for url in self.urls:
+            try:
+                response = httpx.get(url, timeout=5)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.debug("No server metrics at %s: %s", url, e)
+                return None
+            texts.append(response.text)
+
+        names = {metric: key for key, metric in SERVER_COUNTERS.items()}
+        counters = dict.fromkeys(SERVER_COUNTERS, 0.0)
+        for line in "\n".join(texts).splitlines():
+            match = _SAMPLE_LINE.match(line)
+            if match is None or match.group(1) not in names:
+                continue
+            labels = match.group(2) or ""
+            if self.model and "model_name=" in labels and f'model_name="{self.model}"' not in labels:
+                continue
+            counters[names[match.group(1)]] += float(match.group(3))
+        return counters
+
+
+
+class VLLMClient:
+    """
+    High-throughput client of a vLLM OpenAI-compatible server.
+
+    Called like a `BatchClient` (prompts keyed by sample id -> AIMessage). Prompts are sent
+    in `prefix_order` with up to `max_in_flight` requests outstanding, which keeps the
+    server's continuous batching busy and lets consecutive requests reuse its automatic
+    prefix cache. Every request goes through the shared invoker with the run's retries and
+    per-attempt timeout. Requests that still fail are left out of the result, so `run_batch`
+    retries them online.
+
+    Throughput of the last call is kept in `throughput`. It comes from the server's
+    Prometheus counters, including the prefix-cache hit rate, when the server exposes them.
+    Otherwise it comes from the token usage of the responses.
+    """
+    def __init__(self, model: ChatOpenAI | EndpointPool, base_urls: Sequence[str], max_in_flight: int = 16):
+        self.model = model
+        self.max_in_flight = max(1, max_in_flight)
+        self.metrics = ServerMetrics(base_urls, model.model_name)
+        self.throughput: Dict[str, float] = {}
+
+    async def _agenerate(self, order: List[str], prompts: Dict[str, list], max_retries: int, max_timeout: int) -> Dict[str, AIMessage]:
+        # Semaphore waiters are served first in, first out, so requests start in `order`
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        responses: Dict[str, AIMessage] = {}
+
+        async def _send(sample_id: str):
+            async with semaphore:
+                try:
+                    invocation = await get_invoker().ainvoke(self.model, prompts[sample_id], max_retries, max_timeout)
+                except Exception as e:
+                    logger.warning("Request of %s failed: %s", sample_id, e, extra=per_sample(sample_id))
+                    return
+            response = invocation.response
+            response.response_metadata["latency"] = invocation.latency
+            response.response_metadata["attempts"] = [asdict(attempt) for attempt in invocation.attempts]
+            responses[sample_id] = response
+
+        await asyncio.gather(*(_send(sample_id) for sample_id in order))
+        return responses
+
+    def __call__(self,
+        job_file: Optional[str],
+        model: str,
+        prompts: Dict[str, list],
+        max_retries: int = 1,
+        max_timeout: int = 0
+    ) -> Dict[str, AIMessage]:
+        """
+        Answer every prompt.
+
+        Args:
+            job_file (str | None): Unused; kept for the `BatchClient` call signature.
+            model (str): Unused; the client serves the model of its `ChatOpenAI`.
+            prompts (dict[str, list]): Prompt messages keyed by sample id.
+            max_retries (int): Attempts per request.
+            max_timeout (int): Per-attempt timeout in seconds (0 / negative disables).
+
+        Returns:
+            dict[str, AIMessage]: Responses keyed by sample id. Failed requests are omitted.
+        """
+        before = self.metrics.read()
+        started = time.perf_counter()
+        responses = get_invoker().run(self._agenerate(prefix_order(prompts), prompts, max_retries, max_timeout))
+        elapsed = time.perf_counter() - started
+        after = self.metrics.read() if before is not None else None
+
+        if after is not None:
+            counters = {key: after[key] - before[key] for key in SERVER_COUNTERS}
+        else:
+            usage = [response.usage_metadata or {} for response in responses.values()]
+            counters = {
+                "prompt_tokens": sum(item.get("input_tokens", 0) for item in usage),
+                "generation_tokens": sum(item.get("output_tokens", 0) for item in usage),
+            }
+        self.throughput = {
+            "source": "server" if after is not None else "client",
+            "samples": len(responses),
+            "seconds": elapsed,
+            **counters,
+            "samples_per_sec": len(responses) / elapsed if elapsed > 0 else 0.0,
+            "prompt_tokens_per_sec": counters["prompt_tokens"] / elapsed if elapsed > 0 else 0.0,
+            "tokens_per_sec": counters["generation_tokens"] / elapsed if elapsed > 0 else 0.0,
+        }
+        if counters.get("prefix_cache_queries"):
+            self.throughput["prefix_cache_hit_rate"] = counters["prefix_cache_hits"] / counters["prefix_cache_queries"]
+
+        if responses:
+            hit_rate = self.throughput.get("prefix_cache_hit_rate")
+            logger.info(
+                f"{self.model.model_name}: {len(responses)}/{len(prompts)} samples in {elapsed:.1f}s "
+                f"({self.throughput['samples_per_sec']:.2f} samples/s, {self.throughput['prompt_tokens_per_sec']:.1f} prompt tokens/s, "
+                f"{self.throughput['tokens_per_sec']:.1f} generated tokens/s"
+                + (f", {hit_rate:.1%} prefix cache hits" if hit_rate is not None else "")
+                + f"; {self.throughput['source']}-side, {self.max_in_flight} in flight)."
+            )
+        return responses
 
 
 
 class VLLMOpenAIAPI(APIBase):
-    def __init__(self, 
-        model_id: str, 
-        base_url: str = VLLM_ENDPOINT, 
-        # api_key: str = "EMPTY",
-        locale: str = "en", 
-        task: str = "mcqa",
-        prompt_type: str = "mcqa", 
-        prompt_version: str = "latest",
+    """
+    Model served by vLLM's OpenAI-compatible server at `base_url` (`VLLM_ENDPOINT`).
+
+    `model_id` is `vllm/<served model name>`, e.g., `vllm/Qwen/Qwen2.5-VL-7B-Instruct`. With
+    `max_in_flight > 0` every job runs through `run_batch` on a `VLLMClient`. Otherwise samples
+    go through the shared scheduler, like any other backend. `image_first` puts the image
+    before the question text, so questions about the same image share a cacheable prefix.
+
+    Several replicas (a list or comma-separated `base_url`) are balanced by an `EndpointPool`
+    that health-checks `<server>/health`. `max_in_flight` then applies per replica.
+    """
+    def __init__(self,
+        model_id: str,
+        base_url: str | List[str] = VLLM_ENDPOINT,
+        api_key: str = VLLM_API_KEY,
+        max_in_flight: int = VLLM_MAX_IN_FLIGHT,
+        image_first: bool = False,
+        model_kwargs: dict | None = None,
         **kwargs
     ):
-        super().__init__(locale=locale, task=task, prompt_type=prompt_type, prompt_version=prompt_version)
+        super().__init__(**kwargs)
+        base_urls = split_endpoints(base_url)
+        if not base_urls:
+            raise ValueError("No vLLM endpoint; pass `base_url` or set VLLM_ENDPOINT.")
         self.model_id = model_id
-        self.model = ChatOpenAI(
-            base_url=base_url,           # 예: "http://localhost:8000/v1"
-            # api_key=api_key,             # vLLM은 기본적으로 아무 문자열이나 허용
-            model=model_id,              # 예: "meta-llama/Meta-Llama-3-8B-Instruct"
-            **kwargs                     # temperature, top_p, max_tokens 등
-        )
+        self.image_first = image_first
+        self.batched = max_in_flight > 0
+
+        def build(url: str) -> ChatOpenAI:
+            return ChatOpenAI(
+                base_url=url,                # 예: "http://localhost:8000/v1"
+                api_key=api_key,
+                model=model_id.partition('/')[2],
+                **(model_kwargs or {})       # temperature, top_p, max_tokens 등
+            )
+
+        if len(base_urls) == 1:
+            self.model = build(base_urls[0])
+        else:
+            self.model = EndpointPool.from_endpoints(base_urls, build, health_url=lambda url: server_url(url) + "/health")
+        self.client = VLLMClient(self.model, base_urls, max_in_flight=max_in_flight * len(base_urls))
+
+    def construct_prompt(self, *args, **kwargs) -> list:
+        messages = super().construct_prompt(*args, **kwargs)
+        if self.image_first and not isinstance(messages[-1].content, str):
+            # Stable sort: image parts move ahead of the text, in their original order
+            messages[-1].content = sorted(messages[-1].content, key=lambda part: part.get("type") == "text")
+        return messages
+
+    @property
+    def prompt_key(self) -> tuple:
+        return (*super().prompt_key, self.image_first)
+
+    def batch_client(self) -> VLLMClient:
+        return self.client
+
+    @property
+    def throughput(self) -> Dict[str, float]:
+        """Server-side (else client-side) throughput of the last job run through `run_batch`."""
+        return self.client.throughput
 
 
 
-__all__ = ["VLLMOpenAIAPI"]
\ No newline at end of file
+__all__ = ["ServerMetrics", "VLLMClient", "VLLMOpenAIAPI", "prefix_order", "server_url"]
@@ -1,5 +1,7 @@
 from models import APIBase
 from langchain.chat_models import init_chat_model
+from utils.llm import get_language_model
+from utils.ratelimit import get_rate_limiter
 
 
 
@@ -7,13 +9,35 @@ class GPUFreeAPI(APIBase):
     """
     Standard API class for initializing and managing chat models.
     Inherits from APIBase and provides additional functionality.
+
+    Requests are rate limited with the RPM/TPM quota configured for the model in `llms`;
+    `rpm` and `tpm` override it (e.g., for a higher usage tier). Images follow the model's
+    catalog `image_policy`, updated with the `image_policy` overrides. Models missing from the
+    catalog run without a rate limit (unless `rpm`/`tpm` are given) and with the default policy.
     """
     
-    def __init__(self, model_id: str, **kwargs):
-        super().__init__(**kwargs)
+    def __init__(self, model_id: str, rpm: int | None = None, tpm: int | None = None, image_policy: dict | None = None, **kwargs):
+        provider, name = model_id.split("/", 1)
+        try:
+            language_model = get_language_model(name)
+        except ValueError:
+            language_model = None
+
+        # Catalog image policy, with per-run overrides (e.g., {"format": "webp", "detail": "low"})
+        policy = language_model.image_policy.model_dump() if language_model and language_model.image_policy else {}
+        policy.update(image_policy or {})
+
+        super().__init__(image_policy=policy, **kwargs)
         self.model_id = model_id
         self._model = init_chat_model(model_id.replace("/", ":"))
 
+        rate_limit = language_model.rate_limit if language_model else None
+        self.rate_limiter = get_rate_limiter(
+            provider, name,
+            rpm=rpm or (rate_limit.rpm if rate_limit else None),
+            tpm=tpm or (rate_limit.tpm if rate_limit else None)
+        )
+
 
 
 __all__ = ["GPUFreeAPI"]
\ No newline at end of file
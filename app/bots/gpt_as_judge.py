@@ -1,11 +1,23 @@
+import asyncio, os
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
 from langchain.chat_models import init_chat_model
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from pydantic import BaseModel, Field
 
-from models.prompt import PromptManager
+from models.invoker import get_invoker
+from models.prompt import get_prompt_registry
+from utils.cache import get_response_cache, ResponseCache
+from utils.llm import get_language_model
 from utils.logs import set_logger
+from utils.ratelimit import get_rate_limiter
+
 
+load_dotenv()
+JUDGE_MODEL = os.getenv("JUDGE_MODEL", "openai/gpt-4.1")
+JUDGE_CACHE_PATH = os.getenv("JUDGE_CACHE_PATH", os.path.join(os.getenv("DS_CACHE_PATH", ".cache"), "judge.sqlite"))
+JUDGE_CONCURRENCY = int(os.getenv("JUDGE_CONCURRENCY", 8))
 
 logger = set_logger(__name__)
 
@@ -17,7 +29,121 @@ class JudgeResponse(BaseModel):
 
 
 
-def check_label(query: str, answer: str) -> str:
+class Judge:
+    """
+    Long-lived LLM judge that maps free-form answers to an option label.
+
+    The chat client is created once on first use and every verdict is stored in a
+    persistent cache keyed by the judge model, prompt version and (query, answer), so
+    reruns never ask the same question twice. `judge_many` resolves a whole subset of
+    unparseable answers concurrently.
+    """
+    def __init__(self,
+        model_id: str = JUDGE_MODEL,
+        cache: bool = True,
+        cache_path: str = JUDGE_CACHE_PATH,
+        concurrency: int = JUDGE_CONCURRENCY,
+        max_retries: int = 3,
+        max_timeout: int = 60
+    ):
+        self.model_id = model_id
+        self.prompt = get_prompt_registry().get("check-label", locale="en").validate(["query", "answer"])
+        self.cache: Optional[ResponseCache] = get_response_cache(cache_path) if cache else None
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.max_timeout = max_timeout
+        self.invoker = get_invoker()
+        self._model = None
+
+        # Share the quota of the model's catalog entry (and limiter) with evaluation runs
+        provider, name = model_id.split("/", 1)
+        try:
+            rate_limit = get_language_model(name).rate_limit
+        except ValueError:
+            rate_limit = None
+        self.rate_limiter = get_rate_limiter(provider, name, rpm=rate_limit.rpm, tpm=rate_limit.tpm) if rate_limit else None
+
+    @property
+    def model(self):
+        """Structured-output chat client, shared by every judgment."""
+        if self._model is None:
+            self._model = init_chat_model(self.model_id.replace("/", ":")).with_structured_output(JudgeResponse)
+        return self._model
+
+    def messages(self, query: str, answer: str) -> list:
+        return [
+            SystemMessage(content=self.prompt.system),
+            HumanMessage(content=self.prompt.format(query=query, answer=answer))
+        ]
+
+    async def ajudge(self, query: str, answer: str) -> JudgeResponse:
+        """
+        Judge one answer.
+
+        Args:
+            query (str): The question text containing multiple-choice options.
+            answer (str): The assistant's answer text.
+
+        Returns:
+            JudgeResponse: The determined label (A, B, C, D or "Unknown") and the reason.
+        """
+        messages = self.messages(query, answer)
+        key = ResponseCache.make_key(self.model_id, self.prompt.version, messages) if self.cache else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return JudgeResponse.model_validate_json(cached.content)
+
+        invocation = await self.invoker.ainvoke(self.model, messages, self.max_retries, self.max_timeout, self.rate_limiter)
+        response: JudgeResponse = invocation.response
+        logger.debug("Judge Response: %s", response)
+        if key is not None:
+            self.cache.set(key, AIMessage(content=response.model_dump_json()))
+        return response
+
+    async def ajudge_many(self, items: List[Tuple[str, str]]) -> List[JudgeResponse]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _judge(query: str, answer: str) -> JudgeResponse:
+            async with semaphore:
+                return await self.ajudge(query, answer)
+
+        return await asyncio.gather(*(_judge(query, answer) for query, answer in items))
+
+    def judge(self, query: str, answer: str) -> JudgeResponse:
+        """Blocking counterpart of `ajudge`."""
+        return self.invoker.run(self.ajudge(query, answer))
+
+    def judge_many(self, items: List[Tuple[str, str]]) -> List[JudgeResponse]:
+        """
+        Judge several (query, answer) pairs concurrently.
+
+        Args:
+            items (list[tuple[str, str]]): Pairs to judge.
+
+        Returns:
+            list[JudgeResponse]: Verdicts in input order.
+        """
+        if not items:
+            return []
+        responses = self.invoker.run(self.ajudge_many(items))
+        if self.cache:
+            self.cache.log_stats(prefix="Judge: ")
+        return responses
+
+
+_JUDGE: Optional[Judge] = None
+
+
+def get_judge() -> Judge:
+    """Return the process-wide judge."""
+    global _JUDGE
+    if _JUDGE is None:
+        _JUDGE = Judge()
+    return _JUDGE
+
+
+def check_label(query: str, answer: str) -> JudgeResponse:
     """
     Check the label of the answer based on the provided query and answer text.
 
@@ -26,23 +152,9 @@ def check_label(query: str, answer: str) -> str:
         answer (str): The assistant's answer text.
 
     Returns:
-        str: The determined label (A, B, C, D) or "Unknown" if no match is found.
+        JudgeResponse: The determined label (A, B, C, D) or "Unknown" if no match is found.
     """
-    assistant = init_chat_model("openai:gpt-4.1").with_structured_output(JudgeResponse)
-    prompt_temp = PromptManager("check-label", locale="en")
-    prompt = ChatPromptTemplate([
-        SystemMessage(content=prompt_temp.system),
-        HumanMessage(content=prompt_temp.human)  # .format(query="{query}", answer="{answer}"))
-    ])
-    chain = prompt | assistant
-
-    logger.debug(f"{prompt = }")
-    logger.debug(f"{query = }")
-    logger.debug(f"{answer = }")
-    
-    response = chain.invoke({"query": query, "answer": answer})
-    logger.debug(f"Judge Response: {response}")
-    return response
-
-
-__all__ = ["check_label"]
\ No newline at end of file
+    return get_judge().judge(query=query, answer=answer)
+
+
+__all__ = ["Judge", "JudgeResponse", "check_label", "get_judge"]
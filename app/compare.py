@@ -0,0 +1,211 @@
+"""Bootstrap confidence intervals and paired significance tests between models"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.data import load_json, save_json
+from utils.logs import set_logger
+from utils.scoring import confidence_interval, factorize, mcnemar_test, paired_permutation_test, stratified_bootstrap
+from utils.store import RESULTS_STORE_PATH, get_results_store
+
+
+logger = set_logger(__name__)
+
+
+
+@dataclass
+class ItemMatrix:
+    """Item-level correctness of several models, one column per (split, subject, id)."""
+    models: List[str]
+    subjects: List[str]
+    correct: np.ndarray  # (n_models, n_items) 0/1
+    present: np.ndarray  # (n_models, n_items) 0/1, whether the model answered the item
+    strata: np.ndarray  # (n_items,) subject code per item
+
+    def accuracy(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.nan_to_num(self.correct.sum(axis=1) / self.present.sum(axis=1))
+
+
+def load_item_matrix(
+    prompt: str,
+    locale: str,
+    splits: Optional[Sequence[str]] = None,
+    models: Optional[Sequence[str]] = None,
+    output_path: Optional[str] = None,
+    store_path: str = RESULTS_STORE_PATH
+) -> ItemMatrix:
+    """
+    Collect item-level correctness of every model of a locale.
+
+    Runs found in the results store are read column-wise from it; subsets that predate the
+    store are read from their `evaluation.json`.
+
+    Args:
+        prompt (str): Prompt name (e.g., "mcqa").
+        locale (str): Locale (e.g., "en").
+        splits (Sequence[str] | None): Splits to include (default: all).
+        models (Sequence[str] | None): Models to include (default: all).
+        output_path (str | None): Root of the output folders (default: `OUTPUT_PATH`).
+        store_path (str): Root of the results store.
+
+    Returns:
+        ItemMatrix: Outcomes of the models over the union of their items.
+    """
+    equals = {"prompt": prompt, "locale": locale}
+    if splits is not None:
+        equals["split"] = list(splits)
+    if models is not None:
+        equals["model"] = list(models)
+    stored = get_results_store(store_path).read(columns=["model", "split", "subject", "id", "correct"], **equals)
+    columns = {name: stored[name].to_pylist() for name in ("model", "split", "subject", "id")}
+    correct = stored["correct"].to_numpy(zero_copy_only=False).astype(np.int8)
+
+    # Subsets evaluated before the store existed
+    stored_runs = set(zip(columns["model"], columns["split"], columns["subject"]))
+    locale_dir = os.path.join(output_path or os.getenv("OUTPUT_PATH", "outputs"), prompt, locale)
+    extra_correct = []
+    for model in sorted(os.listdir(locale_dir)) if os.path.isdir(locale_dir) else []:
+        if models is not None and model not in models:
+            continue
+        model_dir = os.path.join(locale_dir, model)
+        for split in sorted(os.listdir(model_dir)) if os.path.isdir(model_dir) else []:
+            if splits is not None and split not in splits:
+                continue
+            split_dir = os.path.join(model_dir, split)
+            for subject in sorted(os.listdir(split_dir)) if os.path.isdir(split_dir) else []:
+                path_ = os.path.join(split_dir, subject, "evaluation.json")
+                if (model, split, subject) in stored_runs or not os.path.isfile(path_):
+                    continue
+                for id_, judged in load_json(path_).items():
+                    for name, value in zip(("model", "split", "subject", "id"), (model, split, subject, id_)):
+                        columns[name].append(value)
+                    extra_correct.append(judged["judge"] == "Correct")
+    if extra_correct:
+        correct = np.concatenate([correct, np.asarray(extra_correct, dtype=np.int8)])
+
+    model_codes, model_vocab = factorize(columns["model"])
+    item_codes, item_vocab = factorize(zip(columns["split"], columns["subject"], columns["id"]))
+    shape = (len(model_vocab), len(item_vocab))
+    matrix = ItemMatrix(
+        models=list(model_vocab),
+        subjects=[subject for _, subject, _ in item_vocab],
+        correct=np.zeros(shape, dtype=np.int8),
+        present=np.zeros(shape, dtype=np.int8),
+        strata=factorize(subject for _, subject, _ in item_vocab)[0],
+    )
+    matrix.correct[model_codes, item_codes] = correct
+    matrix.present[model_codes, item_codes] = 1
+    return matrix
+
+
+def model_statistics(
+    matrix: ItemMatrix,
+    ranking: Sequence[str],
+    n_resamples: int = 10000,
+    alpha: float = 0.05,
+    seed: int = 0
+) -> Dict[str, dict]:
+    """
+    Confidence interval of every model and tests against the next model in `ranking`.
+
+    Intervals come from a bootstrap stratified by subject. Adjacent models are compared on
+    the items both of them answered, with a paired permutation test and an exact McNemar test.
+
+    Args:
+        matrix (ItemMatrix): Item-level outcomes.
+        ranking (Sequence[str]): Models from best to worst; models absent from `matrix` are skipped.
+        n_resamples (int): Bootstrap resamples and permutations.
+        alpha (float): 1 - confidence level of the intervals.
+        seed (int): Seed of the random generators.
+
+    Returns:
+        dict[str, dict]: model -> {'acc', 'ci_low', 'ci_high', 'num_example'} plus, except for
+            the last model, {'next', 'num_shared', 'p_permutation', 'p_mcnemar'}.
+    """
+    index = {model: i for i, model in enumerate(matrix.models)}
+    ranking = [model for model in ranking if model in index]
+    rows = [index[model] for model in ranking]
+    resampled = stratified_bootstrap(matrix.correct[rows], matrix.strata, matrix.present[rows], n_resamples=n_resamples, seed=seed)
+    low, high = confidence_interval(resampled, alpha=alpha)
+    acc = matrix.accuracy()[rows]
+
+    stats = {}
+    for i, model in enumerate(ranking):
+        stats[model] = {
+            'acc': float(acc[i]),
+            'ci_low': float(low[i]),
+            'ci_high': float(high[i]),
+            'num_example': int(matrix.present[rows[i]].sum()),
+        }
+        if i + 1 < len(ranking):
+            a, b = rows[i], rows[i + 1]
+            shared = (matrix.present[a] & matrix.present[b]).astype(bool)
+            stats[model].update({
+                'next': ranking[i + 1],
+                'num_shared': int(shared.sum()),
+                'p_permutation': float(paired_permutation_test(matrix.correct[a, shared], matrix.correct[b, shared], n_resamples=n_resamples, seed=seed)),
+                'p_mcnemar': mcnemar_test(matrix.correct[a, shared], matrix.correct[b, shared]),
+            })
+    return stats
+
+
+def compare(
+    split: Optional[str] = "dev",
+    prompt: str = "mcqa",
+    locale: str = "en",
+    models: Optional[List[str]] = None,
+    n_resamples: int = 10000,
+    alpha: float = 0.05,
+    seed: int = 0
+) -> dict:
+    """
+    Rank models by accuracy with bootstrap confidence intervals and paired tests between
+    adjacent ranks.
+
+    Args:
+        split (str | None): Split to compare on; None pools every split.
+        prompt (str): Prompt name.
+        locale (str): Locale.
+        models (list[str] | None): Models to compare (default: every model with results).
+        n_resamples (int): Bootstrap resamples and permutations.
+        alpha (float): 1 - confidence level of the intervals.
+        seed (int): Seed of the random generators.
+
+    Returns:
+        dict: Ranked models with their intervals and p-values against the next rank.
+    """
+    root_dir = os.getenv("OUTPUT_PATH", "outputs")
+    matrix = load_item_matrix(prompt, locale, splits=None if split is None else [split], models=models, output_path=root_dir)
+    ranking = [matrix.models[i] for i in np.argsort(-matrix.accuracy(), kind="stable")]
+    stats = model_statistics(matrix, ranking, n_resamples=n_resamples, alpha=alpha, seed=seed)
+
+    result = {
+        'prompt': prompt,
+        'locale': locale,
+        'split': split or "all",
+        'n_resamples': n_resamples,
+        'confidence': 1 - alpha,
+        'ranking': [{'rank': rank, 'model': model, **stats[model]} for rank, model in enumerate(ranking, start=1)],
+    }
+    for row in result['ranking']:
+        logger.info(
+            f"{row['rank']:>3}. {row['model']:<40} {row['acc'] * 100:6.2f}% "
+            f"[{row['ci_low'] * 100:6.2f}, {row['ci_high'] * 100:6.2f}] n={row['num_example']}"
+            + (f" | vs {row['next']}: p_perm={row['p_permutation']:.4f} p_mcnemar={row['p_mcnemar']:.4f}" if 'next' in row else "")
+        )
+    output_path = os.path.join(root_dir, prompt, locale)
+    os.makedirs(output_path, exist_ok=True)
+    save_json(os.path.join(output_path, f"compare_{split or 'all'}.json"), result)
+    return result
+
+
+__all__ = [
+    "ItemMatrix",
+    "compare",
+    "load_item_matrix",
+    "model_statistics"
+]
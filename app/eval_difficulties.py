@@ -1,7 +1,7 @@
 import os
 
 from schemas.kocem import LocaleType, SplitType, Subject, KoCEM
-from utils.data import load_json, save_json
+from utils.data import find_output_file, load_json, load_records, save_json
 from utils.eval import evaluate_difficulties
 from utils.logs import set_logger
 
@@ -40,11 +40,12 @@ def eval_difficulties(
             logger.debug(f"Subject: {subset}, Split: {split}")
             output_dir = os.path.join(OUTPUT_DIR, prompt, locale, model, split, subset)
             
-            samples = load_json(os.path.join(output_dir, "output.json"))
+            # output.json or output.jsonl.zst, whichever the run wrote
+            samples = load_records(find_output_file(output_dir) or os.path.join(output_dir, "output.json"))
             results = load_json(os.path.join(output_dir, "result.json"))
             results.update(evaluate_difficulties(samples))
 
-            save_json(results, os.path.join(output_dir, "result.json"))
+            save_json(os.path.join(output_dir, "result.json"), results)
             logger.debug(f"Saved evaluation results to {os.path.join(output_dir, 'result.json')}")
 
 
@@ -1,5 +1,7 @@
-import os, statistics
-from utils.data import load_json, save_json
+import os
+from utils.data import find_output_file, load_json, load_records, save_json
+from utils.scoring import ScoreTable
+from utils.store import get_results_store
 from schemas.kocem import KoCEM, Subject
 
 
@@ -12,54 +14,48 @@ def evaluate_total(
     root_dir = os.getenv("OUTPUT_PATH", "outputs")
     output_path = os.path.join(root_dir, prompt, locale, model, split)
 
-    pred_correct = 0
-    correct_list = []  # 정답 여부를 기록할 리스트
     # KoCEM 스키마를 기반으로 subject 폴더명 -> dimension 매핑 구성
     subject_to_dimension: dict[str, str] = {}
     for name, val in KoCEM.__dict__.items():
         if isinstance(val, Subject):
             subject_to_dimension[name] = val.dimension
 
-    # dimension 별 정답 통계 수집
-    dim_correct_lists: dict[str, list[int]] = {}
-
-    for folder in os.listdir(output_path):
+    # Results store에 있는 subject는 필요한 column만 읽고, store 이전에 평가된 subject는
+    # evaluation.json(또는 output 파일)을 읽어 모든 subject의 판정을 하나의 테이블로 모아 한 번에 집계
+    stored = get_results_store().read(columns=["subject", "correct"], prompt=prompt, locale=locale, model=model, split=split)
+    tables, folders = [], []
+    if stored.num_rows:
+        tables.append(ScoreTable.from_columns(stored["correct"].to_numpy(zero_copy_only=False), subject=stored["subject"].to_pylist()))
+        folders.extend(tables[0].vocabs["subject"])
+    stored_subjects = set(folders)
+    for folder in sorted(os.listdir(output_path)) if os.path.isdir(output_path) else []:
+        if folder in stored_subjects:
+            continue
         path_ = os.path.join(output_path, folder, "evaluation.json")
-        data = load_json(path_)
-        dim = subject_to_dimension.get(folder)
-        if dim and dim not in dim_correct_lists:
-            dim_correct_lists[dim] = []
-        for _, result in data.items():
-            if result['judge'] == 'Correct':
-                pred_correct += 1
-                correct_list.append(1)
-                if dim:
-                    dim_correct_lists[dim].append(1)
-            else:
-                correct_list.append(0)
-                if dim:
-                    dim_correct_lists[dim].append(0)
-    # dimension별 결과 집계
-    by_dimension = {}
-    for dim, lst in dim_correct_lists.items():
-        by_dimension[dim] = {
-            'acc': (sum(lst) / len(lst)) if len(lst) > 0 else 0,
-            'std_dev': statistics.stdev(lst) if len(lst) > 1 else 0,
-            'num_example': len(lst),
-        }
+        output_file = find_output_file(os.path.join(output_path, folder)) if os.path.isdir(os.path.join(output_path, folder)) else None
+        if os.path.isfile(path_):
+            samples = list(load_json(path_).values())
+        elif output_file:  # judged output records, in either output format
+            samples = load_records(output_file)
+        else:  # e.g., result_<model>_<split>.json of a previous call
+            continue
+        tables.append(ScoreTable.from_samples(samples, subject=folder))
+        folders.append(folder)
+    table = ScoreTable.concat(tables)
+    dimensions = list(dict.fromkeys(subject_to_dimension[folder] for folder in folders if folder in subject_to_dimension))
 
     result = {
         'model': model,
         'split': split,
-        'acc': pred_correct / len(correct_list) if len(correct_list) > 0 else 0,
-        'std_dev': statistics.stdev(correct_list) if len(correct_list) > 1 else 0,
-        'num_example': len(correct_list),
-        'by_dimension': by_dimension,
+        **table.summary(),
+        # dimension별 결과 집계
+        'by_dimension': table.by("subject", mapping=subject_to_dimension, labels=dimensions) if folders else {},
     }
+    os.makedirs(output_path, exist_ok=True)
     save_json(os.path.join(output_path, f"result_{model}_{split}.json"), result)
     return result
 
 
 __all__ = [
     "evaluate_total"
-]
\ No newline at end of file
+]
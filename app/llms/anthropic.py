@@ -3,7 +3,9 @@ from schemas import (
     ModelSize,
     ModelVersion,
     Modality,
-    Pricing
+    ImagePolicy,
+    Pricing,
+    RateLimit
 )
 from models import LLMBase
 
@@ -38,7 +40,9 @@ class Anthropic(LLMBase):
                 text_input=15.0,
                 text_cached_input=30.0,
                 text_output=75.0
-            )
+            ),
+            rate_limit=RateLimit(rpm=50, tpm=30_000),
+            image_policy=ImagePolicy(max_side=1568)
         ),
         LanguageModel(
             name="Claude Sonnet 4",
@@ -61,7 +65,9 @@ class Anthropic(LLMBase):
                 text_input=3.0,
                 text_cached_input=6.0,
                 text_output=15.0
-            )
+            ),
+            rate_limit=RateLimit(rpm=50, tpm=30_000),
+            image_policy=ImagePolicy(max_side=1568)
         )
     ]
 
@@ -3,7 +3,9 @@ from schemas import (
     ModelSize,
     ModelVersion,
     Modality,
-    Pricing
+    ImagePolicy,
+    Pricing,
+    RateLimit
 )
 from models import LLMBase
 
@@ -40,7 +42,9 @@ class GeminiFamily(LLMBase):
                 text_input="unknown",
                 text_cached_input="unknown",
                 text_output="unknown"
-            )
+            ),
+            rate_limit=RateLimit(rpm=150, tpm=2_000_000),
+            image_policy=ImagePolicy(max_side=3072)
         ),
         LanguageModel(
             name="Gemini 2.5 Flash",
@@ -66,7 +70,9 @@ class GeminiFamily(LLMBase):
                 text_input="unknown",
                 text_cached_input="unknown",
                 text_output="unknown"
-            )
+            ),
+            rate_limit=RateLimit(rpm=1_000, tpm=1_000_000),
+            image_policy=ImagePolicy(max_side=3072)
         ),
         LanguageModel(
             name="Gemini 2.5 Flash-Lite",
@@ -92,7 +98,9 @@ class GeminiFamily(LLMBase):
                 text_input="unknown",
                 text_cached_input="unknown",
                 text_output="unknown"
-            )
+            ),
+            rate_limit=RateLimit(rpm=4_000, tpm=4_000_000),
+            image_policy=ImagePolicy(max_side=3072)
         )
     ]
 
@@ -3,7 +3,9 @@ from schemas import (
     ModelSize,
     ModelVersion,
     Modality,
-    Pricing
+    ImagePolicy,
+    Pricing,
+    RateLimit
 )
 from models import LLMBase
 
@@ -40,7 +42,9 @@ class OpenAI(LLMBase):
                 text_input=1.25,
                 text_cached_input=0.25,
                 text_output=10.00
-            )
+            ),
+            rate_limit=RateLimit(rpm=500, tpm=500_000),
+            image_policy=ImagePolicy(max_side=2048)
         ),
         LanguageModel(
             name="GPT-5 mini",
@@ -65,7 +69,9 @@ class OpenAI(LLMBase):
                 text_input=0.25,
                 text_cached_input=0.0025,
                 text_output=2.00
-            )
+            ),
+            rate_limit=RateLimit(rpm=500, tpm=500_000),
+            image_policy=ImagePolicy(max_side=2048)
         ),
         LanguageModel(
             name="GPT-5 nano",
@@ -90,7 +96,9 @@ class OpenAI(LLMBase):
                 text_input=0.05,
                 text_cached_input=0.005,
                 text_output=0.40
-            )
+            ),
+            rate_limit=RateLimit(rpm=500, tpm=200_000),
+            image_policy=ImagePolicy(max_side=2048)
         ),
         LanguageModel(
             name="GPT-4.1",
@@ -115,7 +123,9 @@ class OpenAI(LLMBase):
                 text_input=0.50,
                 text_cached_input=0.05,
                 text_output=4.00
-            )
+            ),
+            rate_limit=RateLimit(rpm=500, tpm=30_000),
+            image_policy=ImagePolicy(max_side=2048)
         ),
         LanguageModel(
             name="gpt-oss-120b",
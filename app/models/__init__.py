@@ -1,3 +1,4 @@
-from .api import APIBase
+from .api import APIBase, load_split
 from .llm import LLMBase
-from .prompt import PromptManager
\ No newline at end of file
+from .prompt import Prompt, PromptManager, PromptRegistry, get_prompt_registry
+from .scheduler import Scheduler, SubsetJob
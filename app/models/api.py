@@ -1,43 +1,98 @@
-import base64, os, json, time
-from typing import List, Union
+import asyncio, os, json
+from dataclasses import asdict
+from typing import List, Literal, Union
 
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from datasets import load_dataset
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.runnables import Runnable
-from tqdm import tqdm
 
 from schemas.kocem import LocaleType
-from utils.data import save_json
+from schemas.llm import ImagePolicy
+from utils.cache import ResponseCache, get_response_cache
+from utils.checkpoint import Checkpoint
+from utils.data import FULL_RESPONSE_MODES, OUTPUT_FILES, save_json, save_records, slim_response
 from utils.ds import call_features
-from utils.eval import evaluate, evaluate_difficulties, parse_multi_choice_response, parse_open_response
-from utils.logs import set_logger
-
+from utils.image import EncodedImage, encode_image
+from utils.snapshot import get_snapshot
+from utils.store import get_results_store
+from utils.eval import MultiChoiceExtractor, build_judge_query, evaluate, evaluate_difficulties, parse_multi_choice_response, parse_open_response
+from utils.logs import per_sample, set_logger
+
+from .batch import get_batch_client, run_batches
+from .invoker import Invocation, get_invoker
 from .prompt import PromptManager
+from .scheduler import Scheduler, SubsetJob
 
 
 logger = set_logger(__name__)
 
 DS_PATH = os.getenv("DS_PATH")
 DS_CACHE_PATH = os.getenv("DS_CACHE_PATH")
+DS_SNAPSHOT_PATH = os.getenv("DS_SNAPSHOT_PATH")
 OUTPUT_PATH = os.getenv("OUTPUT_PATH")
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "json")
+OUTPUT_FULL_RESPONSE = os.getenv("OUTPUT_FULL_RESPONSE", "full")
+
+
+def load_split(subset: str, split: str, use_snapshot: bool = True):
+    """
+    Load one (subset, split) of the KoCEM dataset.
+
+    Splits are read from the packed snapshot at `DS_SNAPSHOT_PATH` (see `kocem pack`) when
+    it exists and contains them; otherwise they are loaded from the Hugging Face Hub.
+    """
+    if use_snapshot and DS_SNAPSHOT_PATH and os.path.exists(DS_SNAPSHOT_PATH):
+        snapshot = get_snapshot(DS_SNAPSHOT_PATH)
+        if (subset, split) in snapshot:
+            return snapshot.load(subset, split)
+        logger.warning(f"{subset} - {split} is not in snapshot {DS_SNAPSHOT_PATH}; loading it from {DS_PATH}.")
+    return load_dataset(
+        path=DS_PATH, 
+        name=subset, 
+        split=split, 
+        cache_dir=DS_CACHE_PATH,
+        verification_mode="no_checks",
+        features=call_features(subset),
+    )
 
 
 
 class APIBase:
+    # Whether jobs always run through `run_batch` (e.g., local models that generate in batches)
+    batched: bool = False
+    # Whether the backend can score options by log-likelihood (task "mcqa-loglik")
+    scores_options: bool = False
+
     def __init__(self, 
         locale: LocaleType = "en",
         task: str = "mcqa",
         prompt: str = "mcqa",
-        prompt_version: str = "latest"
+        prompt_version: str = "latest",
+        cache: bool = True,
+        image_policy: ImagePolicy | dict | None = None,
+        output_format: Literal["json", "jsonl.zst"] = OUTPUT_FORMAT,
+        full_response: Literal["full", "slim", "drop"] = OUTPUT_FULL_RESPONSE
     ):
+        if output_format not in OUTPUT_FILES:
+            raise ValueError(f"Unknown output format '{output_format}'; expected one of {list(OUTPUT_FILES)}.")
+        if full_response not in FULL_RESPONSE_MODES:
+            raise ValueError(f"Unknown full_response mode '{full_response}'; expected one of {list(FULL_RESPONSE_MODES)}.")
+        if task == "mcqa-loglik" and not self.scores_options:
+            raise ValueError(f"Task '{task}' needs a local backend that scores options, e.g., `--backend transformers`.")
         self.locale = locale
         self.task = task
         self.prompt_name = prompt
-        self.prompt = PromptManager(name=prompt, locale=locale, version=prompt_version)
+        # Served from the shared prompt registry; placeholders are checked once, not per sample
+        self.prompt = PromptManager(name=prompt, locale=locale, version=prompt_version).validate(["question", "options"])
+        self.cache = get_response_cache() if cache else None
+        self.invoker = get_invoker()
+        self.rate_limiter = None
+        self.image_policy = ImagePolicy(**image_policy) if isinstance(image_policy, dict) else (image_policy or ImagePolicy())
+        self.output_format = output_format
+        self.full_response = full_response
     
-    def _set_options(self, sample):
-        if self.subset == "Standard_Nomenclature":
+    def _set_options(self, sample, subset: str):
+        if subset == "Standard_Nomenclature":
             options_raw = sample['options']
         else:
             options_raw = sample['{}_options'.format(self.locale)]
@@ -60,17 +115,17 @@ class APIBase:
         else:
             raise ValueError("Image data must be a dict or JSON string.")
 
-    def _construct_mcqa_data(self, sample) -> dict:
-        if self.subset == "Standard_Nomenclature":
+    def _construct_mcqa_data(self, sample, subset: str) -> dict:
+        if subset == "Standard_Nomenclature":
             question = sample['question']
-            options = self._set_options(sample)
+            options = self._set_options(sample, subset)
             answer = sample['answer']
             answer_key = sample['answer_key']
             explanation = sample.get('explanation', '')
             image_path, image_bytes = self._set_image(sample)
         else:
             question = sample['{}_question'.format(self.locale)]
-            options = self._set_options(sample)
+            options = self._set_options(sample, subset)
             answer = sample['{}_answer'.format(self.locale)]
             answer_key = sample['answer_key']
             explanation = sample['{}_explanation'.format(self.locale)]
@@ -91,38 +146,63 @@ class APIBase:
             "image_bytes": image_bytes
         }
     
-    def construct_data(self, sample: dict) -> dict:
+    def construct_data(self, sample: dict, subset: str) -> dict:
         """
         Construct data for the model from a sample.
         
         Args:
             sample (dict): A single sample from the dataset.
+            subset (str): The subset the sample belongs to.
         
         Returns:
             dict: Processed data ready for model inference.
         """
-        if self.task == "mcqa":
-            return self._construct_mcqa_data(sample)
-        raise NotImplementedError(f"Task {self.prompt.task} is not implemented in APIBase.")
+        if self.task in ("mcqa", "mcqa-loglik"):
+            return self._construct_mcqa_data(sample, subset)
+        raise NotImplementedError(f"Task {self.task} is not implemented in APIBase.")
 
-    def construct_prompt(self,
-            question, 
-            options, 
-            image_bytes=None
-        ) -> List[Union[SystemMessage, HumanMessage]]:
-        # Build textual portion
-        text_prompt = self.prompt.human.format(
+    def format_prompt(self, question, options) -> str:
+        """Text of the user prompt for a question and its options."""
+        return self.prompt.format(
             question=question,
             options="\n".join(f"({key}) {value}" for key, value in options.items())
         )
-        logger.debug(f"Prompt: {text_prompt}")
 
-        if image_bytes and image_bytes != "null":
-            b64 = base64.b64encode(image_bytes).decode()
+    def encode_image(self, image_bytes) -> EncodedImage | None:
+        """
+        Downscale/re-encode raw image bytes according to `image_policy`.
+
+        Returns:
+            EncodedImage | None: The encoded image, or None if the sample has no image.
+        """
+        if not image_bytes or image_bytes == "null":
+            return None
+        return encode_image(image_bytes, self.image_policy)
+
+    def construct_prompt(self,
+            question, 
+            options, 
+            image_bytes=None,
+            image: EncodedImage | None = None,
+            sample_id=None,
+            text_prompt: str | None = None
+        ) -> List[Union[SystemMessage, HumanMessage]]:
+        # Build textual portion (unless already formatted with the same prompt)
+        if text_prompt is None:
+            text_prompt = self.format_prompt(question, options)
+        logger.debug("Prompt: %s", text_prompt, extra=per_sample(sample_id))
+
+        if image is None:
+            image = self.encode_image(image_bytes)
+
+        if image is not None:
+            image_url = {"url": image.data_url}
+            if self.image_policy.detail:
+                image_url["detail"] = self.image_policy.detail
             # OpenAI-compatible multi-modal content structure
             content = [
                 {"type": "text", "text": text_prompt},
-                {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{b64}"}},
+                {"type": "image_url", "image_url": image_url},
             ]
         else:
             content = text_prompt
@@ -205,145 +285,367 @@ class APIBase:
         Returns:
             dict: Parsed response with the model's answer.
         """
-        if handler['question_type'] == 'multiple-choice':
+        if self.task == "mcqa-loglik":
+            # The answer is the best-scored option label itself
+            return handler["model_answer"] or None
+        elif handler['question_type'] == 'multiple-choice':
+            # Unparseable answers stay None here and are judged together in `finalize_job`
             return parse_multi_choice_response(
                 handler["model_answer"],
                 handler["question"],
                 handler["options"].keys(),
-                handler["options"]
+                handler["options"],
+                use_judge=False
             )
         elif self.task == "open_response":
             return parse_open_response(handler["model_answer"])
         else:
             raise NotImplementedError(f"Task {self.task} is not implemented in APIBase.")
 
-    def __call__(self,
+    def _prepare_sample(self, sample: dict, subset: str, shared: dict | None = None) -> tuple[dict, list]:
+        """
+        Build the handler record and prompt messages for a single sample.
+
+        Args:
+            sample (dict): A single sample from the dataset.
+            subset (str): The subset the sample belongs to.
+            shared (dict | None): Pieces of the same sample already built by other clients,
+                filled in by this call: the handler data per (locale, task), the prompt text
+                per prompt and the encoded image per image policy.
+
+        Returns:
+            tuple[dict, list]: The handler (without image bytes) and the prompt messages.
+        """
+        shared = {} if shared is None else shared
+        data_key = ("data", self.locale, self.task)
+        if data_key not in shared:
+            shared[data_key] = self.construct_data(sample, subset)
+        handler = dict(shared[data_key])
+        logger.debug("Sample ID: %s", handler['id'], extra=per_sample(handler['id']))
+
+        image_bytes = handler.pop('image_bytes', None)
+        image_key = ("image", self.image_policy)
+        if image_key not in shared:
+            shared[image_key] = self.encode_image(image_bytes)
+        image = shared[image_key]
+        if image is not None:
+            handler["image_mime"] = image.mime
+            handler["image_bytes_saved"] = image.saved_bytes
+
+        text_key = ("text", self.locale, self.prompt_name, self.prompt.version)
+        if text_key not in shared:
+            shared[text_key] = self.format_prompt(handler['question'], handler['options'])
+        prompt_msgs = self.construct_prompt(
+            question=handler['question'],
+            options=handler['options'],
+            image=image,
+            sample_id=handler['id'],
+            text_prompt=shared[text_key]
+        )
+        return handler, prompt_msgs
+
+    def _complete_sample(self, handler: dict, response) -> dict:
+        """
+        Attach the model response and the parsed prediction to a handler.
+
+        Args:
+            handler (dict): The handler built by `_prepare_sample`.
+            response: The raw model response.
+
+        Returns:
+            dict: The updated handler.
+        """
+        answer = str(getattr(response, "content", str(response))).strip()
+        logger.debug("Model response: %s", answer, extra=per_sample(handler.get('id')))
+
+        handler['model_answer'] = answer
+        handler["parsed_pred"] = self._parse_response(handler)
+        handler["latency"] = getattr(response, "response_metadata", {}).get("latency")
+        full_response = slim_response(getattr(response, 'dict', lambda: str(response))(), self.full_response)
+        if full_response is not None:
+            handler["full_response"] = full_response
+        return handler
+
+    @property
+    def result_name(self) -> str:
+        """Model name of the output folder and results store; scored runs are kept apart from generated ones."""
+        name = self.model_id.split('/')[-1]
+        return f"{name}-loglik" if self.task == "mcqa-loglik" else name
+
+    @property
+    def prompt_key(self) -> tuple:
+        """Everything that determines the prompt built for a sample; equal keys share prompts."""
+        return (self.locale, self.task, self.prompt_name, self.prompt.version, self.image_policy)
+
+    async def _arun_prepared(self, job: SubsetJob, handler: dict, prompt_msgs: list, max_retries: int, max_timeout: int) -> dict:
+        """
+        Invoke the model on an already prepared sample and checkpoint the result.
+        Prepared samples can be shared by clients with the same `prompt_key`.
+        """
+        response = await self._ainvoke_cached(
+            prompt_msgs=prompt_msgs,
+            max_retries=max_retries,
+            max_timeout=max_timeout,
+            refresh=job.refresh_cache
+        )
+        handler = self._complete_sample(handler, response)
+        # fsync blocks; run it off the shared loop like the other disk I/O
+        await asyncio.to_thread(job.checkpoint.append, handler)
+        return handler
+
+    def batch_client(self):
+        """The client `run_batch` submits prompts to: by default, the provider's batch API."""
+        return get_batch_client(self.model_id.partition('/')[0])
+
+    def run_batch(self, job: SubsetJob, max_retries: int = 5, max_timeout: int = 60, concurrency: int = 1) -> dict[str, str]:
+        """
+        Run a job through the provider's batch API and finalize it.
+        Requests the batch could not answer are retried online, `concurrency` at a time.
+        Several jobs are best run together with `run_batches`, which polls their batches at once.
+
+        Returns:
+            dict[str, str]: Paths to the output file and result file.
+        """
+        return run_batches([job], max_retries, max_timeout, concurrency)[0]
+
+    def _prepare_batch(self, job: SubsetJob) -> tuple[list, dict, dict]:
+        """
+        Prepare the pending samples of a job for `run_batches`.
+
+        Returns:
+            tuple[list, dict, dict]: (handler, prompt) pairs, responses served from the cache
+            and the prompts left to submit, both keyed by sample id.
+        """
+        prepared = [self._prepare_sample(job.dataset[index], job.subset) for index in job.pending]
+        responses = {}
+        if self.cache and not job.refresh_cache:
+            for handler, prompt_msgs in prepared:
+                cached = self.cache.get(self._cache_key(prompt_msgs))
+                if cached is not None:
+                    responses[handler['id']] = cached
+        prompts = {handler['id']: prompt_msgs for handler, prompt_msgs in prepared if handler['id'] not in responses}
+        return prepared, responses, prompts
+
+    def _complete_batch(self, job: SubsetJob, prepared: list, responses: dict, prompts: dict, submitted: dict) -> int:
+        """
+        Cache the batch responses and checkpoint every answered sample.
+
+        Returns:
+            int: Number of samples left unanswered.
+        """
+        if self.cache:
+            for sample_id, response in submitted.items():
+                self.cache.set(self._cache_key(prompts[sample_id]), response)
+        responses = {**responses, **submitted}
+        for handler, _ in prepared:
+            if handler['id'] in responses:
+                job.checkpoint.append(self._complete_sample(handler, responses[handler['id']]))
+        return len(prepared) - len(responses)
+
+    def output_files(self, subset: str, split: str) -> dict[str, str]:
+        """
+        Get the output file paths of a subset.
+
+        Args:
+            subset (str): The name of the dataset subset.
+            split (str): The dataset split.
+
+        Returns:
+            dict[str, str]: Paths to the evaluation, output and result files.
+        """
+        output_dir = os.path.join(OUTPUT_PATH, self.prompt_name, self.locale, self.result_name, split, subset)
+        return {
+            "evaluation": os.path.join(output_dir, "evaluation.json"), 
+            "output": os.path.join(output_dir, OUTPUT_FILES[self.output_format]), 
+            "result": os.path.join(output_dir, "result.json")
+        }
+
+    def open_job(self,
         subset: str,
         split: str,
-        max_retries: int = 5,
-        max_timeout: int = 60,
+        override: bool = False,
         calculate_difficulty: bool = False,
-        override: bool = False
-    ) -> dict[str, str]:
+        dataset=None
+    ) -> SubsetJob | None:
         """
-        Run MCQA inference over configured splits/subsets.
+        Load a subset and its checkpoint into a job.
 
         Args:
             subset (str): The name of the dataset subset to process.
-            split (str): The dataset split to process (e.g., 'train', 'dev', 'test').
-            max_retries (int): Maximum number of retries for model invocation.
-            max_timeout (int): Maximum timeout in seconds for each model invocation.
+            split (str): The dataset split to process (e.g., 'dev', 'test').
+            override (bool): Re-run the subset even if its result files already exist, asking
+                the model again instead of reusing cached responses.
+            calculate_difficulty (bool): Add difficulty-wise metrics to the result file.
+            dataset: An already loaded split to reuse (e.g., shared by several models).
 
         Returns:
-            dict[str, str]: Paths to the output file and result file.
+            SubsetJob | None: The job, or None if the subset is already finished.
         """
-        # Load dataset split
-        self.subset = subset
-        self.split = split
-
-        # Prepare output directory and save results
-        output_dir = os.path.join(OUTPUT_PATH, self.prompt_name, self.locale, self.model_id.split('/')[-1], split, subset)
-        os.makedirs(output_dir, exist_ok=True)
-        output_file = os.path.join(output_dir, "output.json")
-        result_file = os.path.join(output_dir, "result.json")
-        evaluatation_file = os.path.join(output_dir, "evaluation.json")
-        if not override and os.path.exists(result_file) and os.path.exists(evaluatation_file):
+        files = self.output_files(subset, split)
+        os.makedirs(os.path.dirname(files["result"]), exist_ok=True)
+        if not override and os.path.exists(files["result"]) and os.path.exists(files["evaluation"]):
             logger.info(f"Skipping {subset} - {split} as result files already exist and override is False.")
-            return {
-                "evaluation": evaluatation_file, 
-                "output": output_file, 
-                "result": result_file
-            }
-
-        # dataset = self._load_dataset(subset, split)
-        dataset = load_dataset(
-            path=DS_PATH, 
-            name=subset, 
-            split=split, 
-            cache_dir=DS_CACHE_PATH,
-            verification_mode="no_checks",
-            features=call_features(subset),
+            return None
+
+        if dataset is None:
+            dataset = load_split(subset, split)
+
+        return SubsetJob(
+            api=self,
+            subset=subset,
+            split=split,
+            dataset=dataset,
+            # Finished samples are appended here as they complete; a rerun resumes from them
+            checkpoint=Checkpoint(os.path.join(os.path.dirname(files["result"]), "checkpoint.jsonl")),
+            files=files,
+            calculate_difficulty=calculate_difficulty,
+            refresh_cache=override
         )
 
-        results = []
-        for sample in tqdm(dataset, desc=f"Processing: {subset}/{split}"):
-            handler = self.construct_data(sample)
-            logger.debug(f"Sample ID: {handler['id']}")
-            image_bytes = handler.pop('image_bytes', None)
-            prompt_msgs = self.construct_prompt(
-                question=handler['question'],
-                options=handler['options'],
-                image_bytes=image_bytes
-            )
-            response = self._invoke_with_retry(
-                prompt_msgs=prompt_msgs, 
-                max_retries=max_retries, 
-                max_timeout=max_timeout
-            )
-            answer = str(getattr(response, "content", str(response))).strip()
-            logger.debug(f"Model response: {answer}")
-
-            handler['model_answer'] = answer
-            handler["parsed_pred"] = self._parse_response(handler)
-            handler["full_response"] = getattr(response, 'dict', lambda: str(response))()
-            
-            results.append(handler)
+    def _judge_unparsed(self, results: list[dict]) -> None:
+        """Label every multiple-choice answer the parser could not match with one concurrent judge pass."""
+        if self.task == "mcqa-loglik":
+            # Scored options always resolve to a label; a missing one means the sample failed
+            return
+        unparsed = [
+            result for result in results
+            if result["question_type"] == "multiple-choice" and result.get("parsed_pred") is None
+        ]
+        if not unparsed:
+            return
+
+        from bots.gpt_as_judge import get_judge
+        logger.info(f"Judging {len(unparsed)} unparseable answers.")
+        responses = get_judge().judge_many([
+            # Same answer text as `parse_multi_choice_response(use_judge=True)` sends
+            (build_judge_query(result["question"], result["options"]), MultiChoiceExtractor.normalize(result["model_answer"]))
+            for result in unparsed
+        ])
+        for result, response in zip(unparsed, responses):
+            result["parsed_pred"] = response.label
+
+    def finalize_job(self, job: SubsetJob) -> dict[str, str]:
+        """
+        Evaluate a finished job, write its output, evaluation and result files and
+        drop its checkpoint.
 
-        logger.debug(f"Saving temporal results to {output_file}")
-        save_json(output_file, results)
+        Args:
+            job (SubsetJob): A job whose samples are all checkpointed.
 
+        Returns:
+            dict[str, str]: Paths to the output file and result file.
+        """
+        results = job.results()
+        self._judge_unparsed(results)
         judge_dict, metric_dict = evaluate(results)
         for result in results:
             result.update({"judge": judge_dict[result['id']]["judge"]})
 
-        save_json(evaluatation_file, judge_dict)
-        logger.debug(f"Evaluation file saved at {evaluatation_file}.")
+        save_json(job.files["evaluation"], judge_dict)
+        logger.debug(f"Evaluation file saved at {job.files['evaluation']}.")
         
-        save_json(output_file, results)
-        logger.debug(f"Output file saved at {output_file}.")
+        save_records(job.files["output"], results)
+        logger.debug(f"Output file saved at {job.files['output']}.")
+
+        if job.calculate_difficulty:
+            metric_dict.update({"difficulties": evaluate_difficulties(results)})
+
+        save_json(job.files["result"], metric_dict)
+        logger.debug(f"Result file saved at {job.files['result']}.")
+
+        # One row per sample in the columnar store used by aggregations and the leaderboard
+        get_results_store().append(
+            results,
+            judge_dict,
+            prompt=self.prompt_name,
+            locale=self.locale,
+            model=self.result_name,
+            split=job.split,
+            subject=job.subset
+        )
+        job.checkpoint.remove()
 
-        if calculate_difficulty:
-            metric_dict.update({"difficulties": evaluate_difficulties(judge_dict)})
+        saved = sum(result.get("image_bytes_saved") or 0 for result in results)
+        if saved:
+            logger.info(f"{job.name}: image optimization saved {saved / 1024:.1f} KiB of upload.")
 
-        save_json(result_file, metric_dict)
-        logger.debug(f"Result file saved at {result_file}.")
-        
-        # Log and returns the output file path
-        return {
-            "evaluation": evaluatation_file, 
-            "output": output_file, 
-            "result": result_file
-        }
+        if self.cache:
+            self.cache.log_stats()
+        return job.files
+
+    def __call__(self,
+        subset: str,
+        split: str,
+        max_retries: int = 5,
+        max_timeout: int = 60,
+        calculate_difficulty: bool = False,
+        override: bool = False,
+        concurrency: int = 1,
+        mode: Literal["online", "batch"] = "online"
+    ) -> dict[str, str]:
+        """
+        Run MCQA inference over configured splits/subsets.
+
+        Args:
+            subset (str): The name of the dataset subset to process.
+            split (str): The dataset split to process (e.g., 'train', 'dev', 'test').
+            max_retries (int): Maximum number of retries for model invocation.
+            max_timeout (int): Maximum timeout in seconds for each model invocation.
+            concurrency (int): Maximum number of in-flight requests.
+            mode (str): "online" invokes the model per sample; "batch" submits the whole
+                subset as one provider batch job.
+
+        Returns:
+            dict[str, str]: Paths to the output file and result file.
+        """
+        job = self.open_job(subset, split, override=override, calculate_difficulty=calculate_difficulty)
+        if job is None:
+            return self.output_files(subset, split)
+
+        if mode == "batch":
+            return self.run_batch(job, max_retries, max_timeout, concurrency)
+
+        scheduler = Scheduler(concurrency=concurrency, max_retries=max_retries, max_timeout=max_timeout)
+        return scheduler.run([job])[0]
 
     # ---------------- Internal helpers -----------------
-    def _invoke_with_retry(self, prompt_msgs, max_retries: int, max_timeout: int):
-        """Invoke the model with retry and timeout logic.
+    def _cache_key(self, prompt_msgs) -> str:
+        params = getattr(self.model, "_identifying_params", None) or {}
+        return ResponseCache.make_key(self.model_id, self.prompt.version, prompt_msgs, params)
+
+    async def _ainvoke_cached(self, prompt_msgs, max_retries: int, max_timeout: int, refresh: bool = False):
+        """
+        Serve the response from the response cache, invoking the model on a miss (or always with `refresh`).
+        Hashing the prompt and the SQLite reads and writes run in worker threads, so they never
+        stall the requests in flight on the shared loop.
+        """
+        if not self.cache:
+            return await self._ainvoke_with_retry(prompt_msgs, max_retries, max_timeout)
+
+        key = await asyncio.to_thread(self._cache_key, prompt_msgs)
+        response = None if refresh else await asyncio.to_thread(self.cache.get, key)
+        if response is None:
+            response = await self._ainvoke_with_retry(prompt_msgs, max_retries, max_timeout)
+            await asyncio.to_thread(self.cache.set, key, response)
+        return response
+
+    def _record_invocation(self, invocation: Invocation):
+        """Attach latency details to the response so they survive caching."""
+        response = invocation.response
+        if isinstance(getattr(response, "response_metadata", None), dict):
+            response.response_metadata["latency"] = invocation.latency
+            response.response_metadata["attempts"] = [asdict(attempt) for attempt in invocation.attempts]
+        return response
+
+    async def _ainvoke_with_retry(self, prompt_msgs, max_retries: int, max_timeout: int):
+        """Invoke the model with retry and timeout logic through the shared invoker.
 
         Args:
             prompt_msgs: Messages to send to model.
             max_retries (int): Total attempts before failing.
             max_timeout (int): Per-attempt timeout in seconds (0 / negative disables).
         """
-
-        last_err = None
-        for attempt in range(1, max_retries + 1):
-            try:
-                if max_timeout and max_timeout > 0:
-                    with ThreadPoolExecutor(max_workers=1) as ex:
-                        fut = ex.submit(self.model.invoke, prompt_msgs)
-                        return fut.result(timeout=max_timeout)
-                else:
-                    return self.model.invoke(prompt_msgs)
-            except (FuturesTimeout, Exception) as e:  # broad catch to retry transient issues
-                last_err = e
-                if attempt == max_retries:
-                    logger.error(f"Model invoke failed after {attempt} attempts: {e}")
-                    raise
-                backoff = min(2 ** (attempt - 1), 10)
-                logger.warning(f"Invoke error (attempt {attempt}/{max_retries}): {e}. Retrying in {backoff}s...")
-                time.sleep(backoff)
-        # Should not reach here
-        raise last_err if last_err else RuntimeError("Unknown invocation failure")
+        return self._record_invocation(await self.invoker.ainvoke(self.model, prompt_msgs, max_retries, max_timeout, self.rate_limiter))
 
     @property
     def model_id(self):
@@ -387,4 +689,4 @@ class APIBase:
 
 
 
-__all__ = ["APIBase"]
\ No newline at end of file
+__all__ = ["APIBase", "load_split"]
\ No newline at end of file
@@ -0,0 +1,420 @@
+import os, json, time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from utils.logs import set_logger
+
+from .scheduler import Scheduler, SubsetJob
+
+
+load_dotenv()
+logger = set_logger(__name__)
+
+# Base URL of the batch endpoint; point it to a local stand-in server for testing.
+BATCH_ENDPOINT = os.getenv("BATCH_ENDPOINT")
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", 30))
+# Seconds to wait for a batch before cancelling it (0 waits indefinitely)
+BATCH_TIMEOUT = float(os.getenv("BATCH_TIMEOUT", 24 * 60 * 60))
+BATCH_MAX_TOKENS = int(os.getenv("BATCH_MAX_TOKENS", 1024))
+
+
+
+def _split_content(content: Union[str, list]) -> Tuple[List[str], List[str]]:
+    """Split a LangChain message content into text parts and image data URLs."""
+    if isinstance(content, str):
+        return [content], []
+    texts, images = [], []
+    for part in content:
+        if part.get("type") == "text":
+            texts.append(part["text"])
+        elif part.get("type") == "image_url":
+            image_url = part["image_url"]
+            images.append(image_url["url"] if isinstance(image_url, dict) else image_url)
+    return texts, images
+
+
+
+@dataclass
+class SubmittedBatch:
+    """A batch submitted by a `BatchClient`, awaiting its results."""
+    client: "BatchClient"
+    batch_id: str
+    size: int
+    submitted_at: float
+
+
+
+class BatchClient:
+    """
+    Base class for provider batch APIs.
+
+    A batch client packs every prompt of a subset into a single job file, submits it,
+    polls it until it finishes (or cancels it after `timeout` seconds) and maps the
+    responses back to their custom ids. `start` and `wait_batches` split these steps, so
+    the batches of many subsets can be submitted first and polled together.
+    """
+    provider: str = NotImplemented
+    terminal_statuses: tuple = ()
+    # Terminal statuses of a batch that ran to the end; the others are reported as errors
+    success_statuses: tuple = ()
+
+    def __init__(self,
+        base_url: str | None = BATCH_ENDPOINT,
+        poll_interval: float = BATCH_POLL_INTERVAL,
+        max_tokens: int = BATCH_MAX_TOKENS,
+        timeout: float = BATCH_TIMEOUT
+    ):
+        self.base_url = base_url
+        self.poll_interval = poll_interval
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+
+    def build_request(self, custom_id: str, model: str, messages: list) -> dict:
+        raise NotImplementedError
+
+    def submit(self, job_file: str, requests: List[dict]) -> str:
+        raise NotImplementedError
+
+    def status(self, batch_id: str) -> str:
+        raise NotImplementedError
+
+    def results(self, batch_id: str) -> Dict[str, AIMessage]:
+        raise NotImplementedError
+
+    def cancel(self, batch_id: str) -> None:
+        raise NotImplementedError
+
+    def start(self, job_file: str, model: str, prompts: Dict[str, list]) -> SubmittedBatch:
+        """
+        Write the job file of the prompts and submit it.
+
+        Args:
+            job_file (str): Path where the JSONL job file is written.
+            model (str): Provider model name (e.g., gpt-4.1).
+            prompts (dict[str, list]): Prompt messages keyed by sample id.
+
+        Returns:
+            SubmittedBatch: The batch to pass to `wait_batches`.
+        """
+        requests = [self.build_request(custom_id, model, msgs) for custom_id, msgs in prompts.items()]
+        with open(job_file, 'w', encoding='utf-8') as f:
+            for request in requests:
+                f.write(json.dumps(request, ensure_ascii=False) + '\n')
+        logger.info(f"Wrote {len(requests)} {self.provider} batch requests to {job_file}.")
+
+        batch_id = self.submit(job_file, requests)
+        logger.info(f"Submitted {self.provider} batch {batch_id}.")
+        return SubmittedBatch(self, batch_id, len(requests), time.monotonic())
+
+    def collect(self, batch: SubmittedBatch, status: str) -> Dict[str, AIMessage]:
+        """Responses of a batch that reached the terminal `status`."""
+        if status in self.success_statuses:
+            logger.info(f"Batch {batch.batch_id} finished with status '{status}'.")
+        else:
+            logger.error(f"Batch {batch.batch_id} ended with status '{status}'; only the requests it answered are used.")
+
+        responses = self.results(batch.batch_id)
+        missing = batch.size - len(responses)
+        if missing:
+            logger.warning(f"Batch {batch.batch_id} returned no usable response for {missing} request(s).")
+        return responses
+
+    def __call__(self, job_file: str, model: str, prompts: Dict[str, list]) -> Dict[str, AIMessage]:
+        """
+        Run a batch job end to end.
+
+        Args:
+            job_file (str): Path where the JSONL job file is written.
+            model (str): Provider model name (e.g., gpt-4.1).
+            prompts (dict[str, list]): Prompt messages keyed by sample id.
+
+        Returns:
+            dict[str, AIMessage]: Responses keyed by sample id. Failed requests are omitted.
+
+        Raises:
+            TimeoutError: If the batch did not finish within `timeout` seconds; it is cancelled.
+        """
+        for _, responses, error in wait_batches({job_file: self.start(job_file, model, prompts)}):
+            if error is not None:
+                raise error
+            return responses
+
+
+
+def wait_batches(batches: Dict[Any, SubmittedBatch]) -> Iterator[Tuple[Any, Dict[str, AIMessage], Optional[Exception]]]:
+    """
+    Poll submitted batches together until every one has ended.
+
+    Args:
+        batches (dict[Any, SubmittedBatch]): Submitted batches by key (e.g., their job).
+
+    Yields:
+        tuple: (key, responses keyed by sample id, error) as each batch ends. A batch still
+        running `timeout` seconds after its submission is cancelled and yields a TimeoutError.
+    """
+    pending = dict(batches)
+    while pending:
+        for key, batch in list(pending.items()):
+            client = batch.client
+            status = client.status(batch.batch_id)
+            if status in client.terminal_statuses:
+                del pending[key]
+                yield key, client.collect(batch, status), None
+            elif client.timeout and client.timeout > 0 and time.monotonic() - batch.submitted_at >= client.timeout:
+                del pending[key]
+                logger.error(f"Batch {batch.batch_id} did not finish within {client.timeout:.0f}s (status '{status}'); cancelling it.")
+                client.cancel(batch.batch_id)
+                yield key, {}, TimeoutError(f"{client.provider} batch {batch.batch_id} timed out after {client.timeout:.0f}s.")
+            else:
+                logger.debug(f"Batch {batch.batch_id} status: {status}")
+        if pending:
+            time.sleep(min(batch.client.poll_interval for batch in pending.values()))
+
+
+def run_batches(jobs: List[SubsetJob], max_retries: int = 5, max_timeout: int = 60, concurrency: int = 1) -> List[Dict[str, str]]:
+    """
+    Run jobs through the batch clients of their APIs and finalize them.
+
+    Every job's batch is submitted first; provider batches are then polled together and
+    each job is finalized as soon as its batch ends. Clients that answer directly (e.g.,
+    local or vLLM backends) are called one job at a time, with `max_retries` and
+    `max_timeout`. Samples a batch did not answer are run online by one `Scheduler`,
+    `concurrency` at a time.
+
+    Args:
+        jobs (list[SubsetJob]): Jobs to run.
+        max_retries (int): Attempts per sample of direct clients and of the online fallback.
+        max_timeout (int): Per-attempt timeout in seconds of direct clients and of the online fallback.
+        concurrency (int): Concurrent samples of the online fallback.
+
+    Returns:
+        list[dict[str, str]]: Output file paths of every job, in input order.
+
+    Raises:
+        RuntimeError: If any job failed (e.g., its batch timed out); answered samples stay checkpointed.
+    """
+    outputs: Dict[SubsetJob, Dict[str, str]] = {}
+    failed: Dict[SubsetJob, Exception] = {}
+    online: List[SubsetJob] = []
+    prepared: Dict[SubsetJob, tuple] = {}
+    submitted: Dict[SubsetJob, SubmittedBatch] = {}
+
+    def _finish(job: SubsetJob, answers: Dict[str, AIMessage]):
+        unanswered = job.api._complete_batch(job, *prepared.pop(job), answers)
+        if not unanswered:
+            outputs[job] = job.api.finalize_job(job)
+        else:
+            logger.warning(f"{job.name}: {unanswered} sample(s) were not answered by the batch; running them online ({concurrency} at a time).")
+            online.append(job)
+
+    for job in jobs:
+        samples, responses, prompts = job.api._prepare_batch(job)
+        prepared[job] = (samples, responses, prompts)
+        if not prompts:
+            _finish(job, {})
+            continue
+        client = job.api.batch_client()
+        job_file = os.path.join(job.output_dir, "batch_input.jsonl")
+        model_name = job.api.model_id.partition('/')[2]
+        if isinstance(client, BatchClient):
+            submitted[job] = client.start(job_file, model_name, prompts)
+        else:
+            _finish(job, client(job_file=job_file, model=model_name, prompts=prompts, max_retries=max_retries, max_timeout=max_timeout))
+
+    for job, answers, error in wait_batches(submitted):
+        if error is not None:
+            # Keep the responses served from the cache; the job is resumed by the next run
+            job.api._complete_batch(job, *prepared.pop(job), {})
+            failed[job] = error
+        else:
+            _finish(job, answers)
+
+    if online:
+        # The scheduler runs the samples missing from the checkpoints and finalizes their jobs
+        try:
+            outputs.update(zip(online, Scheduler(concurrency=concurrency, max_retries=max_retries, max_timeout=max_timeout).run(online)))
+        except RuntimeError as e:
+            if not failed:
+                raise
+            logger.error(f"Online fallback failed: {e}")
+
+    if failed:
+        names = ", ".join(f"{job.api.model_id} {job.name}" for job in failed)
+        raise RuntimeError(f"{len(failed)} batch job(s) failed: {names}") from next(iter(failed.values()))
+    return [outputs[job] for job in jobs]
+
+
+
+class OpenAIBatchClient(BatchClient):
+    """OpenAI Batch API client (`/v1/chat/completions` job files)."""
+    provider = "openai"
+    terminal_statuses = ("completed", "failed", "expired", "cancelled")
+    success_statuses = ("completed",)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        from openai import OpenAI
+        self.client = OpenAI(base_url=self.base_url) if self.base_url else OpenAI()
+
+    @staticmethod
+    def _convert_message(message: Union[SystemMessage, HumanMessage]) -> dict:
+        # LangChain's multi-modal content already follows the OpenAI chat format
+        role = "system" if isinstance(message, SystemMessage) else "user"
+        return {"role": role, "content": message.content}
+
+    def build_request(self, custom_id: str, model: str, messages: list) -> dict:
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": [self._convert_message(msg) for msg in messages]
+            }
+        }
+
+    def submit(self, job_file: str, requests: List[dict]) -> str:
+        with open(job_file, 'rb') as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def cancel(self, batch_id: str) -> None:
+        self.client.batches.cancel(batch_id)
+
+    def results(self, batch_id: str) -> Dict[str, AIMessage]:
+        batch = self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return {}
+
+        responses = {}
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                logger.warning(f"Batch request {entry.get('custom_id')} failed: {entry.get('error') or response}")
+                continue
+            body = response["body"]
+            usage = body.get("usage") or {}
+            responses[entry["custom_id"]] = AIMessage(
+                content=body["choices"][0]["message"].get("content") or "",
+                response_metadata=body,
+                usage_metadata={
+                    "input_tokens": usage.get("prompt_tokens", 0),
+                    "output_tokens": usage.get("completion_tokens", 0),
+                    "total_tokens": usage.get("total_tokens", 0)
+                }
+            )
+        return responses
+
+
+
+class AnthropicBatchClient(BatchClient):
+    """Anthropic Message Batches API client."""
+    provider = "anthropic"
+    terminal_statuses = ("ended",)
+    # Per-request errors, expirations and cancellations are reported by `results`
+    success_statuses = ("ended",)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        from anthropic import Anthropic
+        self.client = Anthropic(base_url=self.base_url) if self.base_url else Anthropic()
+
+    @staticmethod
+    def _convert_content(content: Union[str, list]) -> Union[str, list]:
+        if isinstance(content, str):
+            return content
+        texts, images = _split_content(content)
+        blocks = [{"type": "text", "text": text} for text in texts]
+        for url in images:
+            # data:<media_type>;base64,<data>
+            header, data = url.split(",", 1)
+            media_type = header[len("data:"):].split(";", 1)[0]
+            blocks.append({"type": "image", "source": {"type": "base64", "media_type": media_type, "data": data}})
+        return blocks
+
+    def build_request(self, custom_id: str, model: str, messages: list) -> dict:
+        system = "\n".join(
+            "\n".join(_split_content(msg.content)[0]) for msg in messages if isinstance(msg, SystemMessage)
+        )
+        params = {
+            "model": model,
+            "max_tokens": self.max_tokens,
+            "messages": [
+                {"role": "user", "content": self._convert_content(msg.content)}
+                for msg in messages if not isinstance(msg, SystemMessage)
+            ]
+        }
+        if system:
+            params["system"] = system
+        return {"custom_id": custom_id, "params": params}
+
+    def submit(self, job_file: str, requests: List[dict]) -> str:
+        return self.client.messages.batches.create(requests=requests).id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.messages.batches.retrieve(batch_id).processing_status
+
+    def cancel(self, batch_id: str) -> None:
+        self.client.messages.batches.cancel(batch_id)
+
+    def results(self, batch_id: str) -> Dict[str, AIMessage]:
+        responses = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type != "succeeded":
+                logger.warning(f"Batch request {entry.custom_id} ended with '{entry.result.type}'.")
+                continue
+            message = entry.result.message
+            responses[entry.custom_id] = AIMessage(
+                content="".join(block.text for block in message.content if block.type == "text"),
+                response_metadata=message.model_dump(),
+                usage_metadata={
+                    "input_tokens": message.usage.input_tokens,
+                    "output_tokens": message.usage.output_tokens,
+                    "total_tokens": message.usage.input_tokens + message.usage.output_tokens
+                }
+            )
+        return responses
+
+
+
+BATCH_CLIENTS = {
+    "openai": OpenAIBatchClient,
+    "anthropic": AnthropicBatchClient,
+}
+
+
+def get_batch_client(provider: str, **kwargs) -> BatchClient:
+    """
+    Get the batch client for a provider.
+
+    Args:
+        provider (str): Provider name (e.g., openai, anthropic).
+        **kwargs: Options forwarded to the client (base_url, poll_interval, max_tokens, timeout).
+
+    Returns:
+        BatchClient: The batch client instance.
+
+    Raises:
+        ValueError: If the provider has no batch API support.
+    """
+    if provider not in BATCH_CLIENTS:
+        raise ValueError(f"Batch mode is not supported for provider '{provider}'. Supported: {list(BATCH_CLIENTS)}")
+    return BATCH_CLIENTS[provider](**kwargs)
+
+
+
+__all__ = ["BatchClient", "OpenAIBatchClient", "AnthropicBatchClient", "SubmittedBatch", "get_batch_client", "run_batches", "wait_batches"]
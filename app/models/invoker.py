@@ -0,0 +1,128 @@
+import asyncio, random, threading, time
+from dataclasses import dataclass, field
+from typing import Any, Coroutine, List, Optional
+
+from utils.logs import set_logger
+from utils.ratelimit import RateLimiter
+
+
+logger = set_logger(__name__)
+
+
+
+@dataclass
+class Attempt:
+    """A single model invocation attempt."""
+    attempt: int
+    latency: float
+    error: Optional[str] = None
+
+
+
+@dataclass
+class Invocation:
+    """Outcome of a model invocation with its per-attempt history."""
+    response: Any
+    attempts: List[Attempt] = field(default_factory=list)
+
+    @property
+    def latency(self) -> float:
+        """Latency of the successful (last) attempt in seconds."""
+        return self.attempts[-1].latency if self.attempts else 0.0
+
+
+
+class Invoker:
+    """
+    Long-lived invocation layer shared across samples.
+
+    All invocations run as coroutines on one background event loop. Timeouts are enforced
+    with `asyncio.wait_for`, which cancels the in-flight request, so `max_timeout` bounds the
+    wall time of every attempt. Failed attempts are retried with jittered exponential backoff.
+    """
+    def __init__(self,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The background event loop, started on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="kocem-invoker", daemon=True).start()
+        return self._loop
+
+    def run(self, coro: Coroutine) -> Any:
+        """Run a coroutine on the background loop and block until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (1-based) attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def _attempt(self, model, prompt_msgs, max_timeout: int):
+        if max_timeout and max_timeout > 0:
+            return await asyncio.wait_for(model.ainvoke(prompt_msgs), timeout=max_timeout)
+        return await model.ainvoke(prompt_msgs)
+
+    async def ainvoke(self, model, prompt_msgs, max_retries: int, max_timeout: int, limiter: Optional[RateLimiter] = None) -> Invocation:
+        """
+        Invoke the model with retry and timeout logic.
+
+        Args:
+            model: LangChain runnable exposing `ainvoke`.
+            prompt_msgs: Messages to send to model.
+            max_retries (int): Total attempts before failing.
+            max_timeout (int): Per-attempt timeout in seconds (0 / negative disables).
+            limiter (RateLimiter | None): Client-side quota to respect before every attempt.
+
+        Returns:
+            Invocation: The response and the per-attempt latencies.
+        """
+        attempts: List[Attempt] = []
+        for attempt in range(1, max_retries + 1):
+            if limiter is not None:
+                await limiter.acquire(prompt_msgs)
+            started = time.perf_counter()
+            try:
+                response = await self._attempt(model, prompt_msgs, max_timeout)
+            except Exception as e:  # broad catch to retry transient issues
+                error = f"Timed out after {max_timeout}s" if isinstance(e, asyncio.TimeoutError) else str(e)
+                attempts.append(Attempt(attempt=attempt, latency=time.perf_counter() - started, error=error))
+                if attempt == max_retries:
+                    logger.error(f"Model invoke failed after {attempt} attempts: {error}")
+                    raise
+                backoff = self.backoff(attempt)
+                logger.warning(f"Invoke error (attempt {attempt}/{max_retries}): {error}. Retrying in {backoff:.1f}s...")
+                await asyncio.sleep(backoff)
+                continue
+
+            attempts.append(Attempt(attempt=attempt, latency=time.perf_counter() - started))
+            logger.debug("Model invoke succeeded on attempt %d in %.2fs.", attempt, attempts[-1].latency)
+            return Invocation(response=response, attempts=attempts)
+        raise RuntimeError("max_retries must be at least 1")
+
+    def invoke(self, model, prompt_msgs, max_retries: int, max_timeout: int, limiter: Optional[RateLimiter] = None) -> Invocation:
+        """Blocking counterpart of `ainvoke`, executed on the shared background loop."""
+        return self.run(self.ainvoke(model, prompt_msgs, max_retries, max_timeout, limiter))
+
+
+_INVOKER: Optional[Invoker] = None
+
+
+def get_invoker() -> Invoker:
+    """Return the process-wide invoker."""
+    global _INVOKER
+    if _INVOKER is None:
+        _INVOKER = Invoker()
+    return _INVOKER
+
+
+
+__all__ = ["Attempt", "Invocation", "Invoker", "get_invoker"]
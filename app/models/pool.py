@@ -0,0 +1,200 @@
+"""Client-side load balancing over replicas of one model"""
+
+import asyncio, os, statistics, time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Union
+
+import httpx
+from dotenv import load_dotenv
+
+from utils.logs import set_logger
+
+
+load_dotenv()
+logger = set_logger(__name__)
+
+# Consecutive failures after which a replica is ejected
+POOL_MAX_FAILURES = int(os.getenv("POOL_MAX_FAILURES", 2))
+# Seconds an ejected replica waits before its next health check
+POOL_EJECT_SECONDS = float(os.getenv("POOL_EJECT_SECONDS", 30))
+# A replica whose mean latency exceeds this multiple of the pool median is ejected (0 disables)
+POOL_SLOW_FACTOR = float(os.getenv("POOL_SLOW_FACTOR", 3.0))
+# Requests a replica serves before its latency is compared with the others
+POOL_MIN_REQUESTS = 5
+
+
+def split_endpoints(value: Union[str, Sequence[str], None]) -> List[str]:
+    """Endpoints of a list, or of a comma-separated string (e.g., `VLLM_ENDPOINT="http://a/v1,http://b/v1"`)."""
+    if value is None:
+        return []
+    items = value.split(",") if isinstance(value, str) else value
+    return [item.strip() for item in items if item and item.strip()]
+
+
+
+@dataclass(eq=False)
+class Replica:
+    """One endpoint of a pool and its routing state."""
+    url: str
+    model: Any
+    health_url: Optional[str] = None
+    outstanding: int = 0
+    failures: int = 0
+    served: int = 0
+    latency: Optional[float] = None  # exponential moving average in seconds
+    ejected_at: Optional[float] = None
+    probing: bool = False
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_at is None
+
+
+
+class EndpointPool:
+    """
+    Replicas of one model behind several endpoints, used like a single chat model.
+
+    Every request goes to the healthy replica with the fewest outstanding requests. Ties
+    go to the lower mean latency. A replica is ejected after `max_failures` consecutive
+    failures (timeouts included). It is also ejected when its mean latency exceeds
+    `slow_factor` times the median of the other replicas.
+
+    An ejected replica gets a health check (GET `health_url`) every `eject_seconds` and is
+    readmitted once the check passes. Replicas without a health URL are readmitted when
+    their ejection expires. If every replica is ejected, requests still go to the one
+    ejected first, so the pool degrades instead of failing outright.
+
+    Routing state is only touched from the invoker's event loop, so it needs no lock.
+    """
+    def __init__(self,
+        replicas: Sequence[Replica],
+        max_failures: int = POOL_MAX_FAILURES,
+        eject_seconds: float = POOL_EJECT_SECONDS,
+        slow_factor: float = POOL_SLOW_FACTOR,
+        min_requests: int = POOL_MIN_REQUESTS
+    ):
+        if not replicas:
+            raise ValueError("An endpoint pool needs at least one endpoint.")
+        self.replicas = list(replicas)
+        self.max_failures = max(1, max_failures)
+        self.eject_seconds = eject_seconds
+        self.slow_factor = slow_factor
+        self.min_requests = min_requests
+
+    @classmethod
+    def from_endpoints(cls,
+        endpoints: Sequence[str],
+        build: Callable[[str], Any],
+        health_url: Optional[Callable[[str], str]] = None,
+        **kwargs
+    ) -> "EndpointPool":
+        """
+        Build a pool with one model per endpoint.
+
+        Args:
+            endpoints (Sequence[str]): Endpoint URLs.
+            build (Callable[[str], Any]): Model of an endpoint (anything with `ainvoke`).
+            health_url (Callable[[str], str] | None): Health check URL of an endpoint.
+            **kwargs: Ejection settings of the pool.
+        """
+        return cls([Replica(url, build(url), health_url(url) if health_url else None) for url in endpoints], **kwargs)
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.replicas[0].model, "model_name", "")
+
+    @property
+    def _identifying_params(self) -> dict:
+        # Replicas serve the same model, so responses are cached regardless of the endpoint
+        return getattr(self.replicas[0].model, "_identifying_params", None) or {}
+
+    def _select(self) -> Replica:
+        now = time.monotonic()
+        for replica in self.replicas:
+            if not replica.healthy and not replica.probing and now - replica.ejected_at >= self.eject_seconds:
+                replica.probing = True
+                asyncio.get_running_loop().create_task(self._probe(replica))
+        candidates = [replica for replica in self.replicas if replica.healthy]
+        if not candidates:
+            return min(self.replicas, key=lambda replica: (replica.ejected_at, replica.outstanding))
+        return min(candidates, key=lambda replica: (replica.outstanding, replica.latency or 0.0))
+
+    def _eject(self, replica: Replica, reason: str) -> None:
+        if replica.healthy:
+            logger.warning(f"Ejecting {replica.url} ({reason}); {sum(r.healthy for r in self.replicas) - 1}/{len(self.replicas)} endpoints left.")
+        replica.ejected_at = time.monotonic()
+
+    def _readmit(self, replica: Replica) -> None:
+        logger.info(f"Readmitting {replica.url}.")
+        replica.ejected_at = None
+        replica.failures = 0
+        replica.served = 0
+        replica.latency = None
+
+    async def _probe(self, replica: Replica) -> None:
+        try:
+            if replica.health_url is None:
+                passed = True
+            else:
+                async with httpx.AsyncClient(timeout=5) as client:
+                    passed = (await client.get(replica.health_url)).is_success
+        except httpx.HTTPError as e:
+            logger.debug("Health check of %s failed: %s", replica.url, e)
+            passed = False
+        finally:
+            replica.probing = False
+        if passed:
+            self._readmit(replica)
+        else:
+            replica.ejected_at = time.monotonic()
+
+    def _record_success(self, replica: Replica, latency: float, fallback: bool = False) -> None:
+        if fallback and not replica.healthy:
+            # Sent while every replica was ejected, and it answered
+            self._readmit(replica)
+        if not replica.healthy:
+            # Requests already in flight when the replica was ejected
+            return
+        replica.failures = 0
+        replica.served += 1
+        replica.latency = latency if replica.latency is None else 0.8 * replica.latency + 0.2 * latency
+        others = [r.latency for r in self.replicas if r is not replica and r.healthy and r.latency is not None and r.served >= self.min_requests]
+        if self.slow_factor > 0 and others and replica.served >= self.min_requests:
+            median = statistics.median(others)
+            if replica.latency > self.slow_factor * median:
+                self._eject(replica, f"mean latency {replica.latency:.2f}s vs pool median {median:.2f}s")
+
+    def _record_failure(self, replica: Replica, error: BaseException) -> None:
+        if not replica.healthy:
+            replica.ejected_at = time.monotonic()
+            return
+        replica.failures += 1
+        if replica.failures >= self.max_failures:
+            self._eject(replica, f"{replica.failures} consecutive failures, last: {type(error).__name__}: {error}")
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        replica = self._select()
+        fallback = not replica.healthy
+        replica.outstanding += 1
+        started = time.perf_counter()
+        try:
+            response = await replica.model.ainvoke(messages, *args, **kwargs)
+        except (Exception, asyncio.CancelledError) as e:  # cancellation is how the invoker times out
+            self._record_failure(replica, e)
+            raise
+        finally:
+            replica.outstanding -= 1
+        self._record_success(replica, time.perf_counter() - started, fallback)
+        return response
+
+    def stats(self) -> List[dict]:
+        """Routing state of every replica."""
+        return [
+            {"url": r.url, "healthy": r.healthy, "outstanding": r.outstanding, "served": r.served, "failures": r.failures, "latency": r.latency}
+            for r in self.replicas
+        ]
+
+
+
+__all__ = ["EndpointPool", "Replica", "split_endpoints"]
@@ -1,81 +1,200 @@
-import os, yaml
+import os, string, threading, yaml
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
 
+@dataclass(frozen=True)
+class Prompt:
+    """
+    An immutable, precompiled prompt release.
+
+    The `human` template is parsed once when the release is loaded: malformed braces and
+    positional placeholders are rejected up front, and `format` only has to fill in the
+    known fields.
+    """
+    name: str
+    locale: str
+    version: str
+    system: str = ""
+    human: str = ""
+    raw: Mapping = field(default_factory=dict, repr=False)
+    fields: frozenset = field(default=frozenset(), init=False)
+
+    def __post_init__(self):
+        if not isinstance(self.system, str):
+            raise ValueError("System prompt must be a string.")
+        if not isinstance(self.human, str):
+            raise ValueError("Human prompt must be a string.")
+        try:
+            parsed = list(string.Formatter().parse(self.human))
+        except ValueError as e:
+            raise ValueError(f"Invalid human template in prompt '{self.locale}/{self.name}/{self.version}': {e}") from e
+
+        fields = set()
+        for _, field_name, _, _ in parsed:
+            if field_name is None:
+                continue
+            if not field_name or field_name.isdigit():
+                raise ValueError(f"Prompt '{self.locale}/{self.name}/{self.version}' uses a positional placeholder; use named fields.")
+            fields.add(field_name.split(".", 1)[0].split("[", 1)[0])
+        object.__setattr__(self, "fields", frozenset(fields))
+        object.__setattr__(self, "raw", MappingProxyType(dict(self.raw)))
+
+    def validate(self, fields: Iterable[str]) -> "Prompt":
+        """
+        Check that every placeholder of the human template is among `fields`.
+
+        Raises:
+            ValueError: If the template needs fields the caller does not provide.
+        """
+        missing = self.fields - set(fields)
+        if missing:
+            raise ValueError(f"Prompt '{self.locale}/{self.name}/{self.version}' expects unknown placeholders: {sorted(missing)}")
+        return self
+
+    def format(self, **kwargs) -> str:
+        """Fill the human template."""
+        return self.human.format_map(kwargs)
+
+
+
+class PromptRegistry:
+    """
+    Process-wide registry of every `<root>/<locale>/<name>/<version>.yaml` prompt.
+
+    The prompt tree is scanned and parsed once, on first use; lookups afterwards are
+    dictionary reads that hand out the same immutable `Prompt` objects.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._prompts: Dict[Tuple[str, str], Dict[str, Prompt]] | None = None
+
+    def _load(self) -> Dict[Tuple[str, str], Dict[str, Prompt]]:
+        prompts = {}
+        if not os.path.isdir(self.root):
+            return prompts
+        for locale in sorted(os.listdir(self.root)):
+            locale_dir = os.path.join(self.root, locale)
+            if not os.path.isdir(locale_dir):
+                continue
+            for name in sorted(os.listdir(locale_dir)):
+                prompt_dir = os.path.join(locale_dir, name)
+                if not os.path.isdir(prompt_dir):
+                    continue
+                releases = {}
+                for file_ in sorted(os.listdir(prompt_dir)):
+                    if not file_.lower().endswith(".yaml"):
+                        continue
+                    version = file_.rsplit(".", 1)[0]
+                    with open(os.path.join(prompt_dir, file_), 'r', encoding='utf-8') as f:
+                        loaded = yaml.safe_load(f) or {}
+                    if not isinstance(loaded, dict):
+                        raise ValueError(f"Prompt '{locale}/{name}/{version}' must be a dictionary.")
+                    releases[version] = Prompt(
+                        name=name,
+                        locale=locale,
+                        version=version,
+                        system=loaded.get("system", ""),
+                        human=loaded.get("human", ""),
+                        raw=loaded
+                    )
+                if releases:
+                    prompts[(locale, name)] = releases
+        return prompts
+
+    @property
+    def prompts(self) -> Dict[Tuple[str, str], Dict[str, Prompt]]:
+        with self._lock:
+            if self._prompts is None:
+                self._prompts = self._load()
+        return self._prompts
+
+    def releases(self, name: str, locale: str = "en") -> list[str]:
+        """Sorted versions of a prompt."""
+        if (locale, name) not in self.prompts:
+            raise FileNotFoundError(f"No .yaml prompt files found in '{os.path.join(self.root, locale, name)}'.")
+        return sorted(self.prompts[(locale, name)])
+
+    def get(self, name: str, locale: str = "en", version: str = "latest") -> Prompt:
+        """
+        Look up a prompt release.
+
+        Args:
+            name (str): Prompt name (e.g., "mcqa").
+            locale (str): Prompt locale.
+            version (str): 'latest' or a 'YYYY-MM-DD' release.
+
+        Returns:
+            Prompt: The cached prompt.
+        """
+        # Validate version: allow 'latest' or date-like string with two dashes
+        if not (version == "latest" or version.count("-") == 2):
+            raise ValueError("Version must be 'latest' or in the format 'YYYY-MM-DD'.")
+
+        releases = self.releases(name, locale)
+        if version == "latest":
+            version = releases[-1]
+        elif version not in releases:
+            raise ValueError(f"Version '{version}' not in releases: {releases}")
+        return self.prompts[(locale, name)][version]
+
+
+_REGISTRIES: Dict[str, PromptRegistry] = {}
+
+
+def get_prompt_registry(root: str | None = None) -> PromptRegistry:
+    """Return the process-wide registry for `root` (default: `PROMPT_PATH`)."""
+    root = root or os.getenv("PROMPT_PATH", "prompts")
+    if root not in _REGISTRIES:
+        _REGISTRIES[root] = PromptRegistry(root)
+    return _REGISTRIES[root]
+
+
+
 class PromptManager:
+    """Handle to one prompt release, served from the process-wide `PromptRegistry`."""
     def __init__(self,
         name: str,
         locale: str = "en",
         version: str = "latest"
     ):
-        # Validate version: allow 'latest' or date-like string with two dashes
-        if not (version == "latest" or version.count("-") == 2):
-            raise ValueError("Version must be 'latest' or in the format 'YYYY-MM-DD'.")
-
+        registry = get_prompt_registry()
         self.name = name
         self.locale = locale
-        self.prompt_dir = os.path.join(os.getenv("PROMPT_PATH", "prompts"), locale, name)
-        if not os.path.exists(self.prompt_dir):
-            raise FileNotFoundError(f"Prompt directory '{self.prompt_dir}' does not exist.")
-
-        # Collect YAML releases (strip extension) and sort
-        self.releases = sorted([
-            file_.rsplit(".", 1)[0]
-            for file_ in os.listdir(self.prompt_dir)
-            if file_.lower().endswith('.yaml')
-        ])
-        if not self.releases:
-            raise FileNotFoundError(f"No .yaml prompt files found in '{self.prompt_dir}'.")
+        self.prompt_dir = os.path.join(registry.root, locale, name)
+        self.compiled = registry.get(name, locale=locale, version=version)
+        self.releases = registry.releases(name, locale)
+        self.version = self.compiled.version
 
-        if version == "latest":
-            self.version = self.releases[-1]
-        else:
-            if version not in self.releases:
-                raise ValueError(f"Version '{version}' not in releases: {self.releases}")
-            self.version = version
-
-        with open(os.path.join(self.prompt_dir, f"{self.version}.yaml"), 'r', encoding='utf-8') as f:
-            loaded = yaml.safe_load(f) or {}
-        self.prompt = loaded  # uses setter
-        self.system = self.prompt.get("system", "")
-        self.human = self.prompt.get("human", "")
-
-    # ---- prompt property ----
     @property
-    def prompt(self) -> dict:
-        return self._prompt
+    def prompt(self) -> Mapping:
+        return self.compiled.raw
 
-    @prompt.setter
-    def prompt(self, value: dict):
-        if not isinstance(value, dict):
-            raise ValueError("Prompt must be a dictionary.")
-        self._prompt = value
-
-    # ---- system property ----
     @property
     def system(self) -> str:
-        return self._system
-
-    @system.setter
-    def system(self, value: str):
-        if not isinstance(value, str):
-            raise ValueError("System prompt must be a string.")
-        self._system = value
+        return self.compiled.system
 
-    # ---- human property ----
     @property
     def human(self) -> str:
-        return self._human
+        return self.compiled.human
 
-    @human.setter
-    def human(self, value: str):
-        if not isinstance(value, str):
-            raise ValueError("Human prompt must be a string.")
-        self._human = value
+    @property
+    def fields(self) -> frozenset:
+        return self.compiled.fields
+
+    def validate(self, fields: Iterable[str]) -> "PromptManager":
+        self.compiled.validate(fields)
+        return self
+
+    def format(self, **kwargs) -> str:
+        return self.compiled.format(**kwargs)
 
 
 
-__all__ = ['PromptManager']
\ No newline at end of file
+__all__ = ['Prompt', 'PromptManager', 'PromptRegistry', 'get_prompt_registry']
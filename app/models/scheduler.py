@@ -0,0 +1,184 @@
+import asyncio, copy, os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from tqdm import tqdm
+
+from utils.checkpoint import Checkpoint
+from utils.logs import set_logger
+
+from .invoker import get_invoker
+
+
+logger = set_logger(__name__)
+
+
+
+@dataclass(eq=False)
+class SubsetJob:
+    """
+    A (subject, split) unit of work for one API client.
+
+    Holds everything needed to run and finalize the subset, so a single API client can
+    serve many subsets at once.
+    """
+    api: Any
+    subset: str
+    split: str
+    dataset: Any
+    checkpoint: Checkpoint
+    files: Dict[str, str]
+    calculate_difficulty: bool = False
+    # Ask the model again instead of reusing cached responses (new responses are still cached)
+    refresh_cache: bool = False
+
+    @property
+    def name(self) -> str:
+        return f"{self.subset}/{self.split}"
+
+    @property
+    def output_dir(self) -> str:
+        return os.path.dirname(self.files["result"])
+
+    @property
+    def ids(self) -> List[str]:
+        # Column access avoids decoding every row (and its image) of a HF dataset
+        if hasattr(self.dataset, "column_names"):
+            return list(self.dataset["id"])
+        return [sample["id"] for sample in self.dataset]
+
+    @property
+    def pending(self) -> List[int]:
+        """Row indices of the samples that are not checkpointed yet."""
+        return [index for index, sample_id in enumerate(self.ids) if sample_id not in self.checkpoint]
+
+    def results(self) -> List[dict]:
+        """Finished samples in dataset order."""
+        return [self.checkpoint.get(sample_id) for sample_id in self.ids]
+
+
+
+class Scheduler:
+    """
+    Global work scheduler.
+
+    Flattens every (subject, split, sample) of the given jobs into one work queue and
+    runs it on a shared pool of `concurrency` workers. Smaller subsets are queued first so
+    they finalize early instead of waiting behind long ones; each subset is finalized as
+    soon as its last sample completes. Progress and ETA are reported for the whole run.
+
+    Jobs of several models over the same loaded split are fanned out: each worker decodes
+    a row once, encodes its image once per distinct image policy, builds the prompt once
+    per distinct `prompt_key` and sends it to every model concurrently, so `concurrency`
+    bounds samples in flight, not requests.
+    """
+    def __init__(self,
+        concurrency: int = 1,
+        max_retries: int = 5,
+        max_timeout: int = 60
+    ):
+        self.concurrency = max(1, concurrency or 1)
+        self.max_retries = max_retries
+        self.max_timeout = max_timeout
+
+    def run(self, jobs: List[SubsetJob]) -> List[Dict[str, str]]:
+        """
+        Run all jobs to completion.
+
+        Args:
+            jobs (list[SubsetJob]): Jobs to run.
+
+        Returns:
+            list[dict[str, str]]: Output file paths of every job, in input order.
+
+        Raises:
+            RuntimeError: If any job failed; finished samples of failed jobs stay checkpointed.
+        """
+        return get_invoker().run(self._arun(jobs))
+
+    async def _arun(self, jobs: List[SubsetJob]) -> List[Dict[str, str]]:
+        # Jobs over the same loaded split (e.g., several models) share one dataset pass: each
+        # row is decoded once and its prompt is built once per prompt config.
+        groups: Dict[tuple, List[SubsetJob]] = {}
+        for job in jobs:
+            groups.setdefault((id(job.dataset), job.subset), []).append(job)
+
+        pending = {job: set(job.pending) for job in jobs}
+        remaining = {job: len(indices) for job, indices in pending.items()}
+        work = deque(
+            (group, index)
+            for group in sorted(groups.values(), key=lambda g: max(remaining[j] for j in g))
+            for index in sorted(set().union(*(pending[job] for job in group)))
+        )
+        outputs: Dict[SubsetJob, Dict[str, str]] = {}
+        failed: Dict[SubsetJob, Exception] = {}
+        logger.info(f"Scheduling {sum(remaining.values())} requests ({len(work)} samples) from {len(jobs)} jobs on {self.concurrency} workers.")
+
+        async def _finalize(job: SubsetJob):
+            # Judging and writing the outputs can fail too; the job's checkpoint is kept for a rerun
+            try:
+                outputs[job] = await asyncio.to_thread(job.api.finalize_job, job)
+            except Exception as e:
+                logger.error(f"{job.api.model_id} {job.name} failed to finalize: {e}")
+                failed[job] = e
+
+        progress = tqdm(total=sum(remaining.values()), desc="Processing", unit="request")
+        # Jobs restored entirely from their checkpoint only need finalizing
+        for job in jobs:
+            if remaining[job] == 0:
+                await _finalize(job)
+
+        async def _dispatch(job: SubsetJob, index: int, handler: dict, prompt_msgs: list):
+            if job not in failed:
+                try:
+                    await job.api._arun_prepared(job, handler, prompt_msgs, self.max_retries, self.max_timeout)
+                except Exception as e:
+                    logger.error(f"{job.api.model_id} {job.name} failed on row {index}: {e}")
+                    failed[job] = e
+            progress.update(1)
+            remaining[job] -= 1
+            if remaining[job] == 0 and job not in failed:
+                await _finalize(job)
+                progress.set_postfix(finished=f"{len(outputs)}/{len(jobs)}")
+
+        def _prepare(targets: List[SubsetJob], index: int) -> Dict[tuple, tuple]:
+            # Pieces of the row (data, prompt text, images per policy) are shared across prompt configs
+            sample, shared, prepared = targets[0].dataset[index], {}, {}
+            for job in targets:
+                if job.api.prompt_key not in prepared:
+                    prepared[job.api.prompt_key] = job.api._prepare_sample(sample, job.subset, shared)
+            return prepared
+
+        async def _worker():
+            while work:
+                group, index = work.popleft()
+                targets = [job for job in group if index in pending[job]]
+                try:
+                    # Decoding the row and encoding its image is CPU-bound; keep it off the shared loop
+                    prepared = await asyncio.to_thread(_prepare, targets, index)
+                except Exception as e:
+                    logger.error(f"Failed to prepare row {index} of {targets[0].name}: {e}")
+                    for job in targets:
+                        failed.setdefault(job, e)
+                        remaining[job] -= 1
+                    progress.update(len(targets))
+                    continue
+                await asyncio.gather(*(
+                    _dispatch(job, index, copy.deepcopy(prepared[job.api.prompt_key][0]), prepared[job.api.prompt_key][1])
+                    for job in targets
+                ))
+
+        try:
+            await asyncio.gather(*(_worker() for _ in range(self.concurrency)))
+        finally:
+            progress.close()
+
+        if failed:
+            names = ", ".join(f"{job.api.model_id} {job.name}" for job in failed)
+            raise RuntimeError(f"{len(failed)} job(s) failed: {names}") from next(iter(failed.values()))
+        return [outputs[job] for job in jobs]
+
+
+
+__all__ = ["Scheduler", "SubsetJob"]
@@ -0,0 +1,50 @@
+import os
+
+from models import load_split
+from schemas.kocem import SplitType, Subject, KoCEM
+from utils.logs import set_logger
+from utils.snapshot import write_snapshot
+
+
+logger = set_logger(__name__)
+SubjectsDict = {name: val for name, val in KoCEM.__dict__.items() if isinstance(val, Subject)}
+
+
+def pack(
+    output: str | None = None,
+    subjects: str | list[str] = list(SubjectsDict),
+    splits: SplitType | list[SplitType] = ["dev", "test", "val"],
+):
+    """
+    Load every subject and split once from the Hub and pack them into a single
+    memory-mappable Arrow snapshot. Point `DS_SNAPSHOT_PATH` at it to run offline.
+
+    Args:
+        output (str | None): Snapshot file (default: `DS_SNAPSHOT_PATH`, or `<DS_CACHE_PATH>/kocem.arrow`).
+        subjects (str | list[str]): The subject(s) to pack (default: all subjects).
+        splits (SplitType | list[SplitType]): The split(s) to pack (default: ["dev", "test", "val"]).
+    """
+    output = output or os.getenv("DS_SNAPSHOT_PATH") or os.path.join(os.getenv("DS_CACHE_PATH", ".cache"), "kocem.arrow")
+    subjects = subjects if isinstance(subjects, list) else [subjects]
+    splits = splits if isinstance(splits, list) else [splits]
+
+    def _load():
+        for subset in subjects:
+            for split in splits:
+                if SubjectsDict[subset].split.get(split) is None:
+                    logger.info(f"Skipping {subset} - {split} as it does not have data.")
+                    continue
+                logger.debug(f"Loading {subset} - {split}")
+                yield subset, split, load_split(subset, split, use_snapshot=False)
+
+    write_snapshot(output, _load())
+    return output
+
+
+if __name__ == "__main__":
+    from fire import Fire
+    Fire(pack)
+
+__all__ = [
+    "pack"
+]
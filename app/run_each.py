@@ -1,4 +1,6 @@
 from apis import module
+from models import Scheduler
+from models.batch import run_batches
 from schemas.kocem import LocaleType, SplitType, Subject, KoCEM
 from utils.llm import get_provider
 from utils.logs import set_logger
@@ -9,33 +11,44 @@ SubjectsDict = {name: val for name, val in KoCEM.__dict__.items() if isinstance(
 
 
 def run_each(
-    model: str = "gpt-4.1",
+    model: str | list[str] = "gpt-4.1",
     locale: LocaleType = "en",
     subjects: str | list[str] = list(SubjectsDict),
     splits: SplitType | list[SplitType] = ["dev", "test", "val"],
     task: str = "mcqa",
     retries: int = 3,
     timeout: int = 30,
+    concurrency: int = 1,
+    mode: str = "online",
+    backend: str | None = None,
     **kwargs
 ):
     """
     Main function to run the API for specified model, locale, subject, and split.
     
     Args:
-        model (str): The model to use (default: "gpt-4.1").
+        model (str | list[str]): The model(s) to use; several models share one dataset pass (default: "gpt-4.1").
         locale (LocaleType): The locale to use (default: "en").
         subject (str | list[str]): The subject(s) to use (default: all subjects).
         split (SplitType | list[SplitType]): The split(s) to use (default: ["dev", "test", "val"]).
-        task (str): The task type, e.g., "mcqa" or "open" (default: "mcqa").
+        task (str): The task type, e.g., "mcqa", "open" or "mcqa-loglik" (local backends only) (default: "mcqa").
         retries (int): Number of retries for API calls (default: 3).
         timeout (int): Timeout in seconds for each API call (default: 30).
+        concurrency (int): Maximum number of concurrent API calls across all subjects and splits (default: 1).
+        mode (str): "online" for per-sample calls or "batch" for provider batch jobs (default: "online").
+        backend (str | None): Backend for models outside the `llms` catalog, e.g., "transformers" to run a
+            Hugging Face model locally (default: the catalog provider of each model).
         **kwargs: Additional keyword arguments for the API.
     """
-    provider = get_provider(model)
-    api = module[provider](model_id=f"{provider}/{model}", locale=locale, task=task, **kwargs)
+    models = model if isinstance(model, list) else [model]
+    apis = []
+    for name in models:
+        provider = backend or get_provider(name)
+        apis.append(module[provider](model_id=f"{provider}/{name}", locale=locale, task=task, **kwargs))
 
     subjects = subjects if isinstance(subjects, list) else [subjects]
     splits = splits if isinstance(splits, list) else [splits]
+    jobs, batch_jobs = [], []
     for subset in subjects:
         for split in splits:
             if SubjectsDict[subset].split[split] is None:
@@ -43,7 +56,28 @@ def run_each(
                 continue
 
             logger.debug(f"Subject: {subset}, Split: {split}")
-            api(subset=subset, split=split, max_retries=retries, max_timeout=timeout)
+            # Each split is loaded once and shared by every model
+            dataset = None
+            for api in apis:
+                job = api.open_job(subset=subset, split=split, dataset=dataset)
+                if job is None:
+                    continue
+                dataset = job.dataset
+                if api.batched:
+                    # Local and high-throughput backends keep their own requests in flight
+                    api.run_batch(job, max_retries=retries, max_timeout=timeout, concurrency=concurrency)
+                elif mode == "batch":
+                    batch_jobs.append(job)
+                else:
+                    jobs.append(job)
+
+    # Provider batches of every subset are submitted first, then polled together
+    if batch_jobs:
+        run_batches(batch_jobs, max_retries=retries, max_timeout=timeout, concurrency=concurrency)
+
+    # Every (subject, split, sample) shares one worker pool
+    if jobs:
+        Scheduler(concurrency=concurrency, max_retries=retries, max_timeout=timeout).run(jobs)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+"""Hugging Face `datasets` features of the KoCEM subsets (kept apart so `schemas.kocem` does not import `datasets`)"""
+
+import datasets
+
+
+# Define full schema to avoid Arrow inferring null types on empty/problematic splits
+KOCEM_FEATURES = datasets.Features({
+    "id": datasets.Value("string"),
+    "question": datasets.Value("string"),
+    "options": datasets.Value("string"),
+    "answer": datasets.Value("string"),
+    "explanation": datasets.Value("string"),
+    "image": {
+        "bytes": datasets.Value("binary"),
+        "path": datasets.Value("string"),
+    },
+    "question_type": datasets.Value("string"),
+    "field": datasets.Value("string"),
+    "subfield": datasets.Value("string"),
+    "korean_national_technical_certification": datasets.Value("string"),
+    "exam": datasets.Value("string"),
+    "date": datasets.Value("string"),
+    "subject": datasets.Value("string"),
+    "human_acc": datasets.Value("float64"),
+    "difficulty": datasets.Value("string"),
+    "answer_key": datasets.Value("string"),
+    "ko_question": datasets.Value("string"),
+    "en_question": datasets.Value("string"),
+    "ko_options": datasets.Value("string"),
+    "en_options": datasets.Value("string"),
+    "ko_answer": datasets.Value("string"),
+    "en_answer": datasets.Value("string"),
+    "ko_explanation": datasets.Value("string"),
+    "en_explanation": datasets.Value("string"),
+    "eval": datasets.Value("string"),
+    "eval_loop": datasets.Value("string"),
+    "human_feedback": datasets.Value("int64"),
+    "field_feedback": datasets.Value("string"),
+})
+DOMAIN_RESONING_FEATURES = datasets.Features({
+    'image': {
+        'bytes': datasets.Value('binary'), 
+        'path': datasets.Value('string')
+    },
+    'date': datasets.Value('string'),
+    'number': datasets.Value('string'),
+    'question': datasets.Value('string'),
+    'explanation': datasets.Value('string'),
+    'answer': datasets.Value('string'),
+    'id': datasets.Value('string'),
+    'answer_key': datasets.Value('string'),
+    'options': datasets.Value('string'),
+    'question_type': datasets.Value('string'),
+    'field': datasets.Value('string'),
+    'korean_national_technical_certification': datasets.Value('string'),
+    'exam': datasets.Value('string'),
+    'subject': datasets.Value('string'),
+    'human_acc': datasets.Value('string'),
+    'difficulty': datasets.Value('string'),
+    'subfield': datasets.Value('string'),
+    'ko_question': datasets.Value('string'),
+    'en_question': datasets.Value('string'),
+    'ko_options': datasets.Value('string'),
+    'en_options': datasets.Value('string'),
+    'ko_answer': datasets.Value('string'),
+    'en_answer': datasets.Value('string'),
+    'ko_explanation': datasets.Value('string'),
+    'en_explanation': datasets.Value('string'),
+    'eval': datasets.Value('string'),
+    'eval_loop': datasets.Value('string'),
+    'human_feedback': datasets.Value('int64'),
+    'field_feedback': datasets.Value('string'),
+})
+DRAWING_INTERPRETATION_FEATURES = datasets.Features({
+    "image": {
+        "bytes": datasets.Value("binary"), 
+        "path": datasets.Value("string")
+    },
+    "date": datasets.Value("int64"),          # 원본에 맞춤
+    "number": datasets.Value("int64"),        # 원본에 맞춤 (임시 보유)
+    "subfield": datasets.Value("string"),
+    "question": datasets.Value("string"),
+    "subject": datasets.Value("string"),
+    "options": datasets.Value("string"),
+    "answer": datasets.Value("string"),
+    "answer_key": datasets.Value("string"),
+    "explanation": datasets.Value("string"),
+    "question_type": datasets.Value("string"),
+    "field": datasets.Value("string"),
+    "korean_national_technical_certification": datasets.Value("string"),
+    "exam": datasets.Value("string"),
+    "human_acc": datasets.Value("string"),    # 원본에 맞춤
+    "difficulty": datasets.Value("string"),
+    "id": datasets.Value("string"),
+    "ko_question": datasets.Value("string"),
+    "en_question": datasets.Value("string"),
+    "ko_options": datasets.Value("string"),
+    "en_options": datasets.Value("string"),
+    "ko_answer": datasets.Value("string"),
+    "en_answer": datasets.Value("string"),
+    "ko_explanation": datasets.Value("string"),
+    "en_explanation": datasets.Value("string"),
+    "eval": datasets.Value("string"),
+    "eval_loop": datasets.Value("string"),
+    "human_feedback": datasets.Value("int64"),
+    "field_feedback": datasets.Value("string"),
+})
+STANDARD_NOMENCLATURE_FEATURES = datasets.Features({
+    "question": datasets.Value("string"),
+    "options": datasets.Sequence(
+        datasets.Value("string")
+    ),
+    "answer": datasets.Value("string"),
+    "answer_key": datasets.Value("string"),
+    "explanation": datasets.Value("string"),
+    "question_type": datasets.Value("string"),
+    "field": datasets.Value("string"),
+    "subfield": datasets.Value("string"),
+    "korean_national_technical_certification": datasets.Value("string"),
+    "exam": datasets.Value("string"),
+    "subject": datasets.Value("string"),
+    "human_acc": datasets.Value("string"),    # 원본에 맞춤
+    "difficulty": datasets.Value("string"),
+    "image": {
+        "bytes": datasets.Value("binary"), 
+        "path": datasets.Value("string")
+    },
+    "eval_loop": datasets.Value("string"),
+    "id": datasets.Value("string")
+})
+
+
+__all__ = [
+    'KOCEM_FEATURES',
+    'DOMAIN_RESONING_FEATURES',
+    'DRAWING_INTERPRETATION_FEATURES',
+    'STANDARD_NOMENCLATURE_FEATURES'
+]
@@ -1,5 +1,5 @@
 from typing import List, Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 supported_data_types = Literal["text", "image", "audio", "video", "code", "json", "csv", "html", "markdown", "xml", "pdf", "binary"]
@@ -19,6 +19,22 @@ class Pricing(BaseModel):
 
 
 
+class RateLimit(BaseModel):
+    rpm: Optional[int] = Field(None, description="Maximum requests per minute enforced on the client side")
+    tpm: Optional[int] = Field(None, description="Maximum (estimated) prompt tokens per minute enforced on the client side")
+
+
+
+class ImagePolicy(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    max_side: Optional[int] = Field(None, description="Downscale images whose longest side exceeds this many pixels")
+    format: Literal["original", "png", "jpeg", "webp"] = Field("original", description="Re-encoding format of resized images (original keeps the source format)")
+    quality: int = Field(85, description="Quality of lossy re-encodings (jpeg, webp)")
+    detail: Optional[Literal["auto", "low", "high"]] = Field(None, description="OpenAI image `detail` level")
+
+
+
 class ModelSize(BaseModel):
     parameters: dict | int | Literal["unknown"] = Field("unknown", description="Size of the model in billions of parameters or 'unknown'")
     aunounced: bool = Field(False, description="Whether the size is announced by the provider")
@@ -40,6 +56,8 @@ class LanguageModel(BaseModel):
     modality: Modality = Field(..., description="Modality of the LLM (input/output types)")
     features: Optional[dict] = Field({}, description="Additional features of the LLM")
     pricing: Optional[Pricing] | Literal["open-source"] = Field("open-source", description="Pricing information for the LLM")
+    rate_limit: Optional[RateLimit] = Field(None, description="Provider quota used by the client-side rate limiter")
+    image_policy: Optional[ImagePolicy] = Field(None, description="How images are downscaled/encoded before upload")
 
 
 
@@ -49,4 +67,4 @@ class LLMGroup(BaseModel):
     models: list[LanguageModel] = Field(..., description="List of LLMs under this provider")
 
 
-__all__ = ['Modality', 'Pricing', 'ModelSize', 'ModelVersion', 'LanguageModel', 'LLMGroup']
\ No newline at end of file
+__all__ = ['Modality', 'Pricing', 'RateLimit', 'ImagePolicy', 'ModelSize', 'ModelVersion', 'LanguageModel', 'LLMGroup']
\ No newline at end of file
@@ -27,8 +27,8 @@ sentence_end_suffixes = [
     '이다',
     '일 수 있다'
 ]
-TRIVIAL_PATTERNS = [":", ",", ".", "!", "?", ";", ":", "'"]
-INDICATORS_OF_KEYS = [f"{indicator} " for indicator in noun_indicators] + sentence_end_suffixes
+TRIVIAL_PATTERNS = (":", ",", ".", "!", "?", ";", ":", "'")
+INDICATORS_OF_KEYS = tuple(f"{indicator} " for indicator in noun_indicators) + tuple(sentence_end_suffixes)
 
 __all__ = [
     "INDICATORS_OF_KEYS",
@@ -15,15 +15,17 @@ Usage:
 
 from __future__ import annotations
 
-import json, os
-from dataclasses import dataclass, field
-from typing import Dict, List, Literal, Optional, Tuple
+import hashlib, json, os
+from urllib.parse import quote, unquote
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Literal, Optional, Tuple
 from schemas.kocem import KoCEM, Subject
 
 
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 README_PATH = os.path.join(REPO_ROOT, "README.md")
 OUTPUT_PATH = os.getenv("OUTPUT_PATH", os.path.join(REPO_ROOT, "output"))
+RESULTS_STORE_PATH = os.getenv("RESULTS_STORE_PATH", os.path.join(OUTPUT_PATH, "results.parquet"))
 PROMPTS_DIR = os.path.join(REPO_ROOT, "prompts")
 
 KNOWN_LOCALES = {"en", "ko", "zh", "ja", "es", "fr", "de", "it", "pt", "ru"}
@@ -46,11 +48,15 @@ output/
 			<model>/         # e.g., gpt-4.1
 				<split>/       # dev, test, val, extra
 					<subject>/   # e.g., Architectural_Planning
-						output.json        # per-sample entries with predictions and judges
+						output.json        # per-sample entries with predictions and judges (output.jsonl.zst with OUTPUT_FORMAT=jsonl.zst)
 						evaluation.json    # per-sample judge details
 						result.json        # aggregated metrics (acc, std_dev, num_example, ...)
+						checkpoint.jsonl   # finished samples of an interrupted run (removed once finalized)
+	results.parquet/     # one row per (run, sample), partitioned as locale=<locale>/model=<model>/split=<split>/
 ```
 
+Every finalized subset is also appended to the Parquet results store (`RESULTS_STORE_PATH`), with the judge, prediction, ground truth, latency and token usage of each sample. Read it with `utils.store.get_results_store().read(columns=[...], locale="en", model="gpt-4.1")`; only the latest run of every subject is returned unless `latest=False`.
+
 ### Run inference
 Use the `run_each` command to generate predictions and metrics.
 
@@ -59,8 +65,32 @@ uv run python -m app run_each --model gpt-4.1 --locale en --subjects Architectur
 
 # Multiple subjects
 uv run python -m app run_each --model gpt-4.1 --locale en --subjects '["Architectural_Planning","Materials"]' --splits '["dev","val"]' --prompt test
+
+# Multiple models over a single dataset pass
+uv run python -m app run_each --model '["gpt-4.1","claude-opus-4-1"]' --locale en --concurrency 16
 ```
 
+Pass `--concurrency N` to keep up to `N` requests in flight. All selected subjects and splits share one work queue, smaller subsets are scheduled first, and progress/ETA is reported for the whole run; results are still written in dataset order.
+Pass `--mode batch` to submit each subset as one provider batch job (OpenAI Batch / Anthropic Message Batches); set `BATCH_ENDPOINT` to target a different (e.g., local stand-in) batch server. The batches of every subset are submitted first, then polled together, and each subset is finalized as soon as its batch ends. A batch still running after `BATCH_TIMEOUT` seconds (default 24 h) is cancelled and its subset fails, after the other subsets have finished; requests a finished batch did not answer (failed, expired or cancelled) are run online, `--concurrency` at a time.
+Hosted models are rate limited on the client side with the RPM/TPM quota configured next to each model in `app/llms/*.py`; override it with `--rpm` / `--tpm`.
+Images are downscaled to the model's `image_policy` (`app/llms/*.py`) before upload; override it with e.g. `--image_policy '{{"format": "webp", "quality": 80, "detail": "low"}}'`.
+Pass `--backend transformers` to run a Hugging Face causal LM locally on CPU without any service, e.g., `--model Qwen/Qwen2.5-0.5B-Instruct --backend transformers --batch_size 8 --num_threads 4`. Prompts are generated greedily in padded, length-sorted batches (`--max_new_tokens`, default 256; images are left out), and samples/sec and tokens/sec are logged per subset.
+
+With a local backend, `--task mcqa-loglik` scores the options instead of generating an answer: each option's letter (`--score_by label`, default) or text (`--score_by text`, averaged per token) is scored by its log-probability after the prompt, the question prefix being run once per question, and the most likely option is the prediction; no answer parsing or judge is involved. Results are saved under `<model>-loglik`, next to the generated results of the same model.
+
+Pass `--backend vllm` to evaluate a model served by vLLM's OpenAI-compatible server (`VLLM_ENDPOINT` or `--base_url`), e.g., `--model Qwen/Qwen2.5-VL-7B-Instruct --backend vllm --max_in_flight 64`. With `--max_in_flight N` each subset keeps `N` requests in flight, so continuous batching stays busy; each request is retried and timed out like an online call (`--retries`, `--timeout`). Prompts are sent grouped by system prompt, then image, so questions about the same image reach the server back to back; add `--image_first` to put the image before the question text, which lets those prompts share a prefix in the server's automatic prefix cache. Throughput, including the prefix-cache hit rate, is logged per subset from the server's `/metrics` counters, or from the responses' token usage when the server exposes none. Without `--max_in_flight`, samples go through the shared `--concurrency` queue like any other backend.
+
+Several replicas of the same model can share the load: pass a list (`--base_url '["http://gpu1:8000/v1","http://gpu2:8000/v1"]'`) or a comma-separated `VLLM_ENDPOINT`, and likewise `--endpoint` / `LANGSERVE_ENDPOINT` with `--backend langserve`. Each request goes to the replica with the fewest outstanding requests. A replica is ejected after `POOL_MAX_FAILURES` consecutive failures, or when its mean latency exceeds `POOL_SLOW_FACTOR` times the median of the others. Every `POOL_EJECT_SECONDS` it is health-checked (`/health` for vLLM, `/input_schema` for LangServe) and readmitted once the check passes. `--max_in_flight` applies per replica; raise `--concurrency` with the replica count when not using it.
+
+### Pack the dataset (optional)
+Load every subject and split once and write them to a single memory-mapped Arrow snapshot, so later runs start instantly and need no Hub access:
+
+```pwsh
+uv run python -m app pack --output .cache/kocem.arrow
+```
+
+Set `DS_SNAPSHOT_PATH=.cache/kocem.arrow` to use it; splits missing from the snapshot are still loaded from the Hub.
+
 ### Evaluate difficulties (optional)
 If a subject provides difficulty labels, compute difficulty-wise metrics from saved outputs:
 
@@ -76,6 +106,24 @@ uv run python -m app.update_readme
 ```
 
 The updater prefers `output/mcqa`; if absent, it falls back to `output/test`.
+Fingerprints and per-file sums are kept in `<base>/.leaderboard_manifest.json`, so later updates only re-read result files that changed and only re-render the tables they belong to. Delete the manifest to force a full rebuild.
+Each table also shows a 95% bootstrap confidence interval of the total accuracy (resampled within subjects) and paired permutation / exact McNemar p-values against the next rank, computed from item-level results; pass `--n_resamples=0` to leave them out.
+
+### Compare models
+Rank the models of a split with confidence intervals and paired significance tests between adjacent ranks:
+
+```pwsh
+uv run python -m app compare --split dev --locale en --n_resamples 10000
+```
+
+`--split=None` pools every split; `--models='[gpt-4.1,gpt-4.1-mini]'` restricts the comparison. The result is saved to `output/<prompt>/<locale>/compare_<split>.json`.
+
+### Tests
+The tests run against a local OpenAI-compatible stand-in server (`tests/stand_in.py`: chat completions, Batch API, vLLM `/metrics` and `/health`), so they need no credentials or network:
+
+```pwsh
+uv run pytest
+```
 
 ### Prompts
 Prompts live under `prompts/<locale>/...`. Pick a prompt by name with `--prompt` (e.g., `test`, `mcqa`).
@@ -85,7 +133,13 @@ Set the following environment variables (via `.env` or shell) as needed:
 
 - `DS_PATH`: Hugging Face dataset path (e.g., `pikaybh/KoCEM`)
 - `DS_CACHE_PATH`: HF cache directory
+- `DS_SNAPSHOT_PATH`: Packed dataset snapshot (see "Pack the dataset"); when the file exists, splits are memory-mapped from it instead of loaded from the Hub
 - `OUTPUT_PATH`: Root directory for outputs (defaults to `./output`)
+- `RESULTS_STORE_PATH`: Parquet results store (defaults to `<OUTPUT_PATH>/results.parquet`)
+- `OUTPUT_FORMAT`: `json` (indented `output.json`, default) or `jsonl.zst` (`output.jsonl.zst`, streamed zstd-compressed JSON Lines, one record per line; `ZSTD_LEVEL` sets the level); `OUTPUT_FULL_RESPONSE`: `full` (default), `slim` (keep only usage and response metadata of the raw model response) or `drop`. Both can also be passed per run, e.g., `--output_format jsonl.zst --full_response slim`. Readers (`diff`, `per`) accept either file
+- `RESPONSE_CACHE_PATH`: SQLite cache of model responses, reused across reruns (pass `--cache False` to bypass it; a run with `override=True` asks the model again and refreshes the cached responses); `RESPONSE_CACHE_MAX_ENTRIES` / `RESPONSE_CACHE_MAX_AGE_DAYS` bound its size and age, checked when the cache opens and every `RESPONSE_CACHE_EVICT_INTERVAL` seconds (default 600) after a job
+- `JUDGE_MODEL` / `JUDGE_CACHE_PATH` / `JUDGE_CONCURRENCY`: LLM judge that labels answers the parser cannot match; it runs once per subset, concurrently, after all samples finish, and caches its verdicts
+- `LOG_DIR` / `LOG_LEVEL` / `LOG_LEVELS` / `LOG_CONSOLE_LEVEL` / `LOG_SAMPLE_RATE`: Logs are written by one background thread to `<LOG_DIR>/<date>/<module>.log` at `LOG_LEVEL` (default `INFO`); `LOG_LEVELS` overrides the level per module, e.g., `models.api=DEBUG,utils.cache=WARNING` turns on the debug records of `models.api` only, and `LOG_SAMPLE_RATE` keeps the per-sample debug records (prompt, response) of only that fraction of samples
 - Provider credentials (e.g., OpenAI) according to your model choice
 """
 
@@ -119,32 +173,6 @@ def iter_result_files(base_dir: str):
 			yield os.path.join(root, "result.json")
 
 
-def parse_path_components(base_prompt_dir: str, result_path: str) -> Optional[Tuple[str, str, str, str]]:
-	"""Return (locale, model, split, subject) for a result.json path under base_prompt_dir.
-
-	Expected pattern: <base_prompt_dir>/<locale>/<model>/<split>/<subject>/result.json
-	If the locale segment is missing, skip (we only aggregate per-locale).
-	"""
-	rel = os.path.relpath(result_path, base_prompt_dir)
-	parts = rel.replace("\\", "/").split("/")
-	if len(parts) < 5:
-		return None
-	# Require the standard with-locale pattern
-	locale = parts[0]
-	model = parts[1]
-	split = parts[2]
-	subject = parts[3]
-	return locale, model, split, subject
-
-
-def load_result(path: str) -> Optional[Dict]:
-	try:
-		with open(path, "r", encoding="utf-8") as f:
-			return json.load(f)
-	except Exception:
-		return None
-
-
 def _build_subject_to_dimension() -> Dict[str, str]:
 	"""Create mapping from subject folder name to its dimension using KoCEM schema."""
 	mapping: Dict[str, str] = {}
@@ -154,50 +182,184 @@ def _build_subject_to_dimension() -> Dict[str, str]:
 	return mapping
 
 
-def aggregate_per_locale_split_and_overall(base_prompt_dir: str, locales: List[str], eval_by: Literal["subject", "dimension"]) -> Tuple[Dict[str, Dict[str, Dict[str, ModelAgg]]], Dict[str, Dict[str, ModelAgg]]]:
-	"""Aggregate metrics into two views:
-	- per_split: locale -> split -> model -> ModelAgg
-	- overall:   locale -> model -> ModelAgg (all splits combined, weighted by num_example)
+MANIFEST_NAME = ".leaderboard_manifest.json"
+MANIFEST_VERSION = 2
+
+
+@dataclass
+class ManifestEntry:
+	"""A result.json file with its fingerprint and pre-aggregated sums."""
+	locale: str
+	model: str
+	split: str
+	subject: str
+	mtime_ns: int
+	size: int
+	sha256: str
+	acc_sum: float
+	n: int
+	valid: bool = True
+
+
+class ResultManifest:
+	"""Fingerprints and pre-aggregated sums of every result file, plus the rendered tables.
+
+	Only result files whose (mtime, size) changed are re-read and re-hashed, and only the
+	(locale, split) tables containing a changed file are rendered again; everything else
+	is served from the manifest stored next to the results.
+
+	Tables with confidence intervals also depend on item-level data (results store files and
+	evaluation.json), so each slice keeps a fingerprint of those sources as well.
 	"""
-	per_split: Dict[str, Dict[str, Dict[str, ModelAgg]]] = {}
-	overall: Dict[str, Dict[str, ModelAgg]] = {}
-	subject_to_dimension = _build_subject_to_dimension() if eval_by == "dimension" else {}
-
-	for res_file in iter_result_files(base_prompt_dir):
-		parsed = parse_path_components(base_prompt_dir, res_file)
-		if not parsed:
-			continue
-		locale, model, split, subject = parsed
-		if locale not in locales:
-			continue
-		data = load_result(res_file)
-		if not data:
-			continue
-		acc = float(data.get("acc", 0.0))
-		n = int(data.get("num_example", 0))
-
-		key = subject if eval_by == "subject" else subject_to_dimension.get(subject)
-		if not key:
-			continue
-
-		# overall aggregation
-		loc_bucket = overall.setdefault(locale, {})
-		mod_agg = loc_bucket.setdefault(model, ModelAgg(model=model, locale=locale))
-		subj_agg = mod_agg.subjects.setdefault(key, SubjectAgg())
-		subj_agg.acc_sum += acc * n
-		subj_agg.n += n
-
-		# per-split aggregation
-		split_bucket = per_split.setdefault(locale, {}).setdefault(split, {})
-		mod_agg_s = split_bucket.setdefault(model, ModelAgg(model=model, locale=locale))
-		subj_agg_s = mod_agg_s.subjects.setdefault(key, SubjectAgg())
-		subj_agg_s.acc_sum += acc * n
-		subj_agg_s.n += n
-
-	return per_split, overall
-
-
-def _format_table_for_locale(models: Dict[str, ModelAgg], title: str, label: str) -> List[str]:
+
+	def __init__(self, base_prompt_dir: str, store_path: str = RESULTS_STORE_PATH):
+		self.base_prompt_dir = base_prompt_dir
+		self.store_path = store_path
+		self.path = os.path.join(base_prompt_dir, MANIFEST_NAME)
+		self.entries: Dict[str, ManifestEntry] = {}
+		self.sources: Dict[str, str] = {}
+		self.tables: Dict[str, str] = {}
+		self.changed = False
+		try:
+			with open(self.path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			if data.get("version") == MANIFEST_VERSION:
+				self.entries = {path: ManifestEntry(**entry) for path, entry in data["entries"].items()}
+				self.sources = data.get("sources", {})
+				self.tables = data.get("tables", {})
+		except (OSError, ValueError, TypeError):
+			pass
+
+	def refresh(self) -> set:
+		"""Sync entries with the result files on disk.
+
+		Returns:
+			set[tuple[str, str]]: (locale, split) slices with added, changed or removed files.
+		"""
+		dirty = set()
+		seen = set()
+		prefix = len(os.path.join(self.base_prompt_dir, ""))
+		for res_file in iter_result_files(self.base_prompt_dir):
+			rel = res_file[prefix:].replace("\\", "/")
+			parts = rel.split("/")
+			if len(parts) < 5:
+				continue
+			seen.add(rel)
+			stat = os.stat(res_file)
+			entry = self.entries.get(rel)
+			if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+				continue
+
+			with open(res_file, "rb") as f:
+				raw = f.read()
+			digest = hashlib.sha256(raw).hexdigest()
+			self.changed = True
+			if entry and entry.sha256 == digest:
+				entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+				continue
+			try:
+				data = json.loads(raw)
+			except ValueError:
+				data = None
+			locale, model, split, subject = parts[:4]
+			acc = float(data.get("acc", 0.0)) if data else 0.0
+			n = int(data.get("num_example", 0)) if data else 0
+			self.entries[rel] = ManifestEntry(locale, model, split, subject, stat.st_mtime_ns, stat.st_size, digest, acc * n, n, valid=bool(data))
+			dirty.add((locale, split))
+
+		for rel in set(self.entries) - seen:
+			self.changed = True
+			dirty.add((self.entries[rel].locale, self.entries[rel].split))
+			del self.entries[rel]
+
+		sources = self._item_sources()
+		item_dirty = {tuple(key.split("/", 1)) for key in set(sources) | set(self.sources) if sources.get(key) != self.sources.get(key)}
+		if item_dirty:
+			self.changed = True
+			self.sources = sources
+
+		# Drop the cached tables of changed slices for every view, not only the one rendered next;
+		# item-level changes only affect the tables with statistics
+		for key in [key for key in self.tables if key.count("/") >= 2]:
+			view, locale, split = key.rsplit("/", 2)
+			changed = dirty | item_dirty if "+ci" in view else dirty
+			if (locale, split) in changed or (split == "*" and any(loc == locale for loc, _ in changed)):
+				del self.tables[key]
+		return dirty
+
+	def _item_sources(self) -> Dict[str, str]:
+		"""Fingerprint of the item-level data of every "<locale>/<split>" slice: the results store
+		files of this prompt and the evaluation.json files under the prompt folder."""
+		files: Dict[str, list] = {}
+		prefix = len(os.path.join(self.base_prompt_dir, ""))
+		for root, _dirs, names in os.walk(self.base_prompt_dir):
+			if "evaluation.json" not in names:
+				continue
+			path = os.path.join(root, "evaluation.json")
+			parts = path[prefix:].replace("\\", "/").split("/")
+			if len(parts) < 5:
+				continue
+			stat = os.stat(path)
+			files.setdefault(f"{parts[0]}/{parts[2]}", []).append((path[prefix:], stat.st_mtime_ns, stat.st_size))
+
+		# Store files are named "<prompt>-<subject>-<run id>.parquet" under locale=/model=/split=
+		run_prefix = quote(os.path.basename(self.base_prompt_dir), safe="") + "-"
+		for root, _dirs, names in os.walk(self.store_path):
+			rel = os.path.relpath(root, self.store_path).replace("\\", "/").split("/")
+			partition = dict(part.partition("=")[::2] for part in rel)
+			if len(rel) != 3 or set(partition) != {"locale", "model", "split"}:
+				continue
+			slice_ = f"{unquote(partition['locale'])}/{unquote(partition['split'])}"
+			for name in names:
+				if name.startswith(run_prefix) and name.endswith(".parquet"):
+					stat = os.stat(os.path.join(root, name))
+					files.setdefault(slice_, []).append(("/".join(rel + [name]), stat.st_mtime_ns, stat.st_size))
+
+		return {key: hashlib.sha256(json.dumps(sorted(value)).encode()).hexdigest() for key, value in files.items()}
+
+	def aggregate(self, locales: List[str], eval_by: Literal["subject", "dimension"]) -> Tuple[Dict[str, Dict[str, Dict[str, ModelAgg]]], Dict[str, Dict[str, ModelAgg]]]:
+		"""Aggregate the manifest sums into two views:
+		- per_split: locale -> split -> model -> ModelAgg
+		- overall:   locale -> model -> ModelAgg (all splits combined, weighted by num_example)
+		"""
+		per_split: Dict[str, Dict[str, Dict[str, ModelAgg]]] = {}
+		overall: Dict[str, Dict[str, ModelAgg]] = {}
+		subject_to_dimension = _build_subject_to_dimension() if eval_by == "dimension" else {}
+		for entry in self.entries.values():
+			if entry.locale not in locales or not entry.valid:
+				continue
+			key = entry.subject if eval_by == "subject" else subject_to_dimension.get(entry.subject)
+			if not key:
+				continue
+			for bucket in (overall.setdefault(entry.locale, {}), per_split.setdefault(entry.locale, {}).setdefault(entry.split, {})):
+				agg = bucket.setdefault(entry.model, ModelAgg(model=entry.model, locale=entry.locale)).subjects.setdefault(key, SubjectAgg())
+				agg.acc_sum += entry.acc_sum
+				agg.n += entry.n
+		return per_split, overall
+
+	def save(self) -> None:
+		"""Write the manifest atomically."""
+		data = {
+			"version": MANIFEST_VERSION,
+			"entries": {path: asdict(entry) for path, entry in sorted(self.entries.items())},
+			"sources": self.sources,
+			"tables": self.tables,
+		}
+		tmp_path = f"{self.path}.tmp"
+		with open(tmp_path, "w", encoding="utf-8") as f:
+			json.dump(data, f, ensure_ascii=False)
+		os.replace(tmp_path, self.path)
+
+
+def _rank(models: Dict[str, ModelAgg]) -> List[ModelAgg]:
+	return sorted(models.values(), key=lambda m: m.overall_acc, reverse=True)
+
+
+def _format_p(p: float) -> str:
+	return "<0.001" if p < 0.001 else f"{p:.3f}"
+
+
+def _format_table_for_locale(models: Dict[str, ModelAgg], title: str, label: str, stats: Optional[Callable[[List[str]], Dict[str, dict]]] = None) -> List[str]:
 	out: List[str] = []
 	if not models:
 		return out
@@ -207,9 +369,12 @@ def _format_table_for_locale(models: Dict[str, ModelAgg], title: str, label: str
 	if not subjects:
 		out.append("<p><em>No results found.</em></p>\n\n")
 		return out
-	ranked = sorted(models.values(), key=lambda m: m.overall_acc, reverse=True)
+	ranked = _rank(models)
+	significance = stats([m.model for m in ranked]) if stats else None
 	out.append("<table>\n<thead>\n<tr>")
 	out.append("<th>Rank</th><th>Model</th><th>Total</th>")
+	if significance is not None:
+		out.append("<th>95% CI</th><th>p vs next (perm. / McNemar)</th>")
 	for s in subjects:
 		out.append(f"<th>{s}</th>")
 	out.append("</tr>\n</thead>\n<tbody>\n")
@@ -218,6 +383,11 @@ def _format_table_for_locale(models: Dict[str, ModelAgg], title: str, label: str
 		out.append(f"<td>{i}</td><td>{m.model}</td>")
 		# overall weighted accuracy across groups (for this slice)
 		out.append(f"<td>{m.overall_acc*100:.2f}%</td>")
+		if significance is not None:
+			st = significance.get(m.model)
+			ci = f"{st['ci_low']*100:.2f}–{st['ci_high']*100:.2f}%" if st else "-"
+			p = f"{_format_p(st['p_permutation'])} / {_format_p(st['p_mcnemar'])}" if st and "next" in st else "-"
+			out.append(f"<td>{ci}</td><td>{p}</td>")
 		for subj in subjects:
 			sa = m.subjects.get(subj)
 			cell = f"{sa.acc*100:.2f}%" if sa and sa.n > 0 else "-"
@@ -227,11 +397,31 @@ def _format_table_for_locale(models: Dict[str, ModelAgg], title: str, label: str
 	return out
 
 
-def format_leaderboard_with_splits(per_split: Dict[str, Dict[str, Dict[str, ModelAgg]]], overall: Dict[str, Dict[str, ModelAgg]], eval_by: Literal["subject", "dimension"]) -> str:
+def format_leaderboard_with_splits(per_split: Dict[str, Dict[str, Dict[str, ModelAgg]]], overall: Dict[str, Dict[str, ModelAgg]], eval_by: Literal["subject", "dimension"], tables: Optional[Dict[str, str]] = None, dirty: Optional[set] = None, statistics: Optional[Callable[[str, Optional[str], List[str]], Dict[str, dict]]] = None, n_resamples: int = 0) -> str:
+	"""Render the leaderboard section.
+
+	With `tables` (rendered tables by key) and `dirty` ((locale, split) slices that changed),
+	clean tables are reused from `tables` and re-rendered ones are stored back into it.
+	With `statistics(locale, split or None for all splits, ranked models)` (see `model_statistics`),
+	tables get confidence interval and p-value columns; `n_resamples` (its bootstrap resamples)
+	is part of the cached table keys.
+	"""
 	out: List[str] = []
+	prefix = f"{eval_by}+ci{n_resamples}" if statistics else eval_by
+
+	def _table(key: str, stale: bool, models: Dict[str, ModelAgg], title: str, locale: str, split: Optional[str]) -> str:
+		stats = (lambda ranking: statistics(locale, split, ranking)) if statistics else None
+		if tables is None:
+			return "".join(_format_table_for_locale(models, title, label, stats))
+		if stale or key not in tables:
+			tables[key] = "".join(_format_table_for_locale(models, title, label, stats))
+		return tables[key]
+
 	out.append("## Leaderboard\n\n")
 	label = "subject" if eval_by == "subject" else "dimension"
 	out.append(f"<p>Per-locale rankings. First, per split tables; then an overall weighted table. Columns show {label} accuracies. Higher is better.</p>\n\n")
+	if statistics:
+		out.append("<p>95% CI is a bootstrap interval of the total accuracy, resampled within subjects. p-values test each model against the next rank on their shared items (paired permutation / exact McNemar).</p>\n\n")
 
 	# Preferred split display order
 	split_order = ["dev", "test", "val", "extra"]
@@ -245,11 +435,12 @@ def format_leaderboard_with_splits(per_split: Dict[str, Dict[str, Dict[str, Mode
 		present.sort(key=lambda s: (split_order.index(s) if s in split_order else len(split_order), s))
 		for split in present:
 			title = f"Locale: {locale} — Split: {split}"
-			out.extend(_format_table_for_locale(splits[split], title, label))
+			out.append(_table(f"{prefix}/{locale}/{split}", dirty is None or (locale, split) in dirty, splits[split], title, locale, split))
 		# overall
 		if locale in overall:
 			title = f"Locale: {locale} — All splits (weighted)"
-			out.extend(_format_table_for_locale(overall[locale], title, label))
+			stale = dirty is None or any(loc == locale for loc, _ in dirty)
+			out.append(_table(f"{prefix}/{locale}/*", stale, overall[locale], title, locale, None))
 
 	return "".join(out)
 def replace_leaderboard_section(readme_text: str, new_section_md: str) -> str:
@@ -268,7 +459,21 @@ def get_locales_from_prompts(prompts_dir: str) -> List[str]:
 	return [d for d in os.listdir(prompts_dir) if os.path.isdir(os.path.join(prompts_dir, d))]
 
 
-def update_readme(eval_by: Literal["subject", "dimension"] = "subject") -> int:
+def _significance(base_prompt_dir: str, n_resamples: int) -> Callable[[str, Optional[str], List[str]], Dict[str, dict]]:
+	"""Item-level statistics of a leaderboard slice, read from the results store and evaluation.json files."""
+	prompt = os.path.basename(base_prompt_dir)
+
+	def statistics(locale: str, split: Optional[str], ranking: List[str]) -> Dict[str, dict]:
+		# Imported here: the results store (pyarrow) is only needed when a table is re-rendered
+		from compare import load_item_matrix, model_statistics
+		matrix = load_item_matrix(prompt, locale, splits=None if split is None else [split], models=ranking, output_path=OUTPUT_PATH, store_path=RESULTS_STORE_PATH)
+		return model_statistics(matrix, ranking, n_resamples=n_resamples)
+
+	return statistics
+
+
+def update_readme(eval_by: Literal["subject", "dimension"] = "subject", n_resamples: int = 10000) -> int:
+	"""Render the leaderboard into README.md; `n_resamples=0` drops the CI and p-value columns."""
 	if not os.path.isdir(OUTPUT_PATH):
 		print(f"No output directory found at {OUTPUT_PATH}")
 		return 1
@@ -289,12 +494,19 @@ def update_readme(eval_by: Literal["subject", "dimension"] = "subject") -> int:
 		print("No locales found under prompts/.")
 		return 1
 
-	per_split, overall = aggregate_per_locale_split_and_overall(base_prompt_dir, locales, eval_by)
+	# Only changed result files are re-read; only tables of changed (locale, split) slices are re-rendered
+	manifest = ResultManifest(base_prompt_dir)
+	dirty = manifest.refresh()
+	per_split, overall = manifest.aggregate(locales, eval_by)
 	if not (any(per_split.values()) or any(overall.values())):
 		print("No result.json files found for detected locales; nothing to update.")
 		return 1
 
-	leaderboard_md = format_leaderboard_with_splits(per_split, overall, eval_by)
+	n_tables = len(manifest.tables)
+	statistics = _significance(base_prompt_dir, n_resamples) if n_resamples > 0 else None
+	leaderboard_md = format_leaderboard_with_splits(per_split, overall, eval_by, tables=manifest.tables, dirty=dirty, statistics=statistics, n_resamples=n_resamples)
+	if manifest.changed or len(manifest.tables) != n_tables:
+		manifest.save()
 
 	# Build full README content from template and overwrite
 	readme_full = README_TEMPLATE.format(LEADERBOARD=leaderboard_md)
@@ -0,0 +1,161 @@
+"""Persistent, content-addressed cache of model responses"""
+
+import hashlib, json, os, threading, time
+from typing import Optional
+
+from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from sqlitedict import SqliteDict
+
+from .logs import set_logger
+
+
+load_dotenv()
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(os.getenv("DS_CACHE_PATH", ".cache"), "responses.sqlite"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 0)) or None
+RESPONSE_CACHE_MAX_AGE_DAYS = float(os.getenv("RESPONSE_CACHE_MAX_AGE_DAYS", 0)) or None
+RESPONSE_CACHE_EVICT_INTERVAL = float(os.getenv("RESPONSE_CACHE_EVICT_INTERVAL", 600))  # seconds between evictions of a long-lived cache
+
+logger = set_logger(__name__)
+
+
+def _serialize_content(content) -> object:
+    """Serialize message content, replacing inline images by their digest."""
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content:
+        if part.get("type") == "image_url":
+            image_url = part["image_url"]
+            url = image_url["url"] if isinstance(image_url, dict) else image_url
+            detail = image_url.get("detail") if isinstance(image_url, dict) else None
+            parts.append({"type": "image", "sha256": hashlib.sha256(url.encode()).hexdigest(), "detail": detail})
+        else:
+            parts.append(part)
+    return parts
+
+
+
+class ResponseCache:
+    """
+    On-disk cache of model responses backed by SQLite.
+
+    Keys are content hashes of everything that determines a response (model id, prompt
+    version, message contents and generation parameters). Entries are evicted by age and
+    by count (oldest first) when the cache is opened, and again from `log_stats` at most
+    every `evict_interval` seconds, so a long run stays within its bounds.
+    """
+    def __init__(self,
+        path: str = RESPONSE_CACHE_PATH,
+        max_entries: Optional[int] = RESPONSE_CACHE_MAX_ENTRIES,
+        max_age_days: Optional[float] = RESPONSE_CACHE_MAX_AGE_DAYS,
+        evict_interval: float = RESPONSE_CACHE_EVICT_INTERVAL
+    ):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.evict_interval = evict_interval
+        self._evicted_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = SqliteDict(path, tablename="responses", autocommit=True, encode=json.dumps, decode=json.loads)
+        self.evict()
+
+    @staticmethod
+    def make_key(model_id: str, prompt_version: str, messages: list, params: Optional[dict] = None) -> str:
+        """
+        Build the cache key for a model invocation.
+
+        Args:
+            model_id (str): Model id (e.g., openai/gpt-4.1).
+            prompt_version (str): Resolved prompt version (e.g., 2025-08-21).
+            messages (list): Prompt messages sent to the model.
+            params (dict | None): Generation parameters of the model.
+
+        Returns:
+            str: SHA-256 hex digest.
+        """
+        payload = {
+            "model_id": model_id,
+            "prompt_version": prompt_version,
+            "messages": [{"type": msg.type, "content": _serialize_content(msg.content)} for msg in messages],
+            "params": params or {},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[BaseMessage]:
+        with self._lock:
+            entry = self._db.get(key)
+            if entry is None or self._expired(entry):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return messages_from_dict([entry["message"]])[0]
+
+    def set(self, key: str, message) -> None:
+        # Only LangChain messages are cached; other runnables' outputs are passed through
+        if not isinstance(message, BaseMessage):
+            return
+        with self._lock:
+            self._db[key] = {"created": time.time(), "message": message_to_dict(message)}
+
+    def _expired(self, entry: dict) -> bool:
+        return bool(self.max_age_days) and time.time() - entry["created"] > self.max_age_days * 86400
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then the oldest ones beyond `max_entries`.
+
+        Returns:
+            int: Number of evicted entries.
+        """
+        self._evicted_at = time.monotonic()
+        if not (self.max_age_days or self.max_entries):
+            return 0
+        with self._lock:
+            created = {key: entry["created"] for key, entry in self._db.items()}
+            stale = {key for key, ts in created.items() if self._expired({"created": ts})}
+            if self.max_entries and len(created) - len(stale) > self.max_entries:
+                alive = sorted((ts, key) for key, ts in created.items() if key not in stale)
+                stale.update(key for _, key in alive[:len(alive) - self.max_entries])
+            for key in stale:
+                del self._db[key]
+        if stale:
+            logger.info(f"Evicted {len(stale)} entries from response cache {self.path}.")
+        return len(stale)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._db),
+        }
+
+    def log_stats(self, prefix: str = "") -> None:
+        if time.monotonic() - self._evicted_at >= self.evict_interval:
+            self.evict()
+        stats = self.stats()
+        logger.info(f"{prefix}Response cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate, {stats['entries']} entries).")
+
+    def close(self) -> None:
+        self._db.close()
+
+
+_CACHES: dict[str, ResponseCache] = {}
+
+
+def get_response_cache(path: str = RESPONSE_CACHE_PATH) -> ResponseCache:
+    """Return the process-wide cache for `path`, opening it on first use."""
+    if path not in _CACHES:
+        _CACHES[path] = ResponseCache(path)
+    return _CACHES[path]
+
+
+__all__ = [
+    "ResponseCache",
+    "get_response_cache"
+]
@@ -0,0 +1,92 @@
+"""Append-only JSONL checkpoints for resumable subset runs"""
+
+import json, os, threading
+
+from .logs import set_logger
+
+
+logger = set_logger(__name__)
+
+
+
+class Checkpoint:
+    """
+    Append-only JSONL log of finished samples.
+
+    Every finished sample is appended (and flushed) as soon as it completes, so a
+    crashed run can resume from the completed ids. A truncated trailing line left by
+    a crash is ignored on load.
+    """
+    def __init__(self, path: str, key: str = "id"):
+        self.path = path
+        self.key = key
+        self._lock = threading.Lock()
+        self.completed: dict[str, dict] = self._load()
+        if self.completed:
+            logger.info(f"Resuming from {len(self.completed)} checkpointed samples in {path}.")
+
+    def _load(self) -> dict[str, dict]:
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        # A crash mid-write leaves a last line without its newline; the next append would be
+        # glued onto it, so the tail is completed (if it parses) or cut off before resuming
+        end = data.rfind(b'\n') + 1
+        tail = data[end:]
+        if tail.strip():
+            try:
+                record = json.loads(tail)
+            except ValueError:
+                record = None
+            with open(self.path, 'r+b') as f:
+                if record is None:
+                    logger.warning(f"Dropping a truncated trailing record ({len(tail)} bytes) from {self.path}.")
+                    f.truncate(end)
+                else:
+                    f.seek(0, os.SEEK_END)
+                    f.write(b'\n')
+                    end = len(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+        for lineno, line in enumerate(data[:end].decode('utf-8').splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring malformed checkpoint line {lineno} in {self.path}.")
+                continue
+            completed[record[self.key]] = record
+        return completed
+
+    def __contains__(self, sample_id: str) -> bool:
+        return sample_id in self.completed
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def get(self, sample_id: str) -> dict | None:
+        return self.completed.get(sample_id)
+
+    def append(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.completed[record[self.key]] = record
+
+    def remove(self) -> None:
+        """Delete the checkpoint once the subset has been finalized."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.completed = {}
+
+
+__all__ = ["Checkpoint"]
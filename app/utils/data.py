@@ -1,13 +1,24 @@
 """Utils for data load, save, and process (e.g., prompt construction)"""
 
-import os, re, json, yaml
+import io, os, re, json, yaml
 from random import choice
+from typing import Iterable, Iterator, Optional
+
+import zstandard
+from dotenv import load_dotenv
 
 from .logs import set_logger
 
 
+load_dotenv()
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", 3))
+
 logger = set_logger(__name__)
 
+# Output record formats by file suffix; `.jsonl.zst` is streamed one record per line
+OUTPUT_FILES = {"json": "output.json", "jsonl.zst": "output.jsonl.zst"}
+FULL_RESPONSE_MODES = ("full", "slim", "drop")
+
 
 def get_multi_choice_info(options):
     """
@@ -75,6 +86,71 @@ def save_json(filename, ds):
         json.dump(ds, f, ensure_ascii=False, indent=4)
 
 
+def save_records(filename: str, records: Iterable[dict]) -> None:
+    """
+    Save output records.
+
+    `.zst` files are written as zstd-compressed JSON Lines, one record at a time, so the
+    whole file is never built in memory; other files are written with `save_json`. The file
+    is replaced atomically.
+
+    Args:
+        filename (str): Destination, e.g., `output.jsonl.zst` or `output.json`.
+        records (Iterable[dict]): Records to write.
+    """
+    if not filename.endswith(".zst"):
+        save_json(filename, list(records))
+        return
+    tmp_path = f"{filename}.tmp"
+    with open(tmp_path, "wb") as f, zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(f) as writer:
+        for record in records:
+            writer.write(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+            writer.write(b"\n")
+    os.replace(tmp_path, filename)
+
+
+def iter_records(filename: str) -> Iterator[dict]:
+    """Stream the records of a file written by `save_records` (either format)."""
+    if not filename.endswith(".zst"):
+        yield from load_json(filename)
+        return
+    with open(filename, "rb") as f, zstandard.ZstdDecompressor().stream_reader(f) as reader:
+        for line in io.TextIOWrapper(reader, encoding="utf-8"):
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_records(filename: str) -> list:
+    return list(iter_records(filename))
+
+
+def find_output_file(output_dir: str) -> Optional[str]:
+    """The most recently written output file of a subset directory, in any format."""
+    candidates = [os.path.join(output_dir, name) for name in OUTPUT_FILES.values()]
+    candidates = [path for path in candidates if os.path.isfile(path)]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def slim_response(full_response, mode: str = "full"):
+    """
+    Reduce a serialized model response before it is saved.
+
+    Args:
+        full_response: The response as a dict (or string).
+        mode (str): "full" keeps it, "slim" keeps only its id, usage and response metadata
+            (without logprobs), and "drop" removes it.
+
+    Returns:
+        The reduced response, or None for "drop".
+    """
+    if mode == "full":
+        return full_response
+    if mode == "drop" or not isinstance(full_response, dict):
+        return None
+    metadata = {key: value for key, value in (full_response.get("response_metadata") or {}).items() if key != "logprobs"}
+    return {"id": full_response.get("id"), "usage_metadata": full_response.get("usage_metadata"), "response_metadata": metadata}
+
+
 def save_jsonl(filename, data):
     """
     Save a dictionary of data to a JSON Lines file with the filename as key and caption as value.
@@ -104,12 +180,12 @@ def save_args(args, path_dir):
 
 # -------------- Data Processing --------------
 def construct_prompt(sample, config) -> dict:
-    logger.debug(f"{sample = }")
+    logger.debug("sample = %r", sample)
     question = sample['question']
     options = str(sample['options'])
-    logger.debug(f"1{options = }")
+    logger.debug("1options = %r", options)
     options = eval(options)  # eval(sample['options'])
-    logger.debug(f"2{options = }")
+    logger.debug("2options = %r", options)
     example = ""
 
     if sample['question_type'] == 'multiple-choice':
@@ -156,18 +232,25 @@ def construct_prompt(sample, config) -> dict:
         res_dict['gt_content'] = sample['answer']
 
     res_dict.update(sample)
-    logger.debug(f"{res_dict = }")
+    logger.debug("res_dict = %r", res_dict)
 
     return res_dict
 
 
 __all__ = [
+    "FULL_RESPONSE_MODES",
+    "OUTPUT_FILES",
+    "find_output_file",
     "get_multi_choice_info",
+    "iter_records",
     "load_yaml",
     "load_json",
+    "load_records",
     "process_single_sample",
     "save_json",
     "save_jsonl",
+    "save_records",
+    "slim_response",
     "save_args",
     "construct_prompt"
 ]
\ No newline at end of file
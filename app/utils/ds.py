@@ -1,10 +1,10 @@
-from schemas.kocem import (KOCEM_FEATURES, 
-                            DOMAIN_RESONING_FEATURES, 
-                            DRAWING_INTERPRETATION_FEATURES,
-                            STANDARD_NOMENCLATURE_FEATURES)
-
-
 def call_features(subset: str):
+    # `datasets` is only imported by the commands that load the dataset
+    from schemas.features import (KOCEM_FEATURES, 
+                                  DOMAIN_RESONING_FEATURES, 
+                                  DRAWING_INTERPRETATION_FEATURES,
+                                  STANDARD_NOMENCLATURE_FEATURES)
+
     if subset == "Domain_Reasoning":
         return DOMAIN_RESONING_FEATURES
     if subset == "Drawing_Interpretation":
@@ -14,4 +14,4 @@ def call_features(subset: str):
     return KOCEM_FEATURES
 
 
-__all__ = ["call_features"]
\ No newline at end of file
+__all__ = ["call_features"]
@@ -1,78 +1,119 @@
 """Response Parsing and Evaluation for various models"""
 
-import os, random, re, statistics
+import json, os, random, re
+from functools import cached_property, lru_cache
 
-import numpy as np
 from dotenv import load_dotenv
 
 from schemas import INDICATORS_OF_KEYS, TRIVIAL_PATTERNS
 
 from .logs import set_logger
+from .scoring import DIFFICULTIES, ScoreTable
 
 
 load_dotenv()
 random.seed(os.getenv("RANDOM_SEED", 42))
-INDICATORS_OF_KEYS = os.getenv("INDICATORS_OF_KEYS", INDICATORS_OF_KEYS)
-TRIVIAL_PATTERNS = os.getenv("TRIVIAL_PATTERNS", TRIVIAL_PATTERNS)
+# Overrides are JSON lists, e.g., INDICATORS_OF_KEYS='["answer ", "정답은 "]'
+INDICATORS_OF_KEYS = tuple(json.loads(os.getenv("INDICATORS_OF_KEYS", "null")) or INDICATORS_OF_KEYS)
+TRIVIAL_PATTERNS = tuple(json.loads(os.getenv("TRIVIAL_PATTERNS", "null")) or TRIVIAL_PATTERNS)
 
 logger = set_logger(__name__)
 
 
 # ----------- Process Multi-choice -------------
-def parse_multi_choice_response(response, question, all_choices, index2ans):
+def build_judge_query(question, index2ans) -> str:
+    """Question text with its lettered options, as shown to the LLM judge."""
+    return question + "\n\n" + "\n".join([f"({chr(ord('A') + i)}) {ans}" for i, ans in enumerate(index2ans.values())])
+
+
+@lru_cache(maxsize=64)
+def _choice_markers(all_choices: tuple) -> tuple[tuple, tuple]:
+    """`(X)` and ` X ` markers of a choice set, shared by every question with the same choices."""
+    return tuple((choice, f"({choice})") for choice in all_choices), tuple((choice, f" {choice} ") for choice in all_choices)
+
+
+class MultiChoiceExtractor:
     """
-    Parse the prediction from the generated response.
+    Compiled answer extractor for one multiple-choice question.
+
+    The choice markers (`(A)`, ` A `) are built once per choice set and shared, and the
+    lowercased option texts only when a response falls through to them, so an extractor
+    is cheap enough to build per response. Each pattern is located with a single reverse
+    search, which both detects it and yields its last position, and the response is
+    lowercased at most once, so long reasoning traces are not rescanned per option or per
+    candidate. Results are identical to matching each pattern with `in` and breaking ties
+    with `rfind`.
+    """
+    STRIP_CHARS = (',', '.', '!', '?', ';', ':', "'")
+
+    def __init__(self, all_choices, index2ans):
+        self.all_choices = tuple(all_choices)
+        self.bracketed, self.spaced = _choice_markers(self.all_choices)
+        self.index2ans = index2ans
+
+    @cached_property
+    def options(self) -> tuple:
+        return tuple((index, str(ans).lower()) for index, ans in self.index2ans.items())
+
+    @classmethod
+    def normalize(cls, response: str) -> str:
+        for char in cls.STRIP_CHARS:
+            response = response.strip(char)
+        return " " + response + " " # add space to avoid partial match
+
+    @staticmethod
+    def _last(response: str, patterns: tuple) -> str | None:
+        # get the last one (the earliest choice on ties)
+        last, last_index = None, -1
+        for choice, pattern in patterns:
+            index = response.rfind(pattern)
+            if index > last_index:
+                last, last_index = choice, index
+        return last
+
+    def extract(self, response: str) -> str | None:
+        """
+        Return the predicted index (e.g., A, B, C, D), or None if nothing matches.
+        """
+        response = self.normalize(response)
+        pred_index = self._last(response, self.bracketed)  # e.g., (A) (B) (C) (D)
+        if pred_index is None:
+            pred_index = self._last(response, self.spaced)  # e.g., A B C D
+        # if all above doesn't get candidates, check if the content is larger than 5 tokens and try to parse the example
+        if pred_index is None and len(response.split(maxsplit=5)) > 5:
+            pred_index = self._last(response.lower(), self.options)
+        return pred_index
+
+    def __call__(self, responses: str | list[str]) -> str | None | list[str | None]:
+        """Extract the prediction of one response, or of each response in a list."""
+        if isinstance(responses, str):
+            return self.extract(responses)
+        return [self.extract(response) for response in responses]
+
+
+def get_multi_choice_extractor(all_choices, index2ans) -> MultiChoiceExtractor:
+    """Compiled extractor for a question; build one per question to reuse it across responses."""
+    return MultiChoiceExtractor(all_choices, index2ans)
+
+
+def parse_multi_choice_response(response, question, all_choices, index2ans, use_judge=True):
+    """
+    Parse the prediction from the generated response (or a list of responses).
     Return the predicted index e.g., A, B, C, D.
+
+    If no option can be matched, the LLM judge labels the response; with
+    `use_judge=False` None is returned instead, so callers can judge all
+    unparseable responses at once (see `bots.gpt_as_judge.Judge.judge_many`).
     """
-    for char in [',', '.', '!', '?', ';', ':', "'"]:
-        response = response.strip(char)
-    response = " " + response + " " # add space to avoid partial match
-
-    index_ans = True
-    ans_with_brack = False
-    candidates = []
-    for choice in all_choices:  # e.g., (A) (B) (C) (D)
-        if f'({choice})' in response:
-            candidates.append(choice)
-            ans_with_brack = True
-
-    if len(candidates) == 0:
-        for choice in all_choices: # e.g., A B C D
-            if f' {choice} ' in response:
-                candidates.append(choice)
-
-    # if all above doesn't get candidates, check if the content is larger than 5 tokens and try to parse the example
-    if len(candidates) == 0 and len(response.split()) > 5:
-        for index, ans in index2ans.items():
-            if ans.lower() in response.lower():
-                candidates.append(index)
-                index_ans = False # it's content ans.
-
-    if len(candidates) == 0:  # still not get answer, randomly choose one.
+    if not isinstance(response, str):
+        return [parse_multi_choice_response(resp, question, all_choices, index2ans, use_judge) for resp in response]
+
+    extractor = get_multi_choice_extractor(all_choices, index2ans)
+    pred_index = extractor.extract(response)
+    if pred_index is None and use_judge:  # still not get answer, ask the judge.
         from bots.gpt_as_judge import check_label
-        query = question + "\n\n" + "\n".join([f"({chr(ord('A') + i)}) {ans}" for i, ans in enumerate(index2ans.values())])
-        response = check_label(query=query, answer=response).model_dump()  # random.choice(list(all_choices))
+        response = check_label(query=build_judge_query(question, index2ans), answer=extractor.normalize(response)).model_dump()  # random.choice(list(all_choices))
         pred_index = response['label']
-    elif len(candidates) > 1:
-        start_indexes = []
-        if index_ans:
-            if ans_with_brack: 
-                for can in candidates:
-                    index = response.rfind(f'({can})')
-                    start_indexes.append(index) # -1 will be ignored anyway
-                # start_indexes = [generated_response.index(f'({can})') for can in candidates]
-            else:
-                for can in candidates:
-                    index = response.rfind(f" {can} ")
-                    start_indexes.append(index)
-        else:
-            for can in candidates:
-                index = response.lower().rfind(index2ans[can].lower())
-                start_indexes.append(index)
-        # get the last one
-        pred_index = candidates[np.argmax(start_indexes)]
-    else: # if only one candidate, use it.
-        pred_index = candidates[0]
 
     return pred_index
 
@@ -137,34 +178,71 @@ def extract_numbers(string):
     return all_numbers
 
 
-def _get_key_subresponses(response):
-    response = response.strip().strip(".").lower()
-    sub_responses = re.split(r'\.\s(?=[A-Z])|\n', response)
-
-    key_responses = []
-    for index, resp in enumerate(sub_responses):
-        # if last one, accept it's an equation (the entire response can be just one sentence with equation)
-        if index == len(sub_responses) - 1:
-            INDICATORS_OF_KEYS.extend(['='])
-
-        shortest_key_response = ""  # None # the shortest response that may contain the answer (tail part of the response)
-        for indicator in INDICATORS_OF_KEYS:
-            if indicator in resp:
-                if not shortest_key_response:
-                    shortest_key_response = resp.split(indicator)[-1].strip()
-                else:
-                    if len(resp.split(indicator)[-1].strip()) < len(shortest_key_response):
-                        shortest_key_response = resp.split(indicator)[-1].strip()
-                # key_responses.append(resp.split(indicator)[1].strip())
-        
-        is_not_trivial = shortest_key_response.strip() not in TRIVIAL_PATTERNS  # and it's not trivial
-        if shortest_key_response and is_not_trivial:
-            key_responses.append(shortest_key_response)
-    
-    if len(key_responses) == 0: # did not found any
-        return [response]
-    
-    return key_responses
+class KeyResponseMatcher:
+    """
+    Precompiled matcher for the key (answer-bearing) tails of an open response.
+
+    For every sub-response (line), each indicator is located with one reverse search
+    and the shortest non-trivial tail after an indicator is kept. The indicator sets are
+    immutable; the equation indicator '=' only applies to the last sub-response.
+    """
+    SUB_RESPONSE_PATTERN = re.compile(r'\.\s(?=[A-Z])|\n')
+
+    def __init__(self,
+        indicators=INDICATORS_OF_KEYS,
+        last_indicators=('=',),
+        trivial_patterns=TRIVIAL_PATTERNS
+    ):
+        self.indicators = tuple(self._compile(indicators))
+        self.last_indicators = self.indicators + tuple(self._compile(last_indicators))
+        self.trivial_patterns = frozenset(trivial_patterns)
+
+    @staticmethod
+    def _compile(indicators):
+        # An indicator overlapping itself (e.g., "==") is located with `split` to keep its
+        # non-overlapping, left-to-right semantics; all others with `rfind`.
+        for indicator in indicators:
+            overlaps = any(indicator[:k] == indicator[-k:] for k in range(1, len(indicator)))
+            yield indicator, overlaps
+
+    @staticmethod
+    def _key_tail(resp: str, indicators) -> str:
+        shortest_key_response = ""  # the shortest response that may contain the answer (tail part of the response)
+        for indicator, overlaps in indicators:
+            if overlaps:
+                if indicator not in resp:
+                    continue
+                tail = resp.split(indicator)[-1].strip()
+            else:
+                index = resp.rfind(indicator)
+                if index < 0:
+                    continue
+                tail = resp[index + len(indicator):].strip()
+            if not shortest_key_response or len(tail) < len(shortest_key_response):
+                shortest_key_response = tail
+        return shortest_key_response
+
+    def __call__(self, response: str) -> list[str]:
+        response = response.strip().strip(".").lower()
+        sub_responses = self.SUB_RESPONSE_PATTERN.split(response)
+
+        key_responses = []
+        for index, resp in enumerate(sub_responses):
+            # if last one, accept it's an equation (the entire response can be just one sentence with equation)
+            indicators = self.last_indicators if index == len(sub_responses) - 1 else self.indicators
+            shortest_key_response = self._key_tail(resp, indicators)
+
+            is_not_trivial = shortest_key_response.strip() not in self.trivial_patterns  # and it's not trivial
+            if shortest_key_response and is_not_trivial:
+                key_responses.append(shortest_key_response)
+
+        if len(key_responses) == 0: # did not found any
+            return [response]
+
+        return key_responses
+
+
+_get_key_subresponses = KeyResponseMatcher()
 
 
 def parse_open_response(response):
@@ -247,7 +325,6 @@ def evaluate(samples) -> tuple[dict, dict]:
     Batch evaluation for multiple choice and open questions.
     """
 
-    pred_correct = 0
     correct_list = []  # 정답 여부를 기록할 리스트
     judge_dict = dict()
     for sample in samples:
@@ -261,58 +338,30 @@ def evaluate(samples) -> tuple[dict, dict]:
         else: # open question
             correct = _eval_open(gold_i, pred_i)
 
-        if correct:
-            judge_dict[sample['id']] = {"judge": 'Correct', "gt": gold_i, "pred": pred_i}
-            pred_correct += 1
-            correct_list.append(1)  # 정답일 경우 1 추가
-        else:
-            judge_dict[sample['id']] = {"judge": 'Wrong', "gt": gold_i, "pred": pred_i}
-            correct_list.append(0)  # 오답일 경우 0 추가
+        judge_dict[sample['id']] = {"judge": 'Correct' if correct else 'Wrong', "gt": gold_i, "pred": pred_i}
+        correct_list.append(correct)  # 정답일 경우 1 추가
 
     if len(samples) == 0:
         logger.warning("No samples to evaluate.")
-        return {'acc': 0, 'std_dev': None, 'num_example': 0}
+        return judge_dict, {'acc': 0, 'std_dev': None, 'num_example': 0}
 
-    # 표준편차 계산
-    std_dev = statistics.stdev(correct_list) if len(correct_list) > 1 else 0  # 샘플이 하나일 경우 표준편차는 0
-
-    return judge_dict, {'acc': pred_correct / len(samples), 'std_dev': std_dev, 'num_example': len(samples)}
+    return judge_dict, ScoreTable.from_columns(correct_list).summary()
 
 
 def evaluate_difficulties(samples) -> dict[str, dict]:
     """
-    Batch evaluation for multiple choice and open questions.
+    Difficulty-wise evaluation of judged samples (records with `judge` and `difficulty`).
     """
 
-    handler = {diff: {"pred": 0, "cnt": []} for diff in ["Easy", "Medium", "Hard"]}
-    for sample in samples:
-        judge = sample['judge']
-        difficulty = sample['difficulty']
-        
-        if judge == 'Correct':
-            handler[difficulty]["pred"] += 1
-            handler[difficulty]["cnt"].append(1)
-        elif judge == 'Wrong':
-            handler[difficulty]["pred"] += 0
-            handler[difficulty]["cnt"].append(0)
-
-
     if len(samples) == 0:
         logger.warning("No samples to evaluate.")
         return {
             diff: {'acc': 0, 'std_dev': None, 'num_example': 0} 
-            for diff in ["Easy", "Medium", "Hard"]
+            for diff in DIFFICULTIES
         }
 
-    # 표준편차 계산
-    results = {}
-    for difficulty, result in handler.items():
-        std_dev = statistics.stdev(result["cnt"]) if len(result["cnt"]) > 1 else 0  # 샘플이 하나일 경우 표준편차는 0
-        results[difficulty] = {
-            'acc': result["pred"] / len(result["cnt"]) if len(result["cnt"]) > 0 else 0, 
-            'std_dev': std_dev, 
-            'num_example': len(result["cnt"])
-        }
+    judged = [sample for sample in samples if sample['judge'] in ('Correct', 'Wrong')]
+    results = ScoreTable.from_samples(judged).by("difficulty", labels=DIFFICULTIES)
     logger.debug(f"Difficulty evaluation results: {results}")
     return results
 
@@ -331,9 +380,13 @@ def calculate_ins_level_acc(results: dict) -> float:
 
 
 __all__ = [
+    "build_judge_query",
     "calculate_ins_level_acc",
     "evaluate",
     "evaluate_difficulties",
+    "get_multi_choice_extractor",
+    "KeyResponseMatcher",
+    "MultiChoiceExtractor",
     "parse_multi_choice_response",
     "parse_open_response",
 ]
\ No newline at end of file
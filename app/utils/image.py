@@ -0,0 +1,118 @@
+"""Image payload optimization for multimodal prompts"""
+
+import base64, io
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image
+
+from schemas.llm import ImagePolicy
+
+from .logs import set_logger
+
+
+logger = set_logger(__name__)
+
+MIME_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+    "BMP": "image/bmp",
+    "TIFF": "image/tiff",
+}
+PIL_FORMATS = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}
+
+
+
+@dataclass
+class EncodedImage:
+    """An image ready to be embedded in a prompt."""
+    data: bytes
+    mime: str
+    original_bytes: int
+    size: tuple[int, int] | None = None
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - len(self.data)
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime};base64,{base64.b64encode(self.data).decode()}"
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """Flatten transparency onto white for formats without alpha (JPEG)."""
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB") if image.mode != "RGB" else image
+
+
+def encode_image(image_bytes: bytes, policy: Optional[ImagePolicy] = None) -> EncodedImage:
+    """
+    Downscale and re-encode an image according to a policy.
+
+    The image is only decoded when it has to be resized or converted; otherwise the
+    original bytes are kept and only the MIME type is detected from the header.
+    A re-encoding that does not shrink the payload is discarded.
+
+    Args:
+        image_bytes (bytes): Raw image bytes from the dataset.
+        policy (ImagePolicy | None): Maximum resolution, target format and quality.
+
+    Returns:
+        EncodedImage: The (possibly) optimized image with its real MIME type.
+    """
+    policy = policy or ImagePolicy()
+    original = EncodedImage(data=image_bytes, mime="image/png", original_bytes=len(image_bytes))
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+    except Exception as e:
+        logger.warning(f"Could not identify image ({e}); sending it unchanged as image/png.")
+        return original
+
+    source_format = image.format or "PNG"
+    original.mime = MIME_TYPES.get(source_format, "image/png")
+    original.size = image.size
+
+    needs_resize = bool(policy.max_side) and max(image.size) > policy.max_side
+    target_format = PIL_FORMATS.get(policy.format, source_format)
+    if not needs_resize and target_format == source_format:
+        return original
+    if target_format not in MIME_TYPES:
+        # e.g., TIFF/BMP sources kept in their format: fall back to lossless PNG
+        target_format = "PNG"
+
+    image.load()
+    if needs_resize:
+        image.thumbnail((policy.max_side, policy.max_side), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    if target_format == "JPEG":
+        _to_rgb(image).save(buffer, format="JPEG", quality=policy.quality, optimize=True)
+    elif target_format == "WEBP":
+        image.save(buffer, format="WEBP", quality=policy.quality, method=4)
+    else:
+        if image.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+            image = image.convert("RGB")
+        image.save(buffer, format=target_format, optimize=True)
+
+    encoded = EncodedImage(
+        data=buffer.getvalue(),
+        mime=MIME_TYPES[target_format],
+        original_bytes=len(image_bytes),
+        size=image.size
+    )
+    if not needs_resize and encoded.saved_bytes <= 0:
+        return original
+    return encoded
+
+
+__all__ = [
+    "EncodedImage",
+    "encode_image"
+]
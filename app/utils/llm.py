@@ -1,20 +1,24 @@
+from typing import Tuple
+
 from llms import llm_models
+from schemas import LanguageModel
 
 
-def get_provider(model_id: str) -> str:
+def _lookup(model_id: str) -> Tuple[str, LanguageModel]:
+    """Provider and catalog entry of a model, matched by name, stable version or a specific release."""
     for llm_model in llm_models:
         for language_model in llm_model.models:
-            # Get provider by name
-            if model_id == language_model.name:
-                return llm_model.provider
-            # Get provider by stable version
-            if model_id == language_model.version.stable:
-                return llm_model.provider
-            # Get provider by specific version
-            for release in language_model.version.releases:
-                if model_id == release:
-                    return llm_model.provider
+            if model_id in (language_model.name, language_model.version.stable, *language_model.version.releases):
+                return llm_model.provider, language_model
     raise ValueError(f"Model ID '{model_id}' not found in any provider.")
 
 
-__all__ = ["get_provider"]
\ No newline at end of file
+def get_provider(model_id: str) -> str:
+    return _lookup(model_id)[0]
+
+
+def get_language_model(model_id: str) -> LanguageModel:
+    return _lookup(model_id)[1]
+
+
+__all__ = ["get_language_model", "get_provider"]
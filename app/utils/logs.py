@@ -1,36 +1,151 @@
-import logging, os
+import atexit, logging, logging.handlers, os, queue, zlib
 from datetime import datetime
+from typing import Dict, Optional
 
 from dotenv import load_dotenv
 
 
 load_dotenv()
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+# Default level of every module, and per-module overrides, e.g., "models.api=DEBUG,utils.cache=WARNING"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_CONSOLE_LEVEL = os.getenv("LOG_CONSOLE_LEVEL", "INFO").upper()
+# Fraction of samples whose per-sample debug records are kept
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
 
+FORMATTER = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+# Arguments of these types cannot change after the call, so formatting them can wait for the writer thread
+_IMMUTABLE = (str, int, float, bool, bytes, type(None))
 
-def set_logger(name: str) -> logging.Logger:
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
 
-    # 파일 핸들러 (DEBUG 이상 기록)
-    logger_dir = os.path.join(os.getenv("LOG_DIR", "logs"), datetime.now().strftime('%Y%m%d'))
-    os.makedirs(logger_dir, exist_ok=True)
+def _parse_levels(spec: str) -> Dict[str, int]:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def level_for(name: str, levels: Optional[Dict[str, int]] = None, default: str = LOG_LEVEL) -> int:
+    """Level of a module: the most specific `LOG_LEVELS` entry matching it, else `LOG_LEVEL`."""
+    levels = _LEVELS if levels is None else levels
+    parts = name.split(".")
+    for i in range(len(parts), 0, -1):
+        level = levels.get(".".join(parts[:i]))
+        if isinstance(level, int):
+            return level
+    return logging.getLevelName(default)
+
+
+
+class SampleFilter(logging.Filter):
+    """
+    Keep the records of a deterministic fraction of samples.
+
+    Records logged with `extra=per_sample(sample_id)` are kept for all samples whose id
+    hashes below `rate`, so a kept sample keeps every one of its records; other records
+    always pass.
+    """
+    def __init__(self, rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.threshold = int(max(0.0, min(1.0, rate)) * 2 ** 32)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample_id = getattr(record, "sample_id", None)
+        return sample_id is None or zlib.crc32(str(sample_id).encode()) < self.threshold
+
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves message formatting to the writer thread.
+
+    The stock handler merges the message in the calling thread; here that only happens when
+    an argument is mutable (it could change before the writer gets to it) or for exception
+    tracebacks, which cannot cross threads.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args or ()
+        if record.exc_info or not isinstance(args, tuple) or not all(isinstance(arg, _IMMUTABLE) for arg in args):
+            return super().prepare(record)
+        record.exc_info = None
+        return record
 
-    file_handler = logging.FileHandler(os.path.join(logger_dir, f"{name}.log"), encoding="utf-8")
-    file_handler.setLevel(logging.DEBUG)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
-    # 콘솔 핸들러 (INFO 이상만 출력)
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
 
-    # 루트 로거 핸들러 제거 (중복 방지)
-    logging.getLogger().handlers.clear()
+class ModuleFileHandler(logging.Handler):
+    """Write each module's records to `<LOG_DIR>/<yyyymmdd>/<module>.log`."""
+    def __init__(self, log_dir: str = LOG_DIR):
+        super().__init__(logging.DEBUG)
+        self.log_dir = log_dir
+        self.handlers: Dict[str, logging.FileHandler] = {}
 
+    def emit(self, record: logging.LogRecord) -> None:
+        handler = self.handlers.get(record.name)
+        if handler is None:
+            logger_dir = os.path.join(self.log_dir, datetime.now().strftime('%Y%m%d'))
+            os.makedirs(logger_dir, exist_ok=True)
+            handler = logging.FileHandler(os.path.join(logger_dir, f"{record.name}.log"), encoding="utf-8")
+            handler.setFormatter(self.formatter or FORMATTER)
+            self.handlers[record.name] = handler
+        handler.emit(record)
+
+    def close(self) -> None:
+        for handler in self.handlers.values():
+            handler.close()
+        super().close()
+
+
+_LEVELS = _parse_levels(LOG_LEVELS)
+_QUEUE_HANDLER: Optional[LazyQueueHandler] = None
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+
+
+def _queue_handler() -> LazyQueueHandler:
+    """Start the process-wide writer thread on first use."""
+    global _QUEUE_HANDLER, _LISTENER
+    if _QUEUE_HANDLER is None:
+        log_queue = queue.SimpleQueue()
+        # 파일 핸들러 (모듈 로거 레벨을 통과한 기록 전부; LOG_LEVEL / LOG_LEVELS)
+        file_handler = ModuleFileHandler()
+        file_handler.setFormatter(FORMATTER)
+        # 콘솔 핸들러 (LOG_CONSOLE_LEVEL 이상만 출력)
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(LOG_CONSOLE_LEVEL)
+        console_handler.setFormatter(FORMATTER)
+
+        _LISTENER = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        _LISTENER.start()
+        atexit.register(_LISTENER.stop)
+        _QUEUE_HANDLER = LazyQueueHandler(log_queue)
+        _QUEUE_HANDLER.addFilter(SampleFilter())
+    return _QUEUE_HANDLER
+
+
+def set_logger(name: str) -> logging.Logger:
+    """
+    Return the logger of a module, attached once to the shared background writer.
+
+    Calls return the same logger without adding handlers again. Records are written by a
+    single listener thread, so logging never blocks on file or console I/O.
+    """
+    logger = logging.getLogger(name)
+    handler = _queue_handler()
+    if handler not in logger.handlers:
+        logger.setLevel(level_for(name))
+        logger.addHandler(handler)
+        # 상위 로거로 전파하지 않음 (중복 방지)
+        logger.propagate = False
     return logger
 
 
-__all__ = ['set_logger']
\ No newline at end of file
+def per_sample(sample_id) -> dict:
+    """`extra` of a per-sample record, subject to `LOG_SAMPLE_RATE` sampling."""
+    return {"sample_id": sample_id}
+
+
+__all__ = [
+    'per_sample',
+    'set_logger'
+]
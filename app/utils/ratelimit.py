@@ -0,0 +1,144 @@
+"""Client-side request/token rate limiting"""
+
+import asyncio, time
+from functools import lru_cache
+from typing import Optional
+
+from .logs import set_logger
+
+
+logger = set_logger(__name__)
+
+# Rough vision-token cost of one image (OpenAI high-detail 1024x1024 tile budget)
+IMAGE_TOKEN_ESTIMATE = 765
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(name: str = "o200k_base"):
+    """Load a tiktoken encoding, or None when it cannot be loaded (e.g., offline)."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"tiktoken encoding '{name}' unavailable ({e}); falling back to a character-based estimate.")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def estimate_prompt_tokens(messages: list) -> int:
+    """
+    Estimate the prompt tokens of a list of LangChain messages.
+
+    Text is counted with tiktoken; every image adds `IMAGE_TOKEN_ESTIMATE` tokens.
+    """
+    tokens = 0
+    for message in messages:
+        content = message.content
+        if isinstance(content, str):
+            tokens += count_tokens(content)
+            continue
+        for part in content:
+            if part.get("type") == "text":
+                tokens += count_tokens(part["text"])
+            elif part.get("type") == "image_url":
+                tokens += IMAGE_TOKEN_ESTIMATE
+    return tokens
+
+
+
+class TokenBucket:
+    """
+    Asynchronous token bucket refilled continuously at `capacity` units per minute.
+    Waiters are served in FIFO order.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """
+        Take `amount` units from the bucket, waiting until they are available.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        # A single request larger than the bucket would never fit; let it drain the bucket instead
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= amount
+        return waited
+
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter for one provider model."""
+    def __init__(self, name: str, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    async def acquire(self, messages: list) -> float:
+        """
+        Wait until a request with these messages fits in both quotas.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        if self.requests:
+            waited += await self.requests.acquire(1)
+        if self.tokens:
+            waited += await self.tokens.acquire(estimate_prompt_tokens(messages))
+        if waited > 0:
+            logger.debug("Rate limiter '%s' delayed a request by %.2fs.", self.name, waited)
+        return waited
+
+
+_LIMITERS: dict[tuple[str, str], RateLimiter] = {}
+
+
+def get_rate_limiter(provider: str, model: str, rpm: Optional[int] = None, tpm: Optional[int] = None) -> Optional[RateLimiter]:
+    """
+    Return the process-wide limiter for (provider, model), creating it on first use.
+
+    Returns:
+        RateLimiter | None: None when neither `rpm` nor `tpm` is set.
+    """
+    key = (provider, model)
+    if key not in _LIMITERS:
+        if not (rpm or tpm):
+            return None
+        _LIMITERS[key] = RateLimiter(f"{provider}/{model}", rpm=rpm, tpm=tpm)
+        logger.info(f"Rate limiting {provider}/{model} to {rpm or 'unlimited'} RPM and {tpm or 'unlimited'} TPM.")
+    return _LIMITERS[key]
+
+
+__all__ = [
+    "RateLimiter",
+    "TokenBucket",
+    "estimate_prompt_tokens",
+    "get_rate_limiter"
+]
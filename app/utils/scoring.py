@@ -0,0 +1,258 @@
+"""Vectorized scoring of judged samples"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .logs import set_logger
+
+
+logger = set_logger(__name__)
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+
+def factorize(values: Iterable, vocab: Optional[Dict] = None) -> Tuple[np.ndarray, Dict]:
+    """
+    Encode values as integer codes.
+
+    Args:
+        values (Iterable): Hashable labels.
+        vocab (dict | None): Existing label -> code mapping to extend (codes stay stable).
+
+    Returns:
+        tuple[np.ndarray, dict]: The codes and the (extended) vocabulary.
+    """
+    vocab = {} if vocab is None else vocab
+    codes = np.fromiter((vocab.setdefault(value, len(vocab)) for value in values), dtype=np.int32)
+    return codes, vocab
+
+
+def group_stats(correct: np.ndarray, codes: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Accuracy, sample standard deviation and count of a 0/1 array per group in one pass.
+
+    Groups with fewer than two samples get a standard deviation of 0, and empty groups
+    an accuracy of 0.
+
+    Args:
+        correct (np.ndarray): 0/1 outcome per sample.
+        codes (np.ndarray): Group code per sample in `[0, n_groups)`.
+        n_groups (int): Number of groups.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: acc, std_dev and num_example per group.
+    """
+    counts = np.bincount(codes, minlength=n_groups)
+    sums = np.bincount(codes, weights=correct, minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        acc = np.where(counts > 0, sums / counts, 0.0)
+        # For 0/1 outcomes the sum of squares equals the sum
+        var = np.where(counts > 1, (sums - sums * acc) / (counts - 1), 0.0)
+    return acc, np.sqrt(np.maximum(var, 0.0)), counts
+
+
+def as_metrics(acc: float, std_dev: float, num_example: int) -> dict:
+    return {'acc': float(acc), 'std_dev': float(std_dev), 'num_example': int(num_example)}
+
+
+@dataclass
+class ScoreTable:
+    """
+    A run (or many runs) as parallel integer arrays, one entry per judged sample.
+
+    Every categorical column is stored as codes into its vocabulary, so any grouping is
+    a single `np.bincount` reduction.
+    """
+    correct: np.ndarray
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+    vocabs: Dict[str, Dict] = field(default_factory=dict)
+
+    @classmethod
+    def from_columns(cls, correct: Sequence[int], **columns: Sequence) -> "ScoreTable":
+        table = cls(correct=np.asarray(correct, dtype=np.int8))
+        for name, values in columns.items():
+            table.columns[name], table.vocabs[name] = factorize(values)
+        return table
+
+    @classmethod
+    def from_samples(cls, samples: List[dict], **constants) -> "ScoreTable":
+        """
+        Build a table from judged samples (`output.json` records or `evaluation.json` values).
+
+        Args:
+            samples (list[dict]): Records with a `judge` field and, when present,
+                `difficulty` and `question_type`.
+            **constants: Columns shared by every sample (e.g., `subject="Materials"`).
+        """
+        columns = {
+            "difficulty": [sample.get("difficulty") for sample in samples],
+            "question_type": [sample.get("question_type") for sample in samples],
+        }
+        columns.update({name: [value] * len(samples) for name, value in constants.items()})
+        return cls.from_columns([sample["judge"] == "Correct" for sample in samples], **columns)
+
+    @classmethod
+    def concat(cls, tables: List["ScoreTable"]) -> "ScoreTable":
+        """Stack tables, re-coding their columns onto shared vocabularies."""
+        names = {name for table in tables for name in table.columns}
+        merged = cls(correct=np.concatenate([table.correct for table in tables]) if tables else np.zeros(0, dtype=np.int8))
+        for name in names:
+            vocab, parts = {}, []
+            for table in tables:
+                if name in table.columns:
+                    labels = list(table.vocabs[name])
+                    remap = np.fromiter((vocab.setdefault(label, len(vocab)) for label in labels), dtype=np.int32, count=len(labels))
+                    parts.append(remap[table.columns[name]])
+                else:
+                    parts.append(np.full(len(table), vocab.setdefault(None, len(vocab)), dtype=np.int32))
+            merged.columns[name], merged.vocabs[name] = np.concatenate(parts), vocab
+        return merged
+
+    def __len__(self) -> int:
+        return len(self.correct)
+
+    def summary(self) -> dict:
+        """Overall acc / std_dev / num_example."""
+        acc, std_dev, counts = group_stats(self.correct, np.zeros(len(self), dtype=np.int32), 1)
+        return as_metrics(acc[0], std_dev[0], counts[0])
+
+    def by(self, name: str, mapping: Optional[Dict] = None, labels: Optional[Sequence] = None) -> Dict[str, dict]:
+        """
+        Metrics per value of a column.
+
+        Args:
+            name (str): Column to group by.
+            mapping (dict | None): Relabel column values first (e.g., subject -> dimension);
+                values mapped to None are dropped.
+            labels (Sequence | None): Groups to report, in order (missing ones report zeros);
+                defaults to every value present.
+
+        Returns:
+            dict[str, dict]: label -> {'acc', 'std_dev', 'num_example'}.
+        """
+        codes, vocab = self.columns[name], self.vocabs[name]
+        if mapping is not None:
+            relabeled, target = factorize(mapping.get(value) for value in vocab)
+            codes, vocab = relabeled[codes], target
+        acc, std_dev, counts = group_stats(self.correct, codes, len(vocab))
+
+        index = {label: code for label, code in vocab.items() if label is not None}
+        labels = list(index) if labels is None else labels
+        return {
+            label: as_metrics(acc[index[label]], std_dev[index[label]], counts[index[label]]) if label in index else as_metrics(0, 0, 0)
+            for label in labels
+        }
+
+
+def stratified_bootstrap(
+    correct: np.ndarray,
+    strata: np.ndarray,
+    present: Optional[np.ndarray] = None,
+    n_resamples: int = 10000,
+    seed: int = 0,
+    batch_size: int = 1000
+) -> np.ndarray:
+    """
+    Bootstrap distribution of the accuracy of several models on shared items.
+
+    Every resample draws, within each stratum, as many items as the stratum holds (with
+    replacement), so stratum sizes stay fixed. A resample is stored as per-item draw counts,
+    and the accuracies of all models come from one matrix product per batch of resamples.
+
+    Args:
+        correct (np.ndarray): 0/1 outcomes, shape (n_models, n_items).
+        strata (np.ndarray): Stratum code per item (e.g., subject), shape (n_items,).
+        present (np.ndarray | None): 0/1 mask of the items each model answered, same shape as
+            `correct`; the accuracy of a resample is then taken over the present draws only.
+        n_resamples (int): Number of bootstrap resamples.
+        seed (int): Seed of the random generator.
+        batch_size (int): Resamples drawn at once (bounds memory at `batch_size * n_items`).
+
+    Returns:
+        np.ndarray: Resampled accuracies, shape (n_resamples, n_models).
+    """
+    correct = np.atleast_2d(correct)
+    n_items = correct.shape[1]
+    order = np.argsort(strata, kind="stable")
+    counts = np.bincount(strata[order]) if n_items else np.zeros(0, dtype=np.int64)
+    # Each item slot draws from the contiguous (sorted) range of its own stratum
+    sizes = np.repeat(counts, counts)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    seen = np.ones(correct.shape[::-1]) if present is None else np.atleast_2d(present)[:, order].T.astype(np.float64)
+    hits = correct[:, order].T * seen
+
+    rng = np.random.default_rng(seed)
+    acc = np.empty((n_resamples, correct.shape[0]))
+    for start in range(0, n_resamples, batch_size):
+        stop = min(start + batch_size, n_resamples)
+        draws = offsets + rng.integers(0, sizes, size=(stop - start, n_items))
+        draws += np.arange(stop - start)[:, None] * n_items
+        weights = np.bincount(draws.ravel(), minlength=(stop - start) * n_items).reshape(stop - start, n_items).astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            acc[start:stop] = np.nan_to_num((weights @ hits) / (weights @ seen))
+    return acc
+
+
+def confidence_interval(resampled: np.ndarray, alpha: float = 0.05) -> Tuple[np.ndarray, np.ndarray]:
+    """Percentile interval of bootstrap resamples (per column)."""
+    low, high = np.quantile(resampled, [alpha / 2, 1 - alpha / 2], axis=0)
+    return low, high
+
+
+def paired_permutation_test(a: np.ndarray, b: np.ndarray, n_resamples: int = 10000, seed: int = 0) -> np.ndarray:
+    """
+    Two-sided paired permutation test of equal accuracy, for one or many model pairs.
+
+    Each resample swaps the two models' outcomes on every item with probability 1/2. Swaps
+    only matter on discordant items, so with `k` of them the permuted difference in correct
+    answers is `2 * Binomial(k, 1/2) - k` and all resamples are drawn in one call.
+
+    Args:
+        a, b (np.ndarray): 0/1 outcomes on the same items, shape (n_items,) or (n_pairs, n_items).
+        n_resamples (int): Number of permutations.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        np.ndarray: p-value per pair (a scalar array for 1-D input).
+    """
+    a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+    observed = np.abs((a - b).sum(axis=-1))
+    discordant = (a != b).sum(axis=-1)
+    rng = np.random.default_rng(seed)
+    permuted = np.abs(2 * rng.binomial(discordant[..., None], 0.5, size=(*discordant.shape, n_resamples)) - discordant[..., None])
+    return (1 + (permuted >= observed[..., None]).sum(axis=-1)) / (n_resamples + 1)
+
+
+def mcnemar_test(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Exact (binomial) two-sided McNemar test of equal accuracy on paired 0/1 outcomes.
+
+    Args:
+        a, b (np.ndarray): 0/1 outcomes of two models on the same items.
+
+    Returns:
+        float: p-value.
+    """
+    a, b = np.asarray(a, dtype=bool), np.asarray(b, dtype=bool)
+    only_a, only_b = int((a & ~b).sum()), int((~a & b).sum())
+    n = only_a + only_b
+    if n == 0:
+        return 1.0
+    # Integer arithmetic stays exact where float binomial terms would underflow
+    tail = sum(math.comb(n, i) for i in range(min(only_a, only_b) + 1))
+    return min(1.0, 2 * tail / 2 ** n)
+
+
+__all__ = [
+    "DIFFICULTIES",
+    "ScoreTable",
+    "confidence_interval",
+    "factorize",
+    "group_stats",
+    "mcnemar_test",
+    "paired_permutation_test",
+    "stratified_bootstrap"
+]
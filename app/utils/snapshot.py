@@ -0,0 +1,146 @@
+"""Packed, memory-mapped dataset snapshots for offline runs"""
+
+import json, os
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+
+import datasets
+import pyarrow as pa
+
+from .logs import set_logger
+
+
+logger = set_logger(__name__)
+
+SUBSET_COLUMN = "__subset__"
+SPLIT_COLUMN = "__split__"
+META_INDEX = b"kocem.index"
+META_FEATURES = b"kocem.features"
+META_JSON_COLUMNS = b"kocem.json_columns"
+
+
+def _encode_json(column: pa.ChunkedArray) -> pa.Array:
+    return pa.array([None if value is None else json.dumps(value, ensure_ascii=False) for value in column.to_pylist()], type=pa.string())
+
+
+def _decode_json(column: pa.ChunkedArray, type: pa.DataType) -> pa.Array:
+    return pa.array([None if value is None else json.loads(value) for value in column.to_pylist()], type=type)
+
+
+def write_snapshot(path: str, splits: Iterable[Tuple[str, str, datasets.Dataset]]) -> Dict[str, dict]:
+    """
+    Write (subset, split, dataset) triples to a single uncompressed Arrow IPC file.
+
+    Subsets have different feature schemas, so the file uses the union of all columns.
+    Columns whose type differs between subsets are stored as JSON strings and restored
+    on read; the features of every subset are kept in the schema metadata together with
+    the row range of every split.
+
+    Args:
+        path (str): Output `.arrow` file.
+        splits (Iterable[tuple[str, str, Dataset]]): Loaded splits, in the order to store them.
+
+    Returns:
+        dict[str, dict]: The split index, `{"<subset>/<split>": {"offset": ..., "length": ...}}`.
+    """
+    tables, features = [], {}
+    for subset, split, dataset in splits:
+        table = dataset.with_format("arrow")[:]
+        table = table.append_column(SUBSET_COLUMN, pa.array([subset] * len(table), type=pa.string()))
+        table = table.append_column(SPLIT_COLUMN, pa.array([split] * len(table), type=pa.string()))
+        tables.append((subset, split, table))
+        features[subset] = dataset.features.to_dict()
+
+    types: Dict[str, set] = {}
+    for _, _, table in tables:
+        for field in table.schema:
+            types.setdefault(field.name, set()).add(field.type)
+    json_columns = sorted(name for name, found in types.items() if len(found) > 1)
+    schema = pa.schema([(name, pa.string() if name in json_columns else next(iter(found))) for name, found in types.items()])
+
+    index, offset, unified = {}, 0, []
+    for subset, split, table in tables:
+        columns = []
+        for field in schema:
+            if field.name not in table.column_names:
+                columns.append(pa.nulls(len(table), type=field.type))
+            elif field.name in json_columns:
+                columns.append(_encode_json(table[field.name]))
+            else:
+                columns.append(table[field.name])
+        unified.append(pa.Table.from_arrays(columns, schema=schema))
+        index[f"{subset}/{split}"] = {"offset": offset, "length": len(table)}
+        offset += len(table)
+
+    schema = schema.with_metadata({
+        META_INDEX: json.dumps(index),
+        META_FEATURES: json.dumps(features),
+        META_JSON_COLUMNS: json.dumps(json_columns),
+    })
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for table in unified:
+            writer.write_table(table.replace_schema_metadata(schema.metadata))
+    os.replace(tmp_path, path)
+    logger.info(f"Packed {offset} samples from {len(index)} splits into {path}.")
+    return index
+
+
+
+class Snapshot:
+    """
+    Read-only view over a packed snapshot.
+
+    The file is memory-mapped, so opening it is instant and its pages are shared by every
+    process reading the same snapshot; splits are zero-copy slices of the mapped table.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        metadata = self.table.schema.metadata or {}
+        if META_INDEX not in metadata:
+            raise ValueError(f"{path} is not a KoCEM snapshot (missing split index).")
+        self.index: Dict[str, dict] = json.loads(metadata[META_INDEX])
+        self.features: Dict[str, dict] = json.loads(metadata[META_FEATURES])
+        self.json_columns = set(json.loads(metadata[META_JSON_COLUMNS]))
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return "/".join(key) in self.index
+
+    def load(self, subset: str, split: str) -> datasets.Dataset:
+        """
+        Return one split with its original features.
+
+        Raises:
+            KeyError: If the split is not in the snapshot.
+        """
+        entry = self.index[f"{subset}/{split}"]
+        features = datasets.Features.from_dict(self.features[subset])
+        table = self.table.slice(entry["offset"], entry["length"])
+
+        columns = []
+        for name, type in zip(features.arrow_schema.names, features.arrow_schema.types):
+            column = table[name]
+            columns.append(_decode_json(column, type) if name in self.json_columns else column.cast(type))
+        table = pa.Table.from_arrays(columns, schema=features.arrow_schema)
+        return datasets.Dataset(
+            datasets.table.InMemoryTable(table),
+            info=datasets.DatasetInfo(features=features),
+            split=datasets.NamedSplit(split)
+        )
+
+
+@lru_cache(maxsize=None)
+def get_snapshot(path: str) -> Snapshot:
+    """Return the process-wide snapshot mapped from `path`."""
+    snapshot = Snapshot(path)
+    logger.info(f"Memory-mapped dataset snapshot {path} ({len(snapshot.index)} splits).")
+    return snapshot
+
+
+__all__ = [
+    "Snapshot",
+    "get_snapshot",
+    "write_snapshot"
+]
@@ -0,0 +1,193 @@
+"""Append-only Parquet store of per-sample results"""
+
+import json, os, time, uuid
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+from .logs import set_logger
+
+
+load_dotenv()
+RESULTS_STORE_PATH = os.getenv("RESULTS_STORE_PATH", os.path.join(os.getenv("OUTPUT_PATH", "output"), "results.parquet"))
+
+logger = set_logger(__name__)
+
+PARTITIONING = pa.schema([
+    ("locale", pa.string()),
+    ("model", pa.string()),
+    ("split", pa.string()),
+])
+SCHEMA = pa.schema([
+    ("prompt", pa.string()),
+    ("subject", pa.string()),
+    ("run_id", pa.string()),
+    ("created", pa.timestamp("ms", tz="UTC")),
+    ("id", pa.string()),
+    ("question_type", pa.string()),
+    ("difficulty", pa.string()),
+    ("judge", pa.string()),
+    ("correct", pa.bool_()),
+    ("parsed_pred", pa.string()),
+    ("gt", pa.string()),
+    ("latency", pa.float64()),
+    ("attempts", pa.int32()),
+    ("input_tokens", pa.int64()),
+    ("output_tokens", pa.int64()),
+    ("total_tokens", pa.int64()),
+])
+# A run is identified by these columns; newer runs of the same key supersede older ones
+RUN_KEY = ("prompt", "locale", "model", "split", "subject")
+
+
+def _as_text(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _usage(result: dict) -> dict:
+    full_response = result.get("full_response")
+    usage = full_response.get("usage_metadata") if isinstance(full_response, dict) else None
+    return usage or {}
+
+
+def _attempts(result: dict) -> Optional[int]:
+    full_response = result.get("full_response")
+    metadata = full_response.get("response_metadata") if isinstance(full_response, dict) else None
+    attempts = (metadata or {}).get("attempts")
+    return len(attempts) if isinstance(attempts, list) else None
+
+
+
+class ResultsStore:
+    """
+    Append-only, Hive-partitioned (`locale=/model=/split=`) Parquet store with one row per
+    (run, sample).
+
+    Every finalized subset adds one file, so writers never rewrite existing data. Readers
+    scan only the requested columns and push partition and column filters down to the files.
+    When a subset was run more than once, only its latest run is returned by default.
+    """
+    def __init__(self, root: str = RESULTS_STORE_PATH):
+        self.root = root
+
+    def append(self,
+        results: List[dict],
+        judges: Dict[str, dict],
+        prompt: str,
+        locale: str,
+        model: str,
+        split: str,
+        subject: str
+    ) -> str:
+        """
+        Write the judged samples of one finished subset.
+
+        Args:
+            results (list[dict]): Output records (as saved to output.json).
+            judges (dict[str, dict]): Per-sample judge details (as saved to evaluation.json).
+            prompt, locale, model, split, subject (str): Run coordinates.
+
+        Returns:
+            str: Path of the written Parquet file.
+        """
+        now = time.time()
+        # Sortable by time, unique across concurrent writers
+        run_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}{int(now * 1000) % 1000:03d}-{uuid.uuid4().hex[:8]}"
+        created = pa.scalar(int(now * 1000), type=pa.timestamp("ms", tz="UTC"))
+        rows = {name: [] for name in SCHEMA.names}
+        for result in results:
+            judge = judges.get(result["id"], {})
+            usage = _usage(result)
+            rows["id"].append(result["id"])
+            rows["question_type"].append(result.get("question_type"))
+            rows["difficulty"].append(result.get("difficulty"))
+            rows["judge"].append(judge.get("judge", result.get("judge")))
+            rows["correct"].append(judge.get("judge", result.get("judge")) == "Correct")
+            rows["parsed_pred"].append(_as_text(judge.get("pred", result.get("parsed_pred"))))
+            rows["gt"].append(_as_text(judge.get("gt")))
+            rows["latency"].append(result.get("latency"))
+            rows["attempts"].append(_attempts(result))
+            rows["input_tokens"].append(usage.get("input_tokens"))
+            rows["output_tokens"].append(usage.get("output_tokens"))
+            rows["total_tokens"].append(usage.get("total_tokens"))
+        n = len(results)
+        rows.update({"prompt": [prompt] * n, "subject": [subject] * n, "run_id": [run_id] * n, "created": [created] * n})
+        table = pa.Table.from_pydict(rows, schema=SCHEMA)
+
+        partition = os.path.join(self.root, *(f"{name}={quote(value, safe='')}" for name, value in zip(PARTITIONING.names, (locale, model, split))))
+        os.makedirs(partition, exist_ok=True)
+        name = f"{quote(prompt, safe='')}-{quote(subject, safe='')}-{run_id}.parquet"
+        path, tmp_path = os.path.join(partition, name), os.path.join(partition, f".{name}.tmp")
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+        logger.debug(f"Appended {n} rows to results store at {path}.")
+        return path
+
+    def dataset(self) -> ds.Dataset:
+        return ds.dataset(
+            self.root,
+            schema=pa.unify_schemas([SCHEMA, PARTITIONING]),
+            format="parquet",
+            partitioning=ds.HivePartitioning(PARTITIONING, segment_encoding="uri"),
+            ignore_prefixes=[".", "_"],
+        )
+
+    def read(self,
+        columns: Optional[Sequence[str]] = None,
+        filter: Optional[ds.Expression] = None,
+        latest: bool = True,
+        **equals
+    ) -> pa.Table:
+        """
+        Read rows of the store.
+
+        Args:
+            columns (Sequence[str] | None): Columns to load (default: all).
+            filter (ds.Expression | None): Extra predicate, e.g., `ds.field("difficulty") == "Hard"`.
+            latest (bool): Keep only the latest run of every (prompt, locale, model, split, subject).
+            **equals: Equality predicates, e.g., `locale="en", model="gpt-4.1"`.
+
+        Returns:
+            pa.Table: The selected rows and columns.
+        """
+        if not os.path.isdir(self.root):
+            table = pa.unify_schemas([SCHEMA, PARTITIONING]).empty_table()
+            return table.select(list(columns)) if columns else table
+
+        run_filter = None
+        for name, value in equals.items():
+            expression = ds.field(name).isin(value) if isinstance(value, (list, tuple, set)) else ds.field(name) == value
+            filter = expression if filter is None else filter & expression
+            if name in RUN_KEY:
+                run_filter = expression if run_filter is None else run_filter & expression
+
+        dataset = self.dataset()
+        if latest:
+            # Resolve the latest run ids from the (tiny) key columns, then push them down as a filter
+            runs = dataset.to_table(columns=[*RUN_KEY, "run_id"], filter=run_filter)
+            latest_runs = runs.group_by(list(RUN_KEY)).aggregate([("run_id", "max")])["run_id_max"]
+            expression = ds.field("run_id").isin(latest_runs)
+            filter = expression if filter is None else filter & expression
+        return dataset.to_table(columns=list(columns) if columns else None, filter=filter)
+
+
+_STORES: Dict[str, ResultsStore] = {}
+
+
+def get_results_store(root: str = RESULTS_STORE_PATH) -> ResultsStore:
+    """Return the process-wide store at `root`."""
+    if root not in _STORES:
+        _STORES[root] = ResultsStore(root)
+    return _STORES[root]
+
+
+__all__ = [
+    "ResultsStore",
+    "get_results_store"
+]
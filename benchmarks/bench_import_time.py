@@ -0,0 +1,71 @@
+"""
+Startup benchmark of the lightweight CLI commands.
+
+Resolves each command the way `python app <command>` does, in a fresh interpreter with
+`-X importtime`, and fails (exit code 1) when a command imports part of the inference stack
+or its imports take longer than the budget.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 3] [--budget 1.0] [--commands readme per]
+"""
+
+import argparse, os, subprocess, sys
+from typing import Dict, Set, Tuple
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+# Commands that only read result files
+LIGHT_COMMANDS = ("readme", "per", "diff", "compare")
+# Top-level packages only inference commands may import
+FORBIDDEN = ("datasets", "langchain", "langchain_core", "langserve", "tqdm", "torch", "transformers", "openai", "anthropic")
+
+LOADER = (
+    "import importlib.util, sys; sys.path.insert(0, {app!r}); "
+    "spec = importlib.util.spec_from_file_location('kocem_cli', {main!r}); "
+    "cli = importlib.util.module_from_spec(spec); spec.loader.exec_module(cli); "
+    "cli.load_command({command!r})"
+)
+
+
+def measure(command: str) -> Tuple[float, Set[str]]:
+    """Seconds spent importing and the top-level packages imported to resolve `command`."""
+    code = LOADER.format(app=APP_DIR, main=os.path.join(APP_DIR, "__main__.py"), command=command)
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    total, packages = 0, set()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        packages.add(name.strip().split(".")[0])
+        # Top-level imports are indented by one space; their cumulative times add up to the total
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1e6, packages
+
+
+def main(commands=LIGHT_COMMANDS, repeat: int = 3, budget: float = 1.0) -> int:
+    failures = []
+    for command in commands:
+        runs = [measure(command) for _ in range(repeat)]
+        seconds = min(run[0] for run in runs)
+        forbidden = sorted(set(FORBIDDEN) & runs[0][1])
+        status = "ok"
+        if forbidden:
+            status = f"imports {', '.join(forbidden)}"
+        elif seconds > budget:
+            status = f"over budget ({budget:.2f}s)"
+        if status != "ok":
+            failures.append(command)
+        print(f"{command:>8}: {seconds:6.3f}s imports | {status}")
+    if failures:
+        print(f"Startup regressed for: {', '.join(failures)}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", nargs="+", default=list(LIGHT_COMMANDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum import time per command in seconds.")
+    args = parser.parse_args()
+    sys.exit(main(args.commands, args.repeat, args.budget))
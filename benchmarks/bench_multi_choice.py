@@ -0,0 +1,108 @@
+"""
+Microbenchmark of multiple-choice answer extraction.
+
+Compares the compiled `MultiChoiceExtractor` with the previous substring-scan parser
+on synthetic short answers and long reasoning traces, after checking that both return
+the same prediction for every response. "incl. compile" builds a fresh extractor per
+response, as `parse_multi_choice_response` does for a single response.
+
+Usage:
+    python benchmarks/bench_multi_choice.py [--samples 2000] [--repeat 5]
+"""
+
+import argparse, os, random, sys, timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from utils.eval import MultiChoiceExtractor  # noqa: E402
+
+
+def legacy_parse(response, all_choices, index2ans):
+    """The substring-scan parser `MultiChoiceExtractor` replaced (judge fallback omitted)."""
+    for char in [',', '.', '!', '?', ';', ':', "'"]:
+        response = response.strip(char)
+    response = " " + response + " "
+
+    index_ans = True
+    ans_with_brack = False
+    candidates = []
+    for choice in all_choices:
+        if f'({choice})' in response:
+            candidates.append(choice)
+            ans_with_brack = True
+    if len(candidates) == 0:
+        for choice in all_choices:
+            if f' {choice} ' in response:
+                candidates.append(choice)
+    if len(candidates) == 0 and len(response.split()) > 5:
+        for index, ans in index2ans.items():
+            if ans.lower() in response.lower():
+                candidates.append(index)
+                index_ans = False
+
+    if len(candidates) == 0:
+        return None
+    if len(candidates) == 1:
+        return candidates[0]
+    start_indexes = []
+    if index_ans:
+        for can in candidates:
+            start_indexes.append(response.rfind(f'({can})' if ans_with_brack else f" {can} "))
+    else:
+        for can in candidates:
+            start_indexes.append(response.lower().rfind(index2ans[can].lower()))
+    return candidates[np.argmax(start_indexes)]
+
+
+WORDS = "the load beam column steel concrete frame wall slab answer option because therefore so".split()
+
+
+def make_case(rng: random.Random, long: bool):
+    options = [" ".join(rng.choices(WORDS, k=rng.randint(1, 3))) for _ in range(rng.randint(4, 5))]
+    if rng.random() < 0.2:
+        options[1] = options[0] + " " + rng.choice(WORDS)  # an option that extends another
+    index2ans = {chr(ord('A') + i): option for i, option in enumerate(options)}
+    choices = list(index2ans)
+
+    parts = [" ".join(rng.choices(WORDS, k=rng.randint(20, 60))) for _ in range(rng.randint(20, 80) if long else 1)]
+    style = rng.random()
+    if style < 0.4:
+        parts.append(f"The answer is ({rng.choice(choices)}).")
+    elif style < 0.6:
+        parts.append(f"{rng.choice(choices)} {rng.choice(choices)}")
+    elif style < 0.9:
+        parts.append(f"so it must be {rng.choice(options).upper()} here")
+    return " ".join(parts), choices, index2ans
+
+
+def main(samples: int = 2000, repeat: int = 5, seed: int = 0):
+    rng = random.Random(seed)
+    for label, long in [("short", False), ("long", True)]:
+        cases = [make_case(rng, long) for _ in range(samples)]
+        extractors = [MultiChoiceExtractor(choices, index2ans) for _, choices, index2ans in cases]
+        mismatches = sum(
+            legacy_parse(response, choices, index2ans) != extractor(response)
+            for (response, choices, index2ans), extractor in zip(cases, extractors)
+        )
+        assert mismatches == 0, f"{mismatches} {label} responses disagree with the legacy parser"
+
+        legacy = min(timeit.repeat(lambda: [legacy_parse(*case) for case in cases], number=1, repeat=repeat))
+        compiled = min(timeit.repeat(lambda: [extractor(case[0]) for case, extractor in zip(cases, extractors)], number=1, repeat=repeat))
+        including_compile = min(timeit.repeat(lambda: [MultiChoiceExtractor(c, i)(r) for r, c, i in cases], number=1, repeat=repeat))
+        chars = sum(len(case[0]) for case in cases) / samples
+        print(
+            f"{label:>5} ({chars:,.0f} chars avg): legacy {legacy / samples * 1e6:8.1f} us/response | "
+            f"compiled {compiled / samples * 1e6:8.1f} us/response ({legacy / compiled:4.1f}x) | "
+            f"incl. compile {including_compile / samples * 1e6:8.1f} us/response ({legacy / including_compile:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.samples, args.repeat, args.seed)
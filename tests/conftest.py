@@ -0,0 +1,44 @@
+import json, os, sys, tempfile
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs write outputs, logs, caches and the results store to a throwaway directory
+_TMP = tempfile.mkdtemp(prefix="kocem-tests-")
+os.environ.update({
+    "OUTPUT_PATH": os.path.join(_TMP, "output"),
+    "LOG_DIR": os.path.join(_TMP, "logs"),
+    "RESPONSE_CACHE_PATH": os.path.join(_TMP, "responses.sqlite"),
+    "JUDGE_CACHE_PATH": os.path.join(_TMP, "judge.sqlite"),
+    "RESULTS_STORE_PATH": os.path.join(_TMP, "output", "results.parquet"),
+    "PROMPT_PATH": os.path.join(ROOT, "prompts"),
+})
+os.environ.setdefault("OPENAI_API_KEY", "test")
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_rows(n: int, subset: str = "Materials") -> list:
+    """Dataset rows of a subset in the KoCEM schema, without images."""
+    return [
+        {
+            "id": f"{subset}_{i}",
+            "question_type": "multiple-choice",
+            "difficulty": "Easy",
+            "human_acc": None,
+            "en_question": f"Question {i}?",
+            "en_options": json.dumps(["steel", "wood", "glass", "stone"]),
+            "en_answer": "steel",
+            "answer_key": "A",
+            "en_explanation": "",
+            "image": {"path": None, "bytes": None},
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def rows():
+    return make_rows
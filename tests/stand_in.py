@@ -0,0 +1,231 @@
+"""
+Minimal OpenAI-compatible server for tests.
+
+Serves chat completions, the Batch API (file upload, batches, polling, cancellation,
+output files) and the vLLM `/metrics` and `/health` endpoints from a background thread.
+Behavior is configured per instance (answer, delay, failing requests, batch outcome) and
+everything it receives is recorded for assertions.
+"""
+
+import email, json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+
+
+def _text(messages: list) -> str:
+    """All text of chat messages, for matching failure markers."""
+    parts = []
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(part.get("text", "") for part in content)
+    return "\n".join(parts)
+
+
+
+class StandIn:
+    """
+    OpenAI-compatible stand-in server.
+
+    Args:
+        answer (str): Content of every chat completion.
+        delay (float): Seconds every chat completion takes.
+        fail_markers (Iterable[str]): Chat requests whose text contains one of these fail with HTTP 500.
+        fail_ids (Iterable[str]): Batch requests (custom ids) that end with an error.
+        batch_polls (int): Polls a batch stays `in_progress` before it ends.
+        batch_status (str): Status a batch ends with (e.g., completed, expired, failed).
+        model_name (str): `model_name` label of the `/metrics` counters.
+    """
+    def __init__(self,
+        answer: str = "(A)",
+        delay: float = 0.0,
+        fail_markers: Iterable[str] = (),
+        fail_ids: Iterable[str] = (),
+        batch_polls: int = 1,
+        batch_status: str = "completed",
+        model_name: str = "stand-in"
+    ):
+        self.answer = answer
+        self.delay = delay
+        self.fail_markers = tuple(fail_markers)
+        self.fail_ids = set(fail_ids)
+        self.batch_polls = batch_polls
+        self.batch_status = batch_status
+        self.model_name = model_name
+        self.healthy = True
+
+        self.chat_requests: list = []  # request bodies in arrival order
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.files: dict = {}
+        self.batches: dict = {}
+        self.polls = 0
+        self.cancelled: list = []
+        self.batch_events: list = []  # ("created" | "ended", batch id) in order
+        self.counters = {"prompt_tokens": 0, "generation_tokens": 0, "prefix_cache_queries": 0, "prefix_cache_hits": 0}
+        self._last_prompt = ""
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandIn":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---------------- Responses -----------------
+    def completion(self, body: dict) -> dict:
+        prompt = json.dumps(body["messages"], ensure_ascii=False)
+        prompt_tokens = max(1, len(prompt) // 4)
+        with self._lock:
+            shared = 0
+            for a, b in zip(prompt, self._last_prompt):
+                if a != b:
+                    break
+                shared += 1
+            self._last_prompt = prompt
+            self.counters["prompt_tokens"] += prompt_tokens
+            self.counters["generation_tokens"] += 3
+            self.counters["prefix_cache_queries"] += prompt_tokens
+            self.counters["prefix_cache_hits"] += shared // 4
+        return {
+            "id": f"chatcmpl-{len(self.chat_requests)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.answer}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 3, "total_tokens": prompt_tokens + 3},
+        }
+
+    def metrics(self) -> str:
+        label = f'{{model_name="{self.model_name}"}}'
+        lines = ["# HELP vllm:prompt_tokens_total Number of prefill tokens processed."]
+        for key, value in self.counters.items():
+            lines.append(f"vllm:{key}_total{label} {float(value)}")
+        # Counters of another model on the same server must be ignored
+        lines.append('vllm:prompt_tokens_total{model_name="other"} 1000.0')
+        return "\n".join(lines) + "\n"
+
+    def batch(self, batch_id: str) -> dict:
+        batch = self.batches[batch_id]
+        if batch["status"] == "in_progress":
+            batch["polls"] += 1
+            if batch["polls"] > self.batch_polls:
+                self._finish(batch)
+        view = {key: value for key, value in batch.items() if key != "polls"}
+        return view
+
+    def _finish(self, batch: dict) -> None:
+        batch["status"] = self.batch_status
+        self.batch_events.append(("ended", batch["id"]))
+        if self.batch_status == "failed":
+            return
+        lines = []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            custom_id = request["custom_id"]
+            if custom_id in self.fail_ids:
+                lines.append({"id": f"req-{custom_id}", "custom_id": custom_id, "response": None, "error": {"code": "server_error", "message": "boom"}})
+            else:
+                completion = self.completion(request["body"])
+                lines.append({"id": f"req-{custom_id}", "custom_id": custom_id, "response": {"status_code": 200, "request_id": custom_id, "body": completion}, "error": None})
+        file_id = f"file-out-{batch['id']}"
+        self.files[file_id] = "\n".join(json.dumps(line) for line in lines) + "\n"
+        batch["output_file_id"] = file_id
+
+
+def _handler(stand_in: StandIn):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status: int, body=None, content_type: str = "application/json"):
+            data = body.encode() if isinstance(body, str) else json.dumps(body if body is not None else {}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/health":
+                return self._reply(200 if stand_in.healthy else 503)
+            if path == "/metrics":
+                return self._reply(200, stand_in.metrics(), "text/plain")
+            if path.startswith("/v1/batches/"):
+                stand_in.polls += 1
+                return self._reply(200, stand_in.batch(path.rsplit("/", 1)[1]))
+            if path.startswith("/v1/files/") and path.endswith("/content"):
+                return self._reply(200, stand_in.files[path.split("/")[3]], "application/octet-stream")
+            self._reply(404, {"error": {"message": f"Unknown path {path}"}})
+
+        def do_POST(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/v1/chat/completions":
+                return self._chat(json.loads(self._body()))
+            if path == "/v1/files":
+                return self._upload()
+            if path == "/v1/batches":
+                body = json.loads(self._body())
+                batch_id = f"batch-{len(stand_in.batches)}"
+                stand_in.batches[batch_id] = {
+                    "id": batch_id, "object": "batch", "endpoint": body["endpoint"], "input_file_id": body["input_file_id"],
+                    "completion_window": body["completion_window"], "status": "in_progress", "created_at": int(time.time()), "polls": 0,
+                }
+                stand_in.batch_events.append(("created", batch_id))
+                return self._reply(200, stand_in.batch(batch_id))
+            if path.startswith("/v1/batches/") and path.endswith("/cancel"):
+                batch_id = path.split("/")[3]
+                stand_in.cancelled.append(batch_id)
+                stand_in.batches[batch_id]["status"] = "cancelled"
+                return self._reply(200, stand_in.batch(batch_id))
+            self._reply(404, {"error": {"message": f"Unknown path {path}"}})
+
+        def _chat(self, body: dict):
+            with stand_in._lock:
+                stand_in.chat_requests.append(body)
+                stand_in.in_flight += 1
+                stand_in.max_in_flight = max(stand_in.max_in_flight, stand_in.in_flight)
+            try:
+                time.sleep(stand_in.delay)
+                if any(marker in _text(body["messages"]) for marker in stand_in.fail_markers):
+                    return self._reply(500, {"error": {"message": "boom", "type": "server_error"}})
+                self._reply(200, stand_in.completion(body))
+            finally:
+                with stand_in._lock:
+                    stand_in.in_flight -= 1
+
+        def _upload(self):
+            message = email.message_from_bytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + self._body()
+            )
+            fields = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True) for part in message.get_payload()}
+            file_id = f"file-{len(stand_in.files)}"
+            stand_in.files[file_id] = fields["file"].decode()
+            self._reply(200, {
+                "id": file_id, "object": "file", "bytes": len(fields["file"]), "created_at": int(time.time()),
+                "filename": "batch_input.jsonl", "purpose": fields["purpose"].decode(), "status": "processed",
+            })
+
+    return Handler
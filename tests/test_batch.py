@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+
+from models import APIBase
+from models.batch import OpenAIBatchClient, run_batches
+from stand_in import StandIn
+
+
+def _prompts(ids):
+    return {sample_id: [SystemMessage(content="Answer with the letter."), HumanMessage(content=f"{sample_id}?")] for sample_id in ids}
+
+
+def _client(stand_in: StandIn, timeout: float = 5) -> OpenAIBatchClient:
+    return OpenAIBatchClient(base_url=f"{stand_in.url}/v1", poll_interval=0.01, timeout=timeout)
+
+
+
+class StandInAPI(APIBase):
+    """OpenAI-compatible model and batch API, both served by a stand-in."""
+    def __init__(self, stand_in: StandIn, **kwargs):
+        super().__init__(cache=False, **kwargs)
+        self.model_id = "openai/stand-in"
+        self.model = ChatOpenAI(base_url=f"{stand_in.url}/v1", api_key="test", model="stand-in", max_retries=0)
+        self.stand_in = stand_in
+
+    def batch_client(self):
+        return _client(self.stand_in)
+
+
+def test_submit_poll_and_results(tmp_path):
+    with StandIn(batch_polls=2, fail_ids={"s1"}) as stand_in:
+        responses = _client(stand_in)(str(tmp_path / "batch_input.jsonl"), "stand-in", _prompts(["s0", "s1", "s2"]))
+
+    # The failed request is left out; the others are mapped back to their ids
+    assert set(responses) == {"s0", "s2"}
+    assert responses["s0"].content == "(A)"
+    assert responses["s0"].usage_metadata["output_tokens"] == 3
+    submitted = [json.loads(line) for line in (tmp_path / "batch_input.jsonl").read_text().splitlines()]
+    assert [request["custom_id"] for request in submitted] == ["s0", "s1", "s2"]
+    assert stand_in.polls >= 3
+
+
+def test_timeout_cancels_the_batch(tmp_path):
+    with StandIn(batch_polls=10 ** 6) as stand_in:
+        with pytest.raises(TimeoutError):
+            _client(stand_in, timeout=0.05)(str(tmp_path / "batch_input.jsonl"), "stand-in", _prompts(["s0"]))
+    assert stand_in.cancelled == ["batch-0"]
+
+
+@pytest.mark.parametrize("status, answered", [("expired", {"s0", "s1"}), ("failed", set())])
+def test_unsuccessful_batch_returns_what_it_answered(tmp_path, status, answered):
+    with StandIn(batch_status=status) as stand_in:
+        responses = _client(stand_in)(str(tmp_path / "batch_input.jsonl"), "stand-in", _prompts(["s0", "s1"]))
+    assert set(responses) == answered
+
+
+def test_unanswered_samples_run_online_concurrently(rows):
+    dataset = rows(8)
+    failed = [row["id"] for row in dataset[:6]]
+    with StandIn(delay=0.1, fail_ids=failed) as stand_in:
+        api = StandInAPI(stand_in)
+        job = api.open_job("Materials", "test", override=True, dataset=dataset)
+        files = api.run_batch(job, max_retries=1, max_timeout=10, concurrency=4)
+
+    # Only the requests the batch failed are sent online, several at a time
+    assert len(stand_in.chat_requests) == 6
+    assert 1 < stand_in.max_in_flight <= 4
+    with open(files["result"]) as f:
+        assert json.load(f)["num_example"] == 8
+
+
+def test_batches_of_every_job_are_submitted_before_polling(rows):
+    with StandIn(batch_polls=2) as stand_in:
+        api = StandInAPI(stand_in)
+        jobs = [api.open_job(subset, "test", override=True, dataset=rows(3, subset)) for subset in ("Materials", "Interior")]
+        files = run_batches(jobs, max_retries=1, max_timeout=10)
+
+    assert [event for event, _ in stand_in.batch_events] == ["created", "created", "ended", "ended"]
+    assert not stand_in.chat_requests
+    for paths in files:
+        with open(paths["result"]) as f:
+            assert json.load(f)["num_example"] == 3
+
+
+def test_timed_out_batches_are_cancelled_and_reported(rows):
+    with StandIn(batch_polls=10 ** 6) as stand_in:
+        api = StandInAPI(stand_in)
+        api.batch_client = lambda: OpenAIBatchClient(base_url=f"{stand_in.url}/v1", poll_interval=0.01, timeout=0.2)
+        jobs = [api.open_job(subset, "test", override=True, dataset=rows(2, subset)) for subset in ("Materials", "Interior")]
+        with pytest.raises(RuntimeError, match="2 batch job"):
+            run_batches(jobs, max_retries=1, max_timeout=10)
+    assert sorted(stand_in.cancelled) == ["batch-0", "batch-1"]
@@ -0,0 +1,27 @@
+import os
+
+from langchain_core.messages import AIMessage
+
+from utils.cache import ResponseCache
+
+
+def test_entries_are_evicted_during_a_run(tmp_path):
+    cache = ResponseCache(os.path.join(tmp_path, "responses.sqlite"), max_entries=2, evict_interval=0)
+    for i in range(5):
+        cache.set(f"k{i}", AIMessage(content=str(i)))
+    assert cache.stats()["entries"] == 5
+
+    cache.log_stats()
+    assert cache.stats()["entries"] == 2
+    assert cache.get("k4").content == "4"
+    assert cache.get("k0") is None
+    cache.close()
+
+
+def test_eviction_waits_for_the_interval(tmp_path):
+    cache = ResponseCache(os.path.join(tmp_path, "responses.sqlite"), max_entries=1, evict_interval=3600)
+    for i in range(3):
+        cache.set(f"k{i}", AIMessage(content=str(i)))
+    cache.log_stats()
+    assert cache.stats()["entries"] == 3
+    cache.close()
@@ -0,0 +1,39 @@
+import json
+
+from utils.checkpoint import Checkpoint
+
+
+def test_resume_after_truncated_write(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    # The run crashed while writing the record of "b"
+    path.write_text('{"id": "a", "x": 0}\n{"id": "b", "x": 1')
+
+    checkpoint = Checkpoint(str(path))
+    assert set(checkpoint.completed) == {"a"}
+    checkpoint.append({"id": "b", "x": 1})
+    checkpoint.append({"id": "c"})
+
+    resumed = Checkpoint(str(path))
+    assert resumed.completed == {"a": {"id": "a", "x": 0}, "b": {"id": "b", "x": 1}, "c": {"id": "c"}}
+    assert [json.loads(line)["id"] for line in path.read_text().splitlines()] == ["a", "b", "c"]
+
+
+def test_complete_record_without_newline_is_kept(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text('{"id": "a"}\n{"id": "b"}')
+
+    checkpoint = Checkpoint(str(path))
+    checkpoint.append({"id": "c"})
+
+    assert set(Checkpoint(str(path)).completed) == {"a", "b", "c"}
+
+
+def test_remove(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = Checkpoint(str(path))
+    checkpoint.append({"id": "a"})
+    assert "a" in checkpoint and len(checkpoint) == 1
+
+    checkpoint.remove()
+    assert not path.exists()
+    assert len(Checkpoint(str(path))) == 0
@@ -0,0 +1,69 @@
+import re
+
+import pytest
+
+from utils.eval import INDICATORS_OF_KEYS, TRIVIAL_PATTERNS, KeyResponseMatcher
+
+
+def legacy_key_subresponses(response, indicators=INDICATORS_OF_KEYS):
+    """The matcher `KeyResponseMatcher` replaced, on its first call: '=' is added for the last sub-response only."""
+    indicators = list(indicators)
+    response = response.strip().strip(".").lower()
+    sub_responses = re.split(r'\.\s(?=[A-Z])|\n', response)
+
+    key_responses = []
+    for index, resp in enumerate(sub_responses):
+        if index == len(sub_responses) - 1:
+            indicators.extend(['='])
+
+        shortest_key_response = ""
+        for indicator in indicators:
+            if indicator in resp:
+                if not shortest_key_response:
+                    shortest_key_response = resp.split(indicator)[-1].strip()
+                else:
+                    if len(resp.split(indicator)[-1].strip()) < len(shortest_key_response):
+                        shortest_key_response = resp.split(indicator)[-1].strip()
+
+        is_not_trivial = shortest_key_response.strip() not in TRIVIAL_PATTERNS
+        if shortest_key_response and is_not_trivial:
+            key_responses.append(shortest_key_response)
+
+    if len(key_responses) == 0:
+        return [response]
+    return key_responses
+
+
+RESPONSES = [
+    "The load is 12 kN.",
+    "x = 3\nso the answer is 4",                                    # '=' outside the last line is not an indicator
+    "We get a = 2. Therefore b = 5",                                 # '=' applies to the last sentence only
+    "F = m a = 20 N",                                                 # last '=' wins
+    "Nothing to see here",
+    "The answer is:\nthus it is 7.",                                 # trivial tail is skipped
+    "따라서 정답은 3이다",
+    "결과는 10 일 수 있다\n최종 답은 4",
+    "The answer is is 5 and so so 6",
+    "",
+]
+
+
+@pytest.mark.parametrize("response", RESPONSES)
+def test_key_tails_match_the_legacy_matcher(response):
+    matcher = KeyResponseMatcher()
+    assert matcher(response) == legacy_key_subresponses(response)
+    # Repeated calls see the same indicators; the legacy list grew '=' for every later sub-response
+    assert matcher(response) == legacy_key_subresponses(response)
+
+
+def test_equation_indicator_only_applies_to_the_last_sub_response():
+    matcher = KeyResponseMatcher()
+    matcher("a = 1")
+    assert matcher("x = 3\nno key here") == ["x = 3\nno key here"]
+
+
+def test_self_overlapping_indicators_keep_split_semantics():
+    indicators = ("==", "aa")
+    matcher = KeyResponseMatcher(indicators=indicators)
+    for response in ["x === 3", "baaa 4", "p == q === r"]:
+        assert matcher(response) == legacy_key_subresponses(response, indicators)
@@ -0,0 +1,25 @@
+import os
+
+from eval_total import evaluate_total
+from utils.data import save_json
+from utils.store import get_results_store
+
+
+def test_store_and_legacy_subjects_are_merged():
+    model = "merge-model"
+    # Materials is in the store; Architectural_Planning predates it
+    judges = {f"m{i}": {"judge": "Correct" if i < 3 else "Incorrect"} for i in range(4)}
+    get_results_store().append([{"id": id_} for id_ in judges], judges, "mcqa", "en", model, "test", "Materials")
+    legacy_dir = os.path.join(os.environ["OUTPUT_PATH"], "mcqa", "en", model, "test", "Architectural_Planning")
+    os.makedirs(legacy_dir)
+    save_json(os.path.join(legacy_dir, "evaluation.json"), {"p0": {"judge": "Correct"}, "p1": {"judge": "Incorrect"}})
+    # Also on disk, but the store supersedes it
+    stale_dir = os.path.join(os.environ["OUTPUT_PATH"], "mcqa", "en", model, "test", "Materials")
+    os.makedirs(stale_dir)
+    save_json(os.path.join(stale_dir, "evaluation.json"), {f"m{i}": {"judge": "Incorrect"} for i in range(4)})
+
+    result = evaluate_total(model, "test")
+
+    assert result["num_example"] == 6
+    assert abs(result["acc"] - 4 / 6) < 1e-9
+    assert sum(metrics["num_example"] for metrics in result["by_dimension"].values()) == 6
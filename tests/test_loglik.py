@@ -0,0 +1,42 @@
+import pytest
+
+import bots.gpt_as_judge
+from models import APIBase
+
+
+class ScoringAPI(APIBase):
+    scores_options = True
+
+
+def _unparsed():
+    return [{"id": "s0", "question_type": "multiple-choice", "question": "Q?", "options": ["a", "b"], "model_answer": None, "parsed_pred": None}]
+
+
+def test_loglik_needs_a_scoring_backend():
+    with pytest.raises(ValueError):
+        APIBase(task="mcqa-loglik", cache=False)
+
+
+def test_loglik_answers_are_not_judged(monkeypatch):
+    def get_judge():
+        raise AssertionError("mcqa-loglik predictions must not be sent to the judge")
+
+    monkeypatch.setattr(bots.gpt_as_judge, "get_judge", get_judge)
+    results = _unparsed()
+    ScoringAPI(task="mcqa-loglik", cache=False)._judge_unparsed(results)
+    assert results[0]["parsed_pred"] is None
+
+
+def test_judged_answers_are_normalized_like_the_parser(monkeypatch):
+    sent = []
+
+    class Judge:
+        def judge_many(self, items):
+            sent.extend(items)
+            return [bots.gpt_as_judge.JudgeResponse(label="B", reason="") for _ in items]
+
+    monkeypatch.setattr(bots.gpt_as_judge, "get_judge", Judge)
+    results = [{"id": "s0", "question_type": "multiple-choice", "question": "Q?", "options": {"A": "a", "B": "b"}, "model_answer": "it is the second.", "parsed_pred": None}]
+    APIBase(cache=False)._judge_unparsed(results)
+    assert sent[0][1] == " it is the second "
+    assert results[0]["parsed_pred"] == "B"
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from models.pool import EndpointPool, Replica, split_endpoints
+from stand_in import StandIn
+
+
+class FakeModel:
+    """Chat model of one replica: answers after `delay` seconds, or raises while `fail` is set."""
+    model_name = "fake"
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("replica down")
+        return f"answer to {messages}"
+
+
+def _pool(*models: FakeModel, health_url=None, **kwargs) -> EndpointPool:
+    return EndpointPool([Replica(f"http://replica-{i}/v1", model, health_url) for i, model in enumerate(models)], **kwargs)
+
+
+async def _invoke(pool: EndpointPool, n: int = 1):
+    return await asyncio.gather(*(pool.ainvoke(f"q{i}") for i in range(n)), return_exceptions=True)
+
+
+def test_split_endpoints():
+    assert split_endpoints(" http://a/v1, http://b/v1 ,") == ["http://a/v1", "http://b/v1"]
+    assert split_endpoints(["http://a/v1"]) == ["http://a/v1"]
+    assert split_endpoints(None) == []
+
+
+def test_requests_go_to_the_least_outstanding_replica():
+    models = [FakeModel(delay=0.05) for _ in range(3)]
+    pool = _pool(*models)
+
+    async def run():
+        # The first replica is busy, so the next requests spread over the idle ones
+        busy = asyncio.ensure_future(pool.ainvoke("q"))
+        await asyncio.sleep(0)
+        await _invoke(pool, 5)
+        await busy
+
+    asyncio.run(run())
+    assert [model.calls for model in models] == [2, 2, 2]
+    assert all(replica["outstanding"] == 0 for replica in pool.stats())
+
+
+def test_replica_is_ejected_after_max_failures():
+    down, up = FakeModel(fail=True), FakeModel()
+    pool = _pool(down, up, max_failures=2, eject_seconds=60)
+
+    async def run():
+        for _ in range(6):
+            await _invoke(pool)
+
+    asyncio.run(run())
+    assert down.calls == 2
+    assert up.calls == 4
+    assert [replica["healthy"] for replica in pool.stats()] == [False, True]
+
+
+def test_slow_replica_is_ejected():
+    slow, fast = FakeModel(delay=0.05), [FakeModel(delay=0.001) for _ in range(2)]
+    pool = _pool(slow, *fast, slow_factor=3.0, min_requests=2, eject_seconds=60)
+
+    async def run():
+        # Bursts of three keep every replica busy, so the slow one keeps getting requests
+        for _ in range(4):
+            await _invoke(pool, 3)
+
+    asyncio.run(run())
+    assert [replica["healthy"] for replica in pool.stats()] == [False, True, True]
+
+
+@pytest.mark.parametrize("with_health_url", [True, False])
+def test_ejected_replica_is_readmitted_after_a_health_check(with_health_url):
+    flaky, steady = FakeModel(fail=True), FakeModel()
+
+    async def run(stand_in):
+        pool = _pool(flaky, steady, health_url=f"{stand_in.url}/health" if with_health_url else None, max_failures=1, eject_seconds=0)
+        await _invoke(pool)
+        assert not pool.replicas[0].healthy
+
+        # The next request schedules a health check of the ejected replica
+        stand_in.healthy = False
+        await _invoke(pool)
+        await asyncio.sleep(0.2)
+        assert pool.replicas[0].healthy is not with_health_url
+
+        stand_in.healthy = True
+        flaky.fail = False
+        await _invoke(pool)
+        await asyncio.sleep(0.2)
+        assert pool.replicas[0].healthy
+        assert pool.replicas[0].failures == 0
+
+    with StandIn() as stand_in:
+        asyncio.run(run(stand_in))
+
+
+def test_all_ejected_falls_back_to_the_first_ejected():
+    first, second = FakeModel(fail=True), FakeModel(fail=True)
+    pool = _pool(first, second, max_failures=1, eject_seconds=60)
+
+    async def run():
+        await _invoke(pool)
+        await _invoke(pool)
+        assert not any(replica["healthy"] for replica in pool.stats())
+
+        # Requests still go out, to the replica ejected first; its success readmits it
+        first.fail = False
+        assert await pool.ainvoke("q") == "answer to q"
+        assert [replica["healthy"] for replica in pool.stats()] == [True, False]
+        await _invoke(pool, 2)
+
+    asyncio.run(run())
+    assert (first.calls, second.calls) == (4, 1)
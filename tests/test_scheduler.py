@@ -0,0 +1,105 @@
+import io
+
+import pytest
+from PIL import Image
+
+from conftest import make_rows
+from models import APIBase
+from models.scheduler import Scheduler, SubsetJob
+from utils.checkpoint import Checkpoint
+
+
+class FakeAPI:
+    """Just enough of APIBase for the scheduler: answers every sample, optionally fails to finalize."""
+    def __init__(self, model_id: str, fail_finalize: bool = False):
+        self.model_id = model_id
+        self.fail_finalize = fail_finalize
+        self.prompt_key = ("en", "mcqa")
+        self.finalized = []
+
+    def _prepare_sample(self, sample: dict, subset: str, shared: dict | None = None):
+        return {"id": sample["id"]}, [sample["id"]]
+
+    async def _arun_prepared(self, job, handler, prompt_msgs, max_retries, max_timeout):
+        job.checkpoint.append({**handler, "model_answer": "(A)"})
+        return handler
+
+    def finalize_job(self, job):
+        if self.fail_finalize:
+            raise OSError("results store unavailable")
+        self.finalized.append(job.name)
+        return {"result": job.files["result"]}
+
+
+def _job(api, tmp_path, subset: str, n: int = 3) -> SubsetJob:
+    directory = tmp_path / api.model_id / subset
+    directory.mkdir(parents=True)
+    dataset = [{"id": f"{subset}_{i}"} for i in range(n)]
+    return SubsetJob(api, subset, "test", dataset, Checkpoint(str(directory / "checkpoint.jsonl")), {"result": str(directory / "result.json")})
+
+
+def test_finalize_failure_is_reported_with_the_job(tmp_path):
+    good, bad = FakeAPI("good"), FakeAPI("bad", fail_finalize=True)
+    jobs = [_job(good, tmp_path, "Materials"), _job(bad, tmp_path, "Interior")]
+
+    with pytest.raises(RuntimeError, match="1 job\\(s\\) failed: bad Interior/test"):
+        Scheduler(concurrency=2).run(jobs)
+
+    assert good.finalized == ["Materials/test"]
+    # The failed job keeps its checkpoint for the next run
+    assert len(jobs[1].checkpoint) == 3
+
+
+
+class CountedRows(list):
+    """Dataset rows that count how often they are decoded."""
+    reads = 0
+
+    def __getitem__(self, index):
+        CountedRows.reads += 1
+        return super().__getitem__(index)
+
+
+class PreparingAPI(APIBase):
+    """Builds prompts like any backend and answers without a model."""
+    encoded: list = []
+
+    def __init__(self, model_id: str, **kwargs):
+        super().__init__(cache=False, **kwargs)
+        self.model_id = model_id
+        self.prompts = {}
+
+    def encode_image(self, image_bytes):
+        PreparingAPI.encoded.append(self.image_policy.max_side)
+        return super().encode_image(image_bytes)
+
+    async def _arun_prepared(self, job, handler, prompt_msgs, max_retries, max_timeout):
+        self.prompts[handler["id"]] = prompt_msgs
+        job.checkpoint.append(handler)
+        return handler
+
+    def finalize_job(self, job):
+        return {}
+
+
+def test_rows_are_shared_across_image_policies(tmp_path):
+    buffer = io.BytesIO()
+    Image.new("RGB", (128, 96), "white").save(buffer, format="PNG")
+    rows = CountedRows(make_rows(4))
+    for row in rows:
+        row["image"] = {"path": None, "bytes": buffer.getvalue()}
+    # Two providers' catalog policies, one of them used by two models
+    apis = [PreparingAPI("a/one", image_policy={"max_side": 64}), PreparingAPI("a/two", image_policy={"max_side": 64}), PreparingAPI("b/three", image_policy={"max_side": 32})]
+    jobs = [_job(api, tmp_path, "Materials", n=0) for api in apis]
+    for job in jobs:
+        job.dataset = rows
+    CountedRows.reads, PreparingAPI.encoded[:] = 0, []
+
+    Scheduler(concurrency=2).run(jobs)
+
+    assert CountedRows.reads == len(rows)
+    assert sorted(PreparingAPI.encoded) == [32] * 4 + [64] * 4
+    one, two, three = (api.prompts["Materials_0"] for api in apis)
+    assert one is two
+    assert one[1].content[0] == three[1].content[0]
+    assert one[1].content[1] != three[1].content[1]
@@ -0,0 +1,13 @@
+from apis.standalone import GPUFreeAPI
+from schemas.llm import ImagePolicy
+
+
+def test_model_missing_from_the_catalog_runs_without_limits():
+    api = GPUFreeAPI("openai/not-in-the-catalog", cache=False)
+    assert api.rate_limiter is None
+    assert api.image_policy == ImagePolicy()
+
+
+def test_rate_limit_override_without_catalog_entry():
+    api = GPUFreeAPI("openai/also-not-in-the-catalog", rpm=60, cache=False)
+    assert api.rate_limiter is not None
@@ -0,0 +1,108 @@
+import time
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+
+from apis.from_vllm import ServerMetrics, VLLMClient, VLLMOpenAIAPI, prefix_order
+from stand_in import StandIn
+
+
+def _prompt(text: str, image: str, system: str = "Answer with the letter.") -> list:
+    # Text before the image, like `APIBase.construct_prompt` without `image_first`
+    return [
+        SystemMessage(content=system),
+        HumanMessage(content=[{"type": "text", "text": text}, {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image}"}}]),
+    ]
+
+
+def _client(stand_in: StandIn, max_in_flight: int) -> VLLMClient:
+    model = ChatOpenAI(base_url=f"{stand_in.url}/v1", api_key="EMPTY", model="stand-in", max_retries=0)
+    return VLLMClient(model, [f"{stand_in.url}/v1"], max_in_flight=max_in_flight)
+
+
+def _text(request: dict) -> str:
+    return request["messages"][1]["content"][0]["text"]
+
+
+def test_prefix_order_groups_by_system_prompt_then_image():
+    prompts = {
+        "s0": _prompt("a", "IMG2"),
+        "s1": _prompt("b", "IMG1"),
+        "s2": _prompt("c", "IMG2"),
+        "s3": _prompt("a", "IMG1", system="Explain, then answer."),
+        "s4": _prompt("d", "IMG1"),
+    }
+    assert prefix_order(prompts) == ["s1", "s4", "s0", "s2", "s3"]
+
+
+def test_requests_are_sent_in_prefix_order():
+    prompts = {f"s{i}": _prompt(f"question {i}", f"IMG{i % 3}") for i in range(9)}
+    with StandIn() as stand_in:
+        responses = _client(stand_in, max_in_flight=1)(None, "stand-in", prompts)
+
+    assert set(responses) == set(prompts)
+    assert [_text(request) for request in stand_in.chat_requests] == [prompts[sample_id][1].content[0]["text"] for sample_id in prefix_order(prompts)]
+
+
+def test_max_in_flight_bounds_concurrent_requests():
+    prompts = {f"s{i}": _prompt(f"question {i}", "IMG") for i in range(12)}
+    with StandIn(delay=0.05) as stand_in:
+        _client(stand_in, max_in_flight=3)(None, "stand-in", prompts)
+    assert stand_in.max_in_flight == 3
+
+
+def test_failed_requests_are_left_out():
+    prompts = {f"s{i}": _prompt("bad question" if i in (1, 4) else f"question {i}", "IMG") for i in range(6)}
+    with StandIn(fail_markers=["bad"]) as stand_in:
+        client = _client(stand_in, max_in_flight=4)
+        responses = client(None, "stand-in", prompts)
+
+    assert set(responses) == {"s0", "s2", "s3", "s5"}
+    assert responses["s0"].content == "(A)"
+    assert "latency" in responses["s0"].response_metadata
+    assert client.throughput["samples"] == 4
+    assert client.throughput["source"] == "server"
+
+
+def test_server_metrics_are_read_for_the_served_model():
+    with StandIn() as stand_in:
+        _client(stand_in, max_in_flight=2)(None, "stand-in", {"s0": _prompt("question", "IMG"), "s1": _prompt("question", "IMG")})
+        counters = ServerMetrics([f"{stand_in.url}/v1"], "stand-in").read()
+        unfiltered = ServerMetrics([f"{stand_in.url}/v1/"]).read()
+        # Counters are summed over replicas
+        doubled = ServerMetrics([f"{stand_in.url}/v1", stand_in.url], "stand-in").read()
+
+    assert counters == {key: float(value) for key, value in stand_in.counters.items()}
+    assert counters["prefix_cache_hits"] > 0
+    assert unfiltered["prompt_tokens"] == counters["prompt_tokens"] + 1000
+    assert doubled["generation_tokens"] == 2 * counters["generation_tokens"]
+
+
+def test_server_metrics_without_endpoint():
+    with StandIn() as stand_in:
+        url = f"{stand_in.url}/v1"
+    assert ServerMetrics([url], "stand-in").read() is None
+
+
+def test_hung_requests_time_out():
+    prompts = {f"s{i}": _prompt(f"question {i}", "IMG") for i in range(4)}
+    with StandIn(delay=2.0) as stand_in:
+        started = time.perf_counter()
+        responses = _client(stand_in, max_in_flight=4)(None, "stand-in", prompts, max_retries=1, max_timeout=0.2)
+        elapsed = time.perf_counter() - started
+    assert responses == {}
+    assert elapsed < 1.5
+
+
+def test_failed_requests_are_retried():
+    prompts = {"s0": _prompt("bad question", "IMG"), "s1": _prompt("question", "IMG")}
+    with StandIn(fail_markers=["bad"]) as stand_in:
+        responses = _client(stand_in, max_in_flight=2)(None, "stand-in", prompts, max_retries=2)
+    assert set(responses) == {"s1"}
+    assert len(stand_in.chat_requests) == 3
+    assert len(responses["s1"].response_metadata["attempts"]) == 1
+
+
+def test_image_first_is_part_of_the_prompt_key():
+    apis = [VLLMOpenAIAPI("vllm/stand-in", base_url="http://127.0.0.1:1/v1", image_first=image_first, cache=False) for image_first in (False, True)]
+    assert apis[0].prompt_key != apis[1].prompt_key